@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Local load test comparing the HTTP transports of the MCP Terminal Server.
+
+Starts the server once per transport (SSE, streamable HTTP and stateless
+streamable HTTP) on a free local port, runs a number of concurrent clients
+that each open a session and call a tool repeatedly, and prints throughput
+and latency percentiles for each transport. On Linux it also reports the
+server's CPU time per call, which isolates the transport's server-side cost
+from the load generator's.
+
+Usage:
+    python benchmarks/transport_load.py --clients 20 --calls 50
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+from mcp.client.streamable_http import streamablehttp_client
+
+# (label, server arguments, client endpoint path)
+TRANSPORTS = [
+    ("sse", ["--mode", "sse"], "/sse"),
+    ("streamable-http", ["--mode", "streamable-http"], "/mcp"),
+    ("streamable-http stateless", ["--mode", "streamable-http", "--stateless"], "/mcp"),
+]
+
+
+def free_port() -> int:
+    """Return a TCP port nobody is listening on."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def cpu_seconds(pid: int) -> Optional[float]:
+    """CPU time used by a process so far, or None where /proc is missing."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    # utime and stime, fields 14 and 15 of the full line
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+async def wait_for_port(port: int, timeout: float = 30.0) -> None:
+    """Wait until the server accepts connections."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+async def run_client(
+    label: str, url: str, calls: int, tool: str, args: Dict, latencies: List[float]
+) -> None:
+    """Open one session and call the tool repeatedly."""
+    if label == "sse":
+        transport = sse_client(url)
+    else:
+        transport = streamablehttp_client(url)
+    async with transport as streams:
+        async with ClientSession(streams[0], streams[1]) as session:
+            await session.initialize()
+            for _ in range(calls):
+                started = time.perf_counter()
+                result = await session.call_tool(tool, args)
+                latencies.append(time.perf_counter() - started)
+                if result.isError:
+                    raise RuntimeError(result.content)
+
+
+async def measure(label: str, server_args: List[str], path: str, options) -> Dict:
+    """Run the load against one transport."""
+    port = free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            os.path.join(project_root, "mcp_terminal.py"),
+            "--controller",
+            "subprocess",
+            "--port",
+            str(port),
+            "--log-level",
+            "ERROR",
+            *server_args,
+        ],
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        await wait_for_port(port)
+        url = f"http://127.0.0.1:{port}{path}"
+        tool_args = {"command": options.command} if options.command else {}
+        tool = "execute_command" if options.command else "get_terminal_info"
+        latencies: List[float] = []
+        cpu_before = cpu_seconds(process.pid)
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(
+                run_client(label, url, options.calls, tool, tool_args, latencies)
+                for _ in range(options.clients)
+            )
+        )
+        elapsed = time.perf_counter() - started
+        cpu_after = cpu_seconds(process.pid)
+    finally:
+        process.terminate()
+        process.wait()
+
+    latencies.sort()
+    return {
+        "transport": label,
+        "calls": len(latencies),
+        "seconds": elapsed,
+        "throughput": len(latencies) / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p95": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "p99": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "cpu": (
+            (cpu_after - cpu_before) / len(latencies) * 1000
+            if cpu_before is not None and cpu_after is not None
+            else None
+        ),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=20, help="Concurrent clients")
+    parser.add_argument("--calls", type=int, default=50, help="Calls per client")
+    parser.add_argument(
+        "--command",
+        help="Run this command with execute_command instead of calling "
+        "get_terminal_info",
+    )
+    options = parser.parse_args()
+
+    print(
+        f"{'transport':<28}{'calls':>7}{'seconds':>9}{'calls/s':>10}"
+        f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'server cpu ms/call':>20}"
+    )
+    for label, server_args, path in TRANSPORTS:
+        r = await measure(label, server_args, path, options)
+        print(
+            f"{r['transport']:<28}{r['calls']:>7}{r['seconds']:>9.2f}"
+            f"{r['throughput']:>10.1f}{r['p50']:>9.2f}{r['p95']:>9.2f}{r['p99']:>9.2f}"
+            + (f"{r['cpu']:>20.2f}" if r["cpu"] is not None else f"{'-':>20}")
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
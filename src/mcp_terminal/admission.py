@@ -0,0 +1,357 @@
+"""
+Admission control for terminal commands.
+Decides up front whether a command may run, using live signals: commands
+already running, commands waiting for a slot, the host's load average and
+free memory, and each client's token bucket. When the host is saturated a
+command is rejected at once with a hint of when to retry, instead of being
+accepted and timing out later.
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Hashable, Optional, Tuple
+
+from mcp_terminal.metrics import format_float, label, observe_phase
+
+# Default commands waiting for a slot before new ones are rejected
+DEFAULT_MAX_QUEUE = 64
+
+# Default seconds a command may wait for a slot before it is rejected
+DEFAULT_QUEUE_TIMEOUT = 2.0
+
+# Default 1-minute load average per CPU above which commands are rejected
+DEFAULT_MAX_LOAD = 4.0
+
+# Default bytes of available memory below which commands are rejected
+DEFAULT_MIN_FREE_MEMORY = 64 * 1024 * 1024
+
+# Seconds host signals are cached for; also the retry hint when they trip
+SIGNAL_INTERVAL = 1.0
+
+# Retry hint given to commands rejected because the server is shutting down
+SHUTDOWN_RETRY_AFTER = 1.0
+
+# Bounds of the retry hint given to rejected clients, in seconds
+MIN_RETRY_AFTER = 0.1
+MAX_RETRY_AFTER = 60.0
+
+
+def default_max_running() -> int:
+    """Default number of commands running at once."""
+    return max(4, 2 * (os.cpu_count() or 1))
+
+
+def load_per_cpu() -> Optional[float]:
+    """1-minute load average divided by the CPU count, where available."""
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return None
+
+
+def available_memory() -> Optional[int]:
+    """Bytes of memory available to new processes, where /proc exposes it."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+class Overloaded(Exception):
+    """A command was not admitted; the client should retry later."""
+
+    def __init__(self, reason: str, retry_after: float):
+        """
+        Initialize the exception.
+
+        Args:
+            reason: Why the command was rejected
+            retry_after: Seconds after which a retry is likely to succeed
+        """
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = min(max(retry_after, MIN_RETRY_AFTER), MAX_RETRY_AFTER)
+
+    @property
+    def retry_after_ms(self) -> int:
+        """The retry hint in whole milliseconds."""
+        return math.ceil(self.retry_after * 1000)
+
+
+class TokenBucket:
+    """
+    Classic token bucket: rate tokens per second, holding at most burst.
+    """
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """
+        Take a token if one is available.
+
+        Returns:
+            0 if a token was taken, else seconds until one will be available
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """
+    Limits how many commands run at once and rejects work the host cannot take.
+
+    Commands beyond max_running wait in a FIFO queue for up to
+    queue_timeout seconds; a full queue, an expired wait, an overloaded host
+    or an empty token bucket rejects the command with Overloaded.
+    """
+
+    def __init__(
+        self,
+        max_running: Optional[int] = None,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        queue_timeout: float = DEFAULT_QUEUE_TIMEOUT,
+        max_load: Optional[float] = DEFAULT_MAX_LOAD,
+        min_free_memory: Optional[int] = DEFAULT_MIN_FREE_MEMORY,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+    ):
+        """
+        Initialize the controller.
+
+        Args:
+            max_running: Most commands running at once
+            max_queue: Most commands waiting for a slot
+            queue_timeout: Seconds a command may wait for a slot
+            max_load: Load average per CPU above which commands are rejected,
+                      or None to ignore load
+            min_free_memory: Available bytes below which commands are
+                             rejected, or None to ignore memory
+            rate: Commands per second each client may start, or None for no
+                  limit
+            burst: Commands a client may start at once after being idle;
+                   defaults to rate, and at least 1
+        """
+        self.max_running = max_running or default_max_running()
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_load = max_load
+        self.min_free_memory = min_free_memory
+        self.rate = rate
+        self.burst = max(1.0, burst or rate or 1.0)
+        self.running = 0
+        # Futures of waiting commands, resolved when handed a slot
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._buckets: Dict[Hashable, TokenBucket] = {}
+        self._signals: Tuple[float, Optional[float], Optional[int]] = (
+            -math.inf,
+            None,
+            None,
+        )
+        # Moving average of command duration, for retry hints
+        self._avg_duration = 1.0
+        self.rejected: Dict[str, int] = {}
+        self.closed = False
+        # Set when the last running command finishes, while draining
+        self._idle: Optional[asyncio.Event] = None
+
+    @property
+    def queued(self) -> int:
+        """Number of commands waiting for a slot."""
+        return len(self._waiters)
+
+    def stats(self) -> Dict[str, object]:
+        """Return the current load and rejection counts."""
+        _, load, free = self._host_signals()
+        return {
+            "running": self.running,
+            "queued": self.queued,
+            "max_running": self.max_running,
+            "load_per_cpu": load,
+            "available_memory": free,
+            "rejected": dict(self.rejected),
+        }
+
+    def render_prometheus(self) -> str:
+        """Render the current load in the Prometheus text exposition format."""
+        stats = self.stats()
+        lines = []
+        for metric, help_text, value in (
+            ("mcp_commands_running", "Commands running.", stats["running"]),
+            ("mcp_commands_queued", "Commands waiting to run.", stats["queued"]),
+            (
+                "mcp_host_load_per_cpu",
+                "1-minute load average per CPU.",
+                stats["load_per_cpu"],
+            ),
+            (
+                "mcp_host_available_memory_bytes",
+                "Memory available to new processes.",
+                stats["available_memory"],
+            ),
+        ):
+            if value is None:
+                continue
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {format_float(value)}")
+
+        metric = "mcp_commands_rejected_total"
+        lines.append(f"# HELP {metric} Commands rejected by admission control.")
+        lines.append(f"# TYPE {metric} counter")
+        for reason, count in sorted(self.rejected.items()):
+            lines.append(f"{metric}{{reason={label(reason)}}} {count}")
+        return "\n".join(lines) + "\n"
+
+    def forget(self, client: Hashable) -> None:
+        """Drop a client's token bucket, e.g. because it disconnected."""
+        self._buckets.pop(client, None)
+
+    def close(self) -> None:
+        """Reject new commands and those still waiting for a slot."""
+        self.closed = True
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_exception(
+                    self._reject("server shutting down", SHUTDOWN_RETRY_AFTER)
+                )
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        Wait for running commands to finish.
+
+        Args:
+            timeout: Most seconds to wait
+
+        Returns:
+            Whether every command finished in time
+        """
+        if self.running == 0:
+            return True
+        if self._idle is None or self._idle.is_set():
+            self._idle = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    @asynccontextmanager
+    async def admit(self, client: Hashable = None) -> AsyncIterator[None]:
+        """
+        Hold a command slot while the command runs.
+
+        Args:
+            client: Key identifying the client, for its rate limit
+
+        Raises:
+            Overloaded: If the command should not run now
+        """
+        if self.closed:
+            raise self._reject("server shutting down", SHUTDOWN_RETRY_AFTER)
+        self._check_rate(client)
+        self._check_host()
+        if self.running < self.max_running and not self._waiters:
+            self.running += 1
+        else:
+            await self._wait_for_slot()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._avg_duration += 0.2 * (
+                time.monotonic() - started - self._avg_duration
+            )
+            self._release()
+
+    def _reject(self, reason: str, retry_after: float) -> Overloaded:
+        """Count a rejection and build its exception."""
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+        return Overloaded(reason, retry_after)
+
+    def _check_rate(self, client: Hashable) -> None:
+        """Take a token from the client's bucket."""
+        if not self.rate:
+            return
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(self.rate, self.burst)
+        wait = bucket.take()
+        if wait:
+            raise self._reject("rate limited", wait)
+
+    def _host_signals(self) -> Tuple[float, Optional[float], Optional[int]]:
+        """Load per CPU and available memory, refreshed once per interval."""
+        now = time.monotonic()
+        if now - self._signals[0] >= SIGNAL_INTERVAL:
+            self._signals = (now, load_per_cpu(), available_memory())
+        return self._signals
+
+    def _check_host(self) -> None:
+        """Reject while the host is short of CPU or memory."""
+        _, load, free = self._host_signals()
+        if self.max_load is not None and load is not None and load > self.max_load:
+            raise self._reject("host load too high", SIGNAL_INTERVAL)
+        if (
+            self.min_free_memory is not None
+            and free is not None
+            and free < self.min_free_memory
+        ):
+            raise self._reject("host memory too low", SIGNAL_INTERVAL)
+
+    def _slot_eta(self) -> float:
+        """Seconds until a newly queued command would likely get a slot."""
+        rounds = (len(self._waiters) + 1) / self.max_running
+        return self._avg_duration * math.ceil(rounds)
+
+    async def _wait_for_slot(self) -> None:
+        """Queue for a slot handed over by a finishing command."""
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject("queue full", self._slot_eta())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        submitted = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot arrived just as we gave up; pass it on
+                self._release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                raise self._reject("queue timeout", self._slot_eta()) from None
+            raise
+        finally:
+            observe_phase("admission", time.perf_counter() - submitted)
+
+    def _release(self) -> None:
+        """Hand a slot to the oldest waiter, or free it."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.running -= 1
+        if self.running == 0 and self._idle is not None:
+            self._idle.set()
@@ -0,0 +1,189 @@
+"""
+Content-addressed store for command outputs.
+Outputs are saved on disk under their SHA-256 digest, so an output that is
+produced again, by any command or session, is stored once and can be
+referred to by digest. The store is capped in size and drops the least
+recently used artifacts first.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import stat
+import threading
+from collections import OrderedDict
+from typing import Optional, Set
+
+from mcp_terminal.files.atomic import AtomicFile
+
+logger = logging.getLogger("MCP:Terminal:Artifacts")
+
+# Default bytes of artifacts kept on disk
+DEFAULT_ARTIFACT_STORE_SIZE = 256 * 1024 * 1024
+
+_DIGEST_RE = re.compile(r"[0-9a-f]{64}")
+
+
+def default_artifact_dir() -> str:
+    """Per-user cache directory for artifacts."""
+    cache = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(cache, "mcp-terminal", "artifacts")
+
+
+def _make_private_dir(path: str) -> None:
+    """Create a directory only the current user can use, tightening an old one."""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    if stat.S_IMODE(os.stat(path).st_mode) & 0o077:
+        os.chmod(path, 0o700)
+
+
+def digest_of(data: bytes) -> str:
+    """SHA-256 hex digest used as an artifact's address."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def is_digest(value: str) -> bool:
+    """Whether a string is a well-formed artifact digest."""
+    return _DIGEST_RE.fullmatch(value) is not None
+
+
+class ArtifactStore:
+    """
+    Stores blobs on disk by digest, least recently used first out.
+
+    Files live at ``root/<first two hex digits>/<digest>``. Use is recorded
+    in the file's modification time, so the recency order survives restarts
+    and is rebuilt from a directory scan on first use. Methods are
+    thread-safe and do blocking I/O; call them from a worker thread.
+    """
+
+    def __init__(self, root: str, max_size: int = DEFAULT_ARTIFACT_STORE_SIZE):
+        """
+        Initialize the store.
+
+        Args:
+            root: Directory holding the artifacts; created when needed
+            max_size: Most bytes kept on disk
+        """
+        self.root = root
+        self.max_size = max_size
+        self.size = 0
+        self._lock = threading.Lock()
+        # digest -> size, least recently used first; None until scanned
+        self._index: Optional["OrderedDict[str, int]"] = None
+        # Directories already made private
+        self._private: Set[str] = set()
+
+    def __contains__(self, digest: str) -> bool:
+        return is_digest(digest) and os.path.exists(self._path(digest))
+
+    def put(self, data: bytes, digest: Optional[str] = None) -> bool:
+        """
+        Store a blob unless an identical one is already stored.
+
+        Args:
+            data: Content to store
+            digest: The content's digest, if already computed
+
+        Returns:
+            Whether the content is stored; blobs larger than the whole store
+            are not
+        """
+        digest = digest or digest_of(data)
+        if len(data) > self.max_size:
+            return False
+        path = self._path(digest)
+        with self._lock:
+            index = self._load()
+            if digest in index and self._touch(path):
+                index.move_to_end(digest)
+                return True
+
+            # Outputs may hold secrets, so the store is private to the user
+            for directory in (self.root, os.path.dirname(path)):
+                if directory not in self._private:
+                    _make_private_dir(directory)
+                    self._private.add(directory)
+            # A crash leaves at most a stray temporary file, never a torn
+            # artifact, so durability is not worth an fsync here
+            with AtomicFile(path, fsync=False, mode=0o600) as f:
+                f.write(data)
+            self.size += len(data) - index.pop(digest, 0)
+            index[digest] = len(data)
+            self._evict()
+        return True
+
+    def get(self, digest: str) -> Optional[bytes]:
+        """
+        Read a blob, marking it as recently used.
+
+        Args:
+            digest: The content's digest
+
+        Returns:
+            The content, or None if it is not stored
+        """
+        if not is_digest(digest):
+            return None
+        path = self._path(digest)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            index = self._load()
+            if digest not in index:
+                # Written by another process sharing the directory
+                self.size += len(data)
+            index[digest] = len(data)
+            index.move_to_end(digest)
+            self._touch(path)
+            self._evict()
+        return data
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+
+    @staticmethod
+    def _touch(path: str) -> bool:
+        """Record use of an artifact; False if it has gone."""
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _load(self) -> "OrderedDict[str, int]":
+        """Build the index from the directory the first time it is needed."""
+        if self._index is not None:
+            return self._index
+        found = []
+        try:
+            shards = list(os.scandir(self.root))
+        except FileNotFoundError:
+            shards = []
+        for shard in shards:
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if is_digest(entry.name):
+                    st = entry.stat()
+                    found.append((st.st_mtime, entry.name, st.st_size))
+        found.sort()
+        self._index = OrderedDict((digest, size) for _, digest, size in found)
+        self.size = sum(self._index.values())
+        return self._index
+
+    def _evict(self) -> None:
+        """Remove the least recently used artifacts while over the cap."""
+        while self.size > self.max_size and self._index:
+            digest, size = self._index.popitem(last=False)
+            self.size -= size
+            try:
+                os.unlink(self._path(digest))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Error removing artifact {digest}: {e}")
@@ -1,25 +1,35 @@
 """Terminal controllers package."""
 
-# Conditionally import platform-specific controllers
+# Controllers are imported only when selected, so start-up never pays for
+# modules (such as iterm2) that the chosen controller does not use
+import importlib
+import importlib.util
 import platform
 
 from .base import BaseTerminalController
-from .subprocess import SubprocessTerminalController
 
-if platform.system() == "Darwin":  # macOS
-    from .applescript import AppleScriptTerminalController
+# Exported name -> (module, attribute) resolved on first access
+_LAZY_EXPORTS = {
+    "SubprocessTerminalController": (".subprocess", "SubprocessTerminalController"),
+    "AppleScriptTerminalController": (".applescript", "AppleScriptTerminalController"),
+    "ITermController": (".iterm", "ITermController"),
+}
 
-    # Try to import iTerm2 controller if the package is available
-    try:
-        import iterm2
 
-        from .iterm import ITermController
+def iterm_available() -> bool:
+    """Whether the iTerm2 controller can be used, checked without importing it."""
+    return (
+        platform.system() == "Darwin" and importlib.util.find_spec("iterm2") is not None
+    )
 
-        ITERM_AVAILABLE = True
-    except ImportError:
-        ITERM_AVAILABLE = False
-else:
-    ITERM_AVAILABLE = False
+
+def __getattr__(name):
+    if name == "ITERM_AVAILABLE":
+        return iterm_available()
+    if name in _LAZY_EXPORTS:
+        module, attr = _LAZY_EXPORTS[name]
+        return getattr(importlib.import_module(module, __name__), attr)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def get_controller(controller_type=None):
@@ -38,15 +48,21 @@ def get_controller(controller_type=None):
     # If controller type is specified, try to use it
     if controller_type:
         if controller_type == "iterm" and system == "Darwin":
-            if ITERM_AVAILABLE:
+            if iterm_available():
+                from .iterm import ITermController
+
                 return ITermController()
             else:
                 raise ImportError(
                     "iTerm2 API not available. Install with 'pip install iterm2'"
                 )
         elif controller_type == "applescript" and system == "Darwin":
+            from .applescript import AppleScriptTerminalController
+
             return AppleScriptTerminalController()
         elif controller_type == "subprocess":
+            from .subprocess import SubprocessTerminalController
+
             return SubprocessTerminalController()
         else:
             raise ValueError(
@@ -55,7 +71,7 @@ def get_controller(controller_type=None):
 
     # Auto-detect the best controller
     if system == "Darwin":
-        if ITERM_AVAILABLE:
+        if iterm_available():
             try:
                 # Check if iTerm2 is installed
                 import subprocess
@@ -70,12 +86,18 @@ def get_controller(controller_type=None):
                     text=True,
                 )
                 if "true" in result.stdout.lower():
+                    from .iterm import ITermController
+
                     return ITermController()
             except Exception:
                 pass
 
         # Fall back to AppleScript for macOS Terminal
+        from .applescript import AppleScriptTerminalController
+
         return AppleScriptTerminalController()
 
     # Default to subprocess controller for all other platforms
+    from .subprocess import SubprocessTerminalController
+
     return SubprocessTerminalController()
@@ -37,6 +37,27 @@ class BaseTerminalController(ABC):
         """
         pass
 
+    async def get_current_directory(self) -> Optional[str]:
+        """
+        Get the working directory of the terminal session.
+
+        Implementations must answer from tracked state without running a
+        command in the terminal.
+
+        Returns:
+            The working directory, or None if it is not known
+        """
+        return None
+
+    async def get_terminal_size(self) -> Optional[Dict[str, int]]:
+        """
+        Get the dimensions of the terminal session.
+
+        Returns:
+            A dictionary with "rows" and "columns", or None if not known
+        """
+        return None
+
     @abstractmethod
     async def cleanup(self) -> None:
         """
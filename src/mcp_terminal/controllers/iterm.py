@@ -4,6 +4,7 @@ This provides more advanced control over iTerm2.
 """
 
 import asyncio
+import logging
 import platform
 import time
 from typing import Any, Dict, List, Optional
@@ -17,6 +18,8 @@ except ImportError:
 
 from mcp_terminal.controllers.base import BaseTerminalController
 
+logger = logging.getLogger("MCP:Terminal:ITermController")
+
 
 class ITermController(BaseTerminalController):
     """Terminal controller using the iTerm2 Python API."""
@@ -50,7 +53,7 @@ class ITermController(BaseTerminalController):
             self.app = await iterm2.async_get_app(self.connection)
             return True
         except Exception as e:
-            print(f"Failed to connect to iTerm2: {e}")
+            logger.warning(f"Failed to connect to iTerm2: {e}")
             return False
 
     async def _ensure_session(self) -> Optional[iterm2.Session]:
@@ -65,7 +68,7 @@ class ITermController(BaseTerminalController):
             import subprocess
             import time
 
-            print(
+            logger.info(
                 "Ensuring iTerm2 is running with a window and tab using AppleScript..."
             )
 
@@ -94,57 +97,61 @@ class ITermController(BaseTerminalController):
             )
 
             if result.returncode != 0:
-                print(f"Error running AppleScript: {result.stderr}")
+                logger.error(f"Error running AppleScript: {result.stderr}")
             else:
-                print("Successfully launched iTerm2 with AppleScript")
+                logger.info("Successfully launched iTerm2 with AppleScript")
 
             # Wait for iTerm2 to fully initialize
             time.sleep(3)
 
         except Exception as e:
-            print(f"Error launching iTerm2 with AppleScript: {e}")
+            logger.error(f"Error launching iTerm2 with AppleScript: {e}")
 
         # Try to ensure connection multiple times
         max_attempts = 5  # Increased number of attempts
         for attempt in range(max_attempts):
             if await self._ensure_connection():
-                print(f"Successfully connected to iTerm2 on attempt {attempt+1}")
+                logger.info(f"Successfully connected to iTerm2 on attempt {attempt+1}")
                 break
-            print(f"Connection attempt {attempt+1}/{max_attempts} failed. Retrying...")
+            logger.warning(
+                f"Connection attempt {attempt+1}/{max_attempts} failed. Retrying..."
+            )
             await asyncio.sleep(2)  # Longer delay between attempts
         else:
-            print("Failed to connect to iTerm2 after multiple attempts")
+            logger.error("Failed to connect to iTerm2 after multiple attempts")
             return None
 
         try:
             # Get all windows
             windows = await self.app.async_get_windows()
             if not windows:
-                print("No windows found even after AppleScript initialization")
+                logger.error("No windows found even after AppleScript initialization")
                 return None
 
             window = windows[0]
-            print(f"Found {len(windows)} window(s)")
+            logger.debug(f"Found {len(windows)} window(s)")
 
             # Get all tabs
             tabs = await window.async_get_tabs()
             if not tabs:
-                print("No tabs found even after AppleScript initialization")
+                logger.error("No tabs found even after AppleScript initialization")
                 return None
 
             tab = tabs[0]
-            print(f"Found {len(tabs)} tab(s)")
+            logger.debug(f"Found {len(tabs)} tab(s)")
 
             # Get current session
             self.current_session = await tab.async_get_active_session()
             if self.current_session is None:
-                print("No active session found even after AppleScript initialization")
+                logger.error(
+                    "No active session found even after AppleScript initialization"
+                )
                 return None
 
-            print("Successfully obtained iTerm2 session")
+            logger.info("Successfully obtained iTerm2 session")
             return self.current_session
         except Exception as e:
-            print(f"Error ensuring iTerm2 session: {e}")
+            logger.error(f"Error ensuring iTerm2 session: {e}")
             return None
 
     async def execute_command(
@@ -247,6 +254,37 @@ class ITermController(BaseTerminalController):
         """
         return "iTerm2"
 
+    async def get_current_directory(self) -> Optional[str]:
+        """
+        Get the working directory of the current session.
+
+        Uses the session's ``path`` variable, which iTerm2 keeps up to date
+        when shell integration is installed, instead of running ``pwd``.
+
+        Returns:
+            The working directory, or None if there is no session yet or the
+            path is not known
+        """
+        if self.current_session is None:
+            return None
+        try:
+            return await self.current_session.async_get_variable("path") or None
+        except Exception:
+            return None
+
+    async def get_terminal_size(self) -> Optional[Dict[str, int]]:
+        """
+        Get the grid size of the current session.
+
+        Returns:
+            A dictionary with "rows" and "columns", or None if there is no
+            session yet
+        """
+        if self.current_session is None:
+            return None
+        size = self.current_session.grid_size
+        return {"rows": size.height, "columns": size.width}
+
     async def cleanup(self) -> None:
         """
         Clean up resources.
@@ -258,19 +296,14 @@ class ITermController(BaseTerminalController):
                     await asyncio.wait_for(self.connection.async_close(), timeout=2.0)
                 except asyncio.TimeoutError:
                     # If it times out, log a warning but continue cleanup
-                    print("Warning: iTerm2 connection close timed out")
+                    logger.warning("iTerm2 connection close timed out")
                 except Exception as e:
                     # If any other error occurs, log it but continue cleanup
-                    print(f"Error closing iTerm2 connection: {e}")
+                    logger.warning(f"Error closing iTerm2 connection: {e}")
 
                 # Ensure references are cleared even if close fails
                 self.connection = None
                 self.app = None
                 self.current_session = None
         except Exception as e:
-            print(f"Error during iTerm2 controller cleanup: {e}")
-
-
-if __name__ == "__main__":
-    controller = ITermController()
-    print(controller.execute_command("ls -l"))
+            logger.error(f"Error during iTerm2 controller cleanup: {e}")
@@ -0,0 +1,196 @@
+"""
+Per-client terminal controllers.
+When several MCP clients share one server, each gets its own controller so
+terminal state and failures stay with the client that caused them.
+Controllers are created on a client's first command, reused for the rest of
+its session, closed when it disconnects or sits idle too long, and capped in
+number so resources follow active clients rather than every client seen.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, Hashable, Optional
+
+from mcp_terminal.admission import Overloaded
+from mcp_terminal.controllers.base import BaseTerminalController
+
+logger = logging.getLogger("MCP:Terminal:ControllerManager")
+
+# Default number of clients that may hold a controller at once
+DEFAULT_MAX_CONTROLLERS = 32
+
+# Default seconds a controller may sit unused before it is closed
+DEFAULT_IDLE_TTL = 900.0
+
+
+class _Slot:
+    """A client's controller and how it is being used."""
+
+    __slots__ = ("controller", "in_use", "last_used", "released")
+
+    def __init__(self, controller: BaseTerminalController):
+        self.controller = controller
+        self.in_use = 0
+        self.last_used = time.monotonic()
+        # The client is gone; close once the last command returns
+        self.released = False
+
+
+class ControllerManager:
+    """
+    Creates, reuses and closes one terminal controller per client.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], BaseTerminalController],
+        max_controllers: int = DEFAULT_MAX_CONTROLLERS,
+        idle_ttl: float = DEFAULT_IDLE_TTL,
+    ):
+        """
+        Initialize the manager.
+
+        Args:
+            factory: Creates a new controller
+            max_controllers: Most controllers alive at once; the least
+                             recently used idle one is closed to make room
+            idle_ttl: Seconds after which an unused controller is closed
+        """
+        self.factory = factory
+        self.max_controllers = max_controllers
+        self.idle_ttl = idle_ttl
+        # client -> slot, least recently used first
+        self._slots: "OrderedDict[Hashable, _Slot]" = OrderedDict()
+        self._reaper: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of controllers alive and in use."""
+        return {
+            "controllers": len(self._slots),
+            "in_use": sum(1 for slot in self._slots.values() if slot.in_use),
+        }
+
+    @asynccontextmanager
+    async def use(self, client: Hashable) -> AsyncIterator[BaseTerminalController]:
+        """
+        Borrow a client's controller, creating it on first use.
+
+        The controller cannot be evicted while borrowed.
+
+        Args:
+            client: Key identifying the client
+        """
+        slot = self._slots.get(client)
+        if slot is None:
+            await self._make_room()
+            # Another call for the same client may have created it meanwhile
+            slot = self._slots.get(client)
+            if slot is None:
+                slot = self._slots[client] = _Slot(self.factory())
+                logger.info(f"Created controller for client {client}")
+                self._start_reaper()
+        self._slots.move_to_end(client)
+        slot.in_use += 1
+        try:
+            yield slot.controller
+        finally:
+            slot.in_use -= 1
+            slot.last_used = time.monotonic()
+            if slot.released and not slot.in_use and self._slots.get(client) is slot:
+                del self._slots[client]
+                await self._close(client, slot)
+
+    async def release(self, client: Hashable) -> None:
+        """
+        Close a client's controller, e.g. because the client disconnected.
+
+        A controller still in use is closed once its last command returns.
+        """
+        slot = self._slots.get(client)
+        if slot is None:
+            return
+        if slot.in_use:
+            slot.released = True
+            return
+        del self._slots[client]
+        await self._close(client, slot)
+
+    async def close(self) -> None:
+        """Close every controller and stop the idle reaper."""
+        if self._reaper is not None:
+            self._reaper.cancel()
+            try:
+                await self._reaper
+            except asyncio.CancelledError:
+                pass
+            self._reaper = None
+        slots, self._slots = self._slots, OrderedDict()
+        # Closing may wait for commands to stop; do it for all at once
+        await asyncio.gather(
+            *(self._close(client, slot) for client, slot in slots.items())
+        )
+
+    async def _make_room(self) -> None:
+        """Close the least recently used idle controller if at the limit."""
+        if len(self._slots) < self.max_controllers:
+            return
+        for client, slot in self._slots.items():
+            if not slot.in_use:
+                del self._slots[client]
+                await self._close(client, slot)
+                return
+        raise Overloaded(
+            f"all {self.max_controllers} terminal controllers are busy", 1.0
+        )
+
+    async def reap(self) -> int:
+        """
+        Close controllers that have been idle longer than the TTL.
+
+        Returns:
+            Number of controllers closed
+        """
+        deadline = time.monotonic() - self.idle_ttl
+        expired = [
+            client
+            for client, slot in self._slots.items()
+            if not slot.in_use and slot.last_used <= deadline
+        ]
+        closed = 0
+        for client in expired:
+            # Closing an earlier controller yields to other tasks, which may
+            # have released, evicted or started using this one meanwhile
+            slot = self._slots.get(client)
+            if slot is None or slot.in_use or slot.last_used > deadline:
+                continue
+            self._slots.pop(client, None)
+            await self._close(client, slot)
+            closed += 1
+        return closed
+
+    def _start_reaper(self) -> None:
+        """Start the background task closing idle controllers."""
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.get_running_loop().create_task(self._reap_loop())
+
+    async def _reap_loop(self) -> None:
+        """Reap idle controllers until none are left."""
+        interval = min(max(self.idle_ttl / 4, 1.0), 60.0)
+        while self._slots:
+            await asyncio.sleep(interval)
+            await self.reap()
+
+    @staticmethod
+    async def _close(client: Hashable, slot: _Slot) -> None:
+        """Clean up one controller, logging instead of raising."""
+        try:
+            await slot.controller.cleanup()
+            logger.info(f"Closed controller for client {client}")
+        except Exception as e:
+            logger.warning(f"Error closing controller for client {client}: {e}")
@@ -5,13 +5,34 @@ Works on all platforms.
 """
 
 import asyncio
-from typing import Any, Dict
+import logging
+import os
+import signal
+from typing import Any, Dict, Optional, Set
 
 from mcp_terminal.controllers.base import BaseTerminalController
+from mcp_terminal.metrics import phase
+
+logger = logging.getLogger("MCP:Terminal:SubprocessController")
+
+# Seconds processes get to exit after SIGTERM before they are killed
+TERMINATE_GRACE = 1.0
 
 
 class SubprocessTerminalController(BaseTerminalController):
-    """Terminal controller using subprocess."""
+    """
+    Terminal controller using subprocess.
+
+    Each command runs in a new session, so it and any children it starts
+    form a process group that can be stopped as a whole.
+    """
+
+    def __init__(self):
+        # Processes that may still be running
+        self._processes: Set[asyncio.subprocess.Process] = set()
+        # Tasks collecting commands that were not waited for
+        self._reapers: Set[asyncio.Task] = set()
+        self._closed = False
 
     async def execute_command(
         self, command: str, wait_for_output: bool = True, timeout: int = 10
@@ -28,20 +49,35 @@ class SubprocessTerminalController(BaseTerminalController):
             A dictionary with the result of the command execution
         """
         try:
-            # Create subprocess
-            process = await asyncio.create_subprocess_shell(
-                command,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
+            # Output of commands nobody waits for is discarded, so it can
+            # neither fill a pipe nor pile up in memory
+            output = (
+                asyncio.subprocess.PIPE
+                if wait_for_output
+                else asyncio.subprocess.DEVNULL
             )
+            # Create subprocess
+            with phase("spawn"):
+                process = await asyncio.create_subprocess_shell(
+                    command,
+                    stdout=output,
+                    stderr=output,
+                    start_new_session=True,
+                )
+            self._processes.add(process)
+            if self._closed:
+                # Cleaned up while this command was starting
+                self._signal(process, kill=True)
 
             if wait_for_output:
                 try:
                     # Wait for the process to complete with timeout
-                    stdout, stderr = await asyncio.wait_for(
-                        process.communicate(), timeout=timeout
-                    )
+                    with phase("wait"):
+                        stdout, stderr = await asyncio.wait_for(
+                            process.communicate(), timeout=timeout
+                        )
 
+                    self._processes.discard(process)
                     return {
                         "success": process.returncode == 0,
                         "output": stdout.decode("utf-8", errors="replace"),
@@ -49,17 +85,19 @@ class SubprocessTerminalController(BaseTerminalController):
                         "return_code": process.returncode,
                     }
                 except asyncio.TimeoutError:
-                    # Kill the process if it times out
-                    try:
-                        process.kill()
-                    except ProcessLookupError:
-                        pass
+                    # Kill the process and whatever it started
+                    self._signal(process, kill=True)
+                    await process.wait()
+                    self._processes.discard(process)
                     return {
                         "success": False,
                         "error": f"Command timed out after {timeout} seconds",
                     }
             else:
-                # Don't wait for output
+                # Don't wait for output, but reap the process when it exits
+                reaper = asyncio.create_task(self._reap(process))
+                self._reapers.add(reaper)
+                reaper.add_done_callback(self._reapers.discard)
                 return {
                     "success": True,
                     "output": "Command sent (output not captured)",
@@ -80,8 +118,73 @@ class SubprocessTerminalController(BaseTerminalController):
         """
         return "subprocess"
 
+    async def get_current_directory(self) -> Optional[str]:
+        """
+        Get the working directory commands run in.
+
+        Returns:
+            The server's working directory, which every command inherits
+        """
+        return os.getcwd()
+
+    async def terminate(self, grace: float = TERMINATE_GRACE) -> int:
+        """
+        Stop every command still running, along with its children.
+
+        Each process group gets SIGTERM, then SIGKILL after the grace period.
+
+        Args:
+            grace: Seconds processes get to exit after SIGTERM
+
+        Returns:
+            Number of commands that were still running
+        """
+        processes = [p for p in self._processes if p.returncode is None]
+        self._processes.clear()
+        if not processes:
+            return 0
+        for process in processes:
+            self._signal(process)
+        waits = [asyncio.ensure_future(process.wait()) for process in processes]
+        _, pending = await asyncio.wait(waits, timeout=grace)
+        # Children may outlive the command itself, so kill every group
+        for process in processes:
+            self._signal(process, kill=True)
+        if pending:
+            _, pending = await asyncio.wait(pending, timeout=grace)
+            for wait in pending:
+                wait.cancel()
+            if pending:
+                logger.warning(f"{len(pending)} processes did not exit after SIGKILL")
+        return len(processes)
+
     async def cleanup(self) -> None:
         """
         Clean up resources.
         """
-        pass  # No resources to clean up
+        self._closed = True
+        stopped = await self.terminate()
+        if stopped:
+            logger.info(f"Stopped {stopped} running commands")
+
+    async def _reap(self, process: asyncio.subprocess.Process) -> None:
+        """Wait for a command nobody waits for, so it is reaped."""
+        try:
+            await process.wait()
+        finally:
+            if process.returncode is not None:
+                self._processes.discard(process)
+
+    @staticmethod
+    def _signal(process: asyncio.subprocess.Process, kill: bool = False) -> None:
+        """Send SIGTERM, or SIGKILL, to a command's process group."""
+        try:
+            if hasattr(os, "killpg"):
+                # The command leads its own session, so its group id is its pid
+                os.killpg(process.pid, signal.SIGKILL if kill else signal.SIGTERM)
+            elif kill:
+                process.kill()
+            else:
+                process.terminate()
+        except (ProcessLookupError, PermissionError):
+            pass
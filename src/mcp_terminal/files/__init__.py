@@ -0,0 +1,5 @@
+"""File system helpers used by the MCP file tool."""
+
+from .line_index import LineIndex, LineIndexCache
+
+__all__ = ["LineIndex", "LineIndexCache"]
@@ -0,0 +1,284 @@
+"""
+Tar and zip archives for the file tool.
+Archives are written and read as streams, so memory use does not depend on
+the size of the archive, and extraction refuses members that would land
+outside the destination directory.
+"""
+
+import os
+import stat
+import tarfile
+import zipfile
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+from mcp_terminal.files.atomic import AtomicFile, copy_range
+
+# Archive suffixes and the (kind, compression) they stand for
+ARCHIVE_FORMATS = {
+    ".tar": ("tar", ""),
+    ".tar.gz": ("tar", "gz"),
+    ".tgz": ("tar", "gz"),
+    ".tar.bz2": ("tar", "bz2"),
+    ".tbz2": ("tar", "bz2"),
+    ".tar.xz": ("tar", "xz"),
+    ".txz": ("tar", "xz"),
+    ".zip": ("zip", ""),
+}
+
+# Buffer size of the tar stream
+_STREAM_BUFFER = 1024 * 1024
+
+
+def archive_format(path: str, fmt: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Determine the kind and compression of an archive.
+
+    Args:
+        path: Archive path, used to infer the format
+        fmt: Explicit format such as "tar.gz" or "zip"
+
+    Returns:
+        Tuple of (kind, compression), e.g. ("tar", "gz")
+    """
+    if fmt:
+        key = "." + fmt.lower().lstrip(".")
+        if key not in ARCHIVE_FORMATS:
+            raise ValueError(
+                f"Unsupported archive format {fmt}; choose one of "
+                + ", ".join(suffix[1:] for suffix in ARCHIVE_FORMATS)
+            )
+        return ARCHIVE_FORMATS[key]
+    lower = path.lower()
+    for suffix in sorted(ARCHIVE_FORMATS, key=len, reverse=True):
+        if lower.endswith(suffix):
+            return ARCHIVE_FORMATS[suffix]
+    raise ValueError(f"Cannot infer the archive format of {path}; pass format")
+
+
+def _members(paths: List[str], root: Optional[str]) -> Iterator[Tuple[str, str]]:
+    """
+    Yield (path on disk, name in archive) for every entry to archive.
+
+    Names are relative to root, or to each path's parent without a root.
+    """
+    for path in paths:
+        path = os.path.abspath(path)
+        base = os.path.abspath(root) if root else os.path.dirname(path)
+        if os.path.commonpath([base, path]) != base:
+            raise ValueError(f"{path} is not inside {base}")
+
+        def name(full: str) -> str:
+            return os.path.relpath(full, base).replace(os.sep, "/")
+
+        if path != base:
+            yield path, name(path)
+        if os.path.isdir(path) and not os.path.islink(path):
+            for directory, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                for entry in dirnames + sorted(filenames):
+                    full = os.path.join(directory, entry)
+                    yield full, name(full)
+
+
+def create_archive(
+    archive: str,
+    paths: List[str],
+    root: Optional[str] = None,
+    fmt: Optional[str] = None,
+) -> Tuple[int, int]:
+    """
+    Write a tar or zip archive of files and directories.
+
+    The archive is streamed into a temporary file that is renamed into
+    place once complete.
+
+    Args:
+        archive: Archive path to write
+        paths: Files and directories to include
+        root: Directory member names are relative to
+        fmt: Archive format; inferred from the archive name if omitted
+
+    Returns:
+        Tuple of (entries added, bytes of file data read)
+    """
+    kind, compression = archive_format(archive, fmt)
+    target = AtomicFile(archive)
+    entries = data = 0
+
+    with target as out:
+        skip = {target.path, target.temp_path}
+        if kind == "tar":
+            with tarfile.open(
+                fileobj=out, mode=f"w|{compression}", bufsize=_STREAM_BUFFER
+            ) as tar:
+                for full, name in _members(paths, root):
+                    if os.path.realpath(full) in skip:
+                        continue
+                    info = tar.gettarinfo(full, arcname=name)
+                    if info is None:
+                        # Sockets and other special files cannot be archived
+                        continue
+                    if info.isreg():
+                        with open(full, "rb") as f:
+                            tar.addfile(info, f)
+                        data += info.size
+                    else:
+                        tar.addfile(info)
+                    entries += 1
+        else:
+            with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zf:
+                for full, name in _members(paths, root):
+                    if os.path.realpath(full) in skip or os.path.islink(full):
+                        continue
+                    zf.write(full, name)
+                    if os.path.isfile(full):
+                        data += os.path.getsize(full)
+                    entries += 1
+    return entries, data
+
+
+def _safe_target(dest: str, name: str) -> str:
+    """Resolve a member name below dest, refusing paths that escape it."""
+    parts = name.replace("\\", "/").split("/")
+    if name.startswith("/") or ".." in parts:
+        raise ValueError(f"Refusing unsafe archive member: {name}")
+    target = os.path.join(dest, *[part for part in parts if part not in ("", ".")])
+    parent = os.path.realpath(os.path.dirname(target))
+    if os.path.commonpath([dest, parent]) != dest:
+        raise ValueError(f"Refusing archive member outside destination: {name}")
+    return target
+
+
+def _prepare(target: str, overwrite: bool, replace: bool = False) -> None:
+    """
+    Make room for a new file or link at target.
+
+    Args:
+        target: Path the member is extracted to
+        overwrite: Whether an existing entry may be replaced
+        replace: Leave an existing regular file for a rename to replace
+    """
+    if os.path.lexists(target):
+        if not overwrite:
+            raise FileExistsError(f"Destination exists: {target}")
+        if os.path.islink(target) or not (
+            os.path.isdir(target) or (replace and os.path.isfile(target))
+        ):
+            os.unlink(target)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+
+
+def _extract_file(
+    src: BinaryIO,
+    target: str,
+    overwrite: bool,
+    mode: int,
+    mtime: Optional[float] = None,
+) -> int:
+    """
+    Write a regular member through a temporary file renamed into place, so
+    readers never see it half-extracted.
+
+    Args:
+        src: Member content
+        target: Path to write
+        overwrite: Whether an existing file may be replaced
+        mode: Permission bits to give the file, or 0 for the default
+        mtime: Modification time to give the file
+
+    Returns:
+        Bytes written
+    """
+    _prepare(target, overwrite, replace=True)
+    atomic = AtomicFile(target, fsync=False)
+    try:
+        size = copy_range(src, atomic.stage())
+        atomic.sync()
+        if mode:
+            os.chmod(atomic.temp_path, mode)
+        if mtime is not None:
+            os.utime(atomic.temp_path, (mtime, mtime))
+        atomic.publish()
+    except BaseException:
+        atomic.discard()
+        raise
+    return size
+
+
+def extract_archive(
+    archive: str,
+    dest: str,
+    fmt: Optional[str] = None,
+    overwrite: bool = False,
+) -> Tuple[int, int]:
+    """
+    Extract a tar or zip archive.
+
+    Members with absolute paths or ".." components, and links pointing
+    outside the destination, are refused. Special files are skipped and
+    set-id bits are dropped.
+
+    Args:
+        archive: Archive to read
+        dest: Directory to extract into, created if missing
+        fmt: Archive format; inferred from the archive name if omitted
+        overwrite: Whether existing files may be replaced
+
+    Returns:
+        Tuple of (entries extracted, bytes of file data written)
+    """
+    kind, compression = archive_format(archive, fmt)
+    os.makedirs(dest, exist_ok=True)
+    dest = os.path.realpath(dest)
+    entries = data = 0
+
+    if kind == "tar":
+        with tarfile.open(
+            archive, mode=f"r|{compression or '*'}", bufsize=_STREAM_BUFFER
+        ) as tar:
+            for member in tar:
+                target = _safe_target(dest, member.name)
+                if member.isdir():
+                    os.makedirs(target, exist_ok=True)
+                elif member.isreg():
+                    data += _extract_file(
+                        tar.extractfile(member),
+                        target,
+                        overwrite,
+                        member.mode & 0o777,
+                        member.mtime,
+                    )
+                elif member.issym() or member.islnk():
+                    if member.issym():
+                        link_base = os.path.dirname(target)
+                        linked = os.path.join(link_base, member.linkname)
+                    else:
+                        linked = _safe_target(dest, member.linkname)
+                    if os.path.commonpath([dest, os.path.realpath(linked)]) != dest:
+                        raise ValueError(
+                            f"Refusing link outside destination: {member.name}"
+                        )
+                    _prepare(target, overwrite)
+                    if member.issym():
+                        os.symlink(member.linkname, target)
+                    else:
+                        os.link(linked, target)
+                else:
+                    continue
+                entries += 1
+    else:
+        with zipfile.ZipFile(archive) as zf:
+            for info in zf.infolist():
+                target = _safe_target(dest, info.filename)
+                if info.is_dir():
+                    os.makedirs(target, exist_ok=True)
+                else:
+                    with zf.open(info) as src:
+                        data += _extract_file(
+                            src,
+                            target,
+                            overwrite,
+                            stat.S_IMODE(info.external_attr >> 16) & 0o777,
+                        )
+                entries += 1
+    return entries, data
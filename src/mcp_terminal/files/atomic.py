@@ -0,0 +1,309 @@
+"""
+Atomic file replacement.
+Content is streamed into a temporary file in the target's directory and
+renamed over the target, so readers never observe a half-written file.
+"""
+
+import os
+import secrets
+import shutil
+from typing import BinaryIO, List, Optional, Sequence, Tuple
+
+# Size of the buffer used when copying unchanged parts of a file
+COPY_CHUNK = 1024 * 1024
+
+
+def fsync_directory(directory: str) -> None:
+    """
+    Flush a directory entry table to disk so completed renames are durable.
+
+    Args:
+        directory: Directory to sync
+    """
+    try:
+        fd = os.open(directory or ".", os.O_RDONLY)
+    except OSError:
+        # Some platforms (Windows) cannot open directories
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def copy_range(src: BinaryIO, dst: BinaryIO, length: Optional[int] = None) -> int:
+    """
+    Copy bytes from the current position of src to dst in fixed-size chunks.
+
+    Args:
+        src: File to read from
+        dst: File to write to
+        length: Number of bytes to copy, or None to copy until EOF
+
+    Returns:
+        Number of bytes copied
+    """
+    copied = 0
+    while length is None or copied < length:
+        size = COPY_CHUNK if length is None else min(COPY_CHUNK, length - copied)
+        chunk = src.read(size)
+        if not chunk:
+            break
+        dst.write(chunk)
+        copied += len(chunk)
+    return copied
+
+
+class AtomicFile:
+    """
+    A file that is written to a temporary path and renamed into place.
+
+    Used as a context manager the replacement is published on a clean exit
+    and discarded if an exception escapes. The individual steps (``stage``,
+    ``sync``, ``publish``, ``discard``) are also available so several files
+    can be committed together.
+    """
+
+    def __init__(self, path: str, fsync: bool = True, mode: Optional[int] = None):
+        """
+        Initialize the atomic file.
+
+        Args:
+            path: Target file path; symlinks are resolved so the link survives
+            fsync: Whether to flush the data to disk before renaming
+            mode: Permissions of the new file; by default those of the file
+                  it replaces, or as the process umask allows
+        """
+        self.path = os.path.realpath(path)
+        self.directory = os.path.dirname(self.path)
+        self.fsync = fsync
+        self.mode = mode
+        self.temp_path: Optional[str] = None
+        self.file: Optional[BinaryIO] = None
+
+    def stage(self) -> BinaryIO:
+        """
+        Create the temporary file next to the target.
+
+        Returns:
+            The temporary file opened for binary writing
+        """
+        name = os.path.basename(self.path)
+        self.temp_path = os.path.join(
+            self.directory, f".{name}.{secrets.token_hex(4)}.tmp"
+        )
+        if self.mode is not None:
+            fd = os.open(
+                self.temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, self.mode
+            )
+            self.file = os.fdopen(fd, "wb")
+            return self.file
+
+        # Mode 0o666 lets the process umask decide permissions for new files
+        fd = os.open(self.temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        self.file = os.fdopen(fd, "wb")
+
+        try:
+            st = os.stat(self.path)
+            os.chmod(self.temp_path, st.st_mode & 0o7777)
+        except FileNotFoundError:
+            pass
+        return self.file
+
+    def sync(self) -> None:
+        """Flush and close the temporary file."""
+        if self.file is None:
+            return
+        self.file.flush()
+        if self.fsync:
+            os.fsync(self.file.fileno())
+        self.file.close()
+        self.file = None
+
+    def publish(self) -> None:
+        """Rename the temporary file over the target."""
+        self.sync()
+        os.replace(self.temp_path, self.path)
+        self.temp_path = None
+
+    def discard(self) -> None:
+        """Close and remove the temporary file if it still exists."""
+        if self.file is not None:
+            try:
+                self.file.close()
+            except OSError:
+                pass
+            self.file = None
+        if self.temp_path is not None:
+            try:
+                os.unlink(self.temp_path)
+            except FileNotFoundError:
+                pass
+            self.temp_path = None
+
+    def __enter__(self) -> BinaryIO:
+        return self.stage()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.discard()
+            return
+        try:
+            self.publish()
+        except BaseException:
+            self.discard()
+            raise
+
+
+def splice_file(
+    path: str, start: int, end: int, data: bytes, fsync: bool = True
+) -> int:
+    """
+    Replace bytes [start, end) of a file with data without loading the file.
+
+    The unchanged head and tail are streamed into a temporary file which is
+    then atomically renamed over the original, so memory use is constant and
+    a crash leaves either the old or the new file in place.
+
+    Args:
+        path: File to modify; it is created if it does not exist
+        start: Byte offset where the replaced range begins
+        end: Byte offset where the replaced range ends
+        data: Bytes to write in place of the range
+        fsync: Whether to flush the data to disk before renaming
+
+    Returns:
+        Size of the resulting file in bytes
+    """
+    return splice_ranges(path, [(start, end, data)], fsync=fsync)
+
+
+def splice_ranges(
+    path: str, edits: Sequence[Tuple[int, int, bytes]], fsync: bool = True
+) -> int:
+    """
+    Replace several byte ranges of a file in a single streaming pass.
+
+    Args:
+        path: File to modify; it is created if it does not exist
+        edits: (start, end, data) tuples; ranges must not overlap
+        fsync: Whether to flush the data to disk before renaming
+
+    Returns:
+        Size of the resulting file in bytes
+    """
+    edits = sorted(edits, key=lambda edit: (edit[0], edit[1]))
+    previous_end = 0
+    for start, end, _ in edits:
+        if start < previous_end or end < start:
+            raise ValueError(f"Invalid or overlapping byte range: {start}-{end}")
+        previous_end = end
+
+    with AtomicFile(path, fsync=fsync) as out:
+        try:
+            src = open(path, "rb")
+        except FileNotFoundError:
+            if previous_end:
+                raise
+            data = b"".join(edit[2] for edit in edits)
+            out.write(data)
+            return len(data)
+
+        with src:
+            size = 0
+            for start, end, data in edits:
+                size += copy_range(src, out, start - src.tell())
+                out.write(data)
+                size += len(data)
+                src.seek(end)
+            size += copy_range(src, out)
+        return size
+
+
+def _backup(path: str) -> Optional[str]:
+    """
+    Keep the current version of a file reachable under a temporary name.
+
+    A hard link is used where possible so no data is copied.
+
+    Returns:
+        The backup path, or None if the file does not exist
+    """
+    if not os.path.exists(path):
+        return None
+    directory, name = os.path.split(path)
+    backup = os.path.join(directory, f".{name}.{secrets.token_hex(4)}.bak")
+    try:
+        os.link(path, backup)
+    except OSError:
+        shutil.copy2(path, backup)
+    return backup
+
+
+def commit_files(files: Sequence[Tuple[str, bytes]], fsync: bool = True) -> List[int]:
+    """
+    Replace several files as one all-or-nothing operation.
+
+    Every file is first staged as a temporary file next to its target. The
+    staged files are then flushed to disk together and renamed into place,
+    followed by one sync per affected directory. If staging fails nothing is
+    changed; if a rename fails the files already replaced are restored.
+
+    Args:
+        files: (path, data) pairs; each path may appear only once
+        fsync: Whether to flush files and directories to disk
+
+    Returns:
+        Sizes of the written files in bytes, in input order
+    """
+    staged = [AtomicFile(path, fsync=fsync) for path, _ in files]
+    targets = [atomic.path for atomic in staged]
+    if len(set(targets)) != len(targets):
+        raise ValueError("A file may appear only once in a batch")
+
+    try:
+        for atomic, (_, data) in zip(staged, files):
+            atomic.stage().write(data)
+        # Flush everything only after all writes were issued, so the disk
+        # sees one burst of syncs instead of write/sync pairs
+        for atomic in staged:
+            atomic.sync()
+    except BaseException:
+        for atomic in staged:
+            atomic.discard()
+        raise
+
+    backups: List[Tuple[AtomicFile, Optional[str]]] = []
+    try:
+        for atomic in staged:
+            backups.append((atomic, _backup(atomic.path)))
+            atomic.publish()
+    except BaseException:
+        for atomic, backup in reversed(backups):
+            try:
+                if backup is None:
+                    os.unlink(atomic.path)
+                elif os.path.exists(atomic.path) and os.path.samefile(
+                    backup, atomic.path
+                ):
+                    # Never replaced; renaming a hard link onto itself is a no-op
+                    os.unlink(backup)
+                else:
+                    os.replace(backup, atomic.path)
+            except FileNotFoundError:
+                pass
+        for atomic in staged:
+            atomic.discard()
+        raise
+
+    for _, backup in backups:
+        if backup is not None:
+            os.unlink(backup)
+
+    if fsync:
+        for directory in sorted({atomic.directory for atomic in staged}):
+            fsync_directory(directory)
+
+    return [len(data) for _, data in files]
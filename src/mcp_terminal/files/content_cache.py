@@ -0,0 +1,176 @@
+"""
+In-memory file content cache for the file tool.
+Entries are validated against the file's inode, size and modification
+time, and evicted least-recently-used first once the memory budget is
+exceeded.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+# Content read this soon after the file was modified is not cached, as a
+# same-size rewrite within the same timestamp tick would go unnoticed
+RACY_WINDOW_NS = 1_000_000_000
+
+# Default memory budget for cached content
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+
+class _Entry:
+    """Cached content of one file version."""
+
+    __slots__ = ("inode", "size", "mtime_ns", "data", "text")
+
+    def __init__(self, st: os.stat_result, data: bytes):
+        self.inode = st.st_ino
+        self.size = st.st_size
+        self.mtime_ns = st.st_mtime_ns
+        self.data = data
+        self.text: Optional[str] = None
+
+    def matches(self, st: os.stat_result) -> bool:
+        return (
+            st.st_ino == self.inode
+            and st.st_size == self.size
+            and st.st_mtime_ns == self.mtime_ns
+        )
+
+    @property
+    def cost(self) -> int:
+        # Decoded text is charged at its encoded size, which is close enough
+        return len(self.data) * (2 if self.text is not None else 1)
+
+
+class ContentCache:
+    """
+    Bounded LRU cache of file contents shared by all file tool operations.
+
+    The cache is safe to use from worker threads.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES):
+        """
+        Initialize the cache.
+
+        Args:
+            max_bytes: Memory budget for cached content; 0 disables caching
+        """
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._used = 0
+        self._lock = threading.Lock()
+
+    @property
+    def used_bytes(self) -> int:
+        """Memory currently charged to cached content."""
+        return self._used
+
+    def get(self, path: str, st: os.stat_result) -> Optional[bytes]:
+        """
+        Get cached content if it matches the current file version.
+
+        Args:
+            path: Resolved file path
+            st: Current ``os.stat`` result for the file
+
+        Returns:
+            The cached bytes, or None on a miss
+        """
+        with self._lock:
+            entry = self._lookup(path, st)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry.data
+
+    def get_text(self, path: str, st: os.stat_result) -> Optional[str]:
+        """
+        Get the cached content decoded as UTF-8, decoding it once if needed.
+
+        Args:
+            path: Resolved file path
+            st: Current ``os.stat`` result for the file
+
+        Returns:
+            The decoded text, or None on a miss
+        """
+        with self._lock:
+            entry = self._lookup(path, st)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            if entry.text is None:
+                self._used -= entry.cost
+                entry.text = entry.data.decode("utf-8", errors="replace")
+                self._used += entry.cost
+                self._evict()
+            return entry.text
+
+    def put(self, path: str, st: os.stat_result, data: bytes) -> None:
+        """
+        Store the content of a file version.
+
+        Args:
+            path: Resolved file path
+            st: ``os.stat`` result taken when the content was read
+            data: The file content
+        """
+        if len(data) > self.max_bytes // 4:
+            return
+        if time.time_ns() - st.st_mtime_ns < RACY_WINDOW_NS:
+            return
+
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self._used -= old.cost
+            entry = _Entry(st, data)
+            self._entries[path] = entry
+            self._used += entry.cost
+            self._evict()
+
+    def invalidate(self, path: str) -> None:
+        """
+        Drop the cached content of a file.
+
+        Args:
+            path: Resolved file path
+        """
+        with self._lock:
+            entry = self._entries.pop(path, None)
+            if entry is not None:
+                self._used -= entry.cost
+
+    def clear(self) -> None:
+        """Drop all cached content."""
+        with self._lock:
+            self._entries.clear()
+            self._used = 0
+
+    def _lookup(self, path: str, st: os.stat_result) -> Optional[_Entry]:
+        """Find a valid entry and mark it recently used; lock must be held."""
+        entry = self._entries.get(path)
+        if entry is None:
+            return None
+        if not entry.matches(st):
+            del self._entries[path]
+            self._used -= entry.cost
+            return None
+        self._entries.move_to_end(path)
+        return entry
+
+    def _evict(self) -> None:
+        """Evict least recently used entries until within budget."""
+        while self._used > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self._used -= entry.cost
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,199 @@
+"""
+Copying and moving files for the file tool.
+File data is copied inside the kernel with ``copy_file_range`` or
+``sendfile`` where the platform supports it, falling back to buffered
+reads and writes, and moves within a filesystem are plain renames.
+"""
+
+import errno
+import os
+import shutil
+import sys
+from typing import BinaryIO, Tuple
+
+from mcp_terminal.files.atomic import AtomicFile, copy_range
+
+# Largest amount of data handed to a single in-kernel copy call
+KERNEL_COPY_CHUNK = 64 * 1024 * 1024
+
+# Errors meaning an in-kernel copy is not possible between these files
+_FALLBACK_ERRNOS = frozenset(
+    {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP}
+)
+
+
+def copy_data(src: BinaryIO, dst: BinaryIO, size: int) -> Tuple[int, str]:
+    """
+    Copy a whole file into another using the fastest available mechanism.
+
+    Args:
+        src: Source file opened for binary reading, positioned at the start
+        dst: Empty destination file opened for binary writing
+        size: Size of the source file
+
+    Returns:
+        Tuple of (bytes copied, name of the mechanism used)
+    """
+    src_fd, dst_fd = src.fileno(), dst.fileno()
+
+    if hasattr(os, "copy_file_range"):
+        copied = _copy_loop(
+            lambda count: os.copy_file_range(src_fd, dst_fd, count), size
+        )
+        if copied is not None:
+            return copied, "copy_file_range"
+
+    if sys.platform.startswith("linux"):
+        # Linux can sendfile between regular files; macOS only to sockets
+        offset = 0
+
+        def sendfile(count: int) -> int:
+            nonlocal offset
+            sent = os.sendfile(dst_fd, src_fd, offset, count)
+            offset += sent
+            return sent
+
+        copied = _copy_loop(sendfile, size)
+        if copied is not None:
+            return copied, "sendfile"
+
+    src.seek(0)
+    dst.seek(0)
+    dst.truncate()
+    return copy_range(src, dst), "read_write"
+
+
+def _copy_loop(step, size: int):
+    """
+    Run an in-kernel copy call until the source is exhausted.
+
+    Returns:
+        Bytes copied, or None if the mechanism is not usable for these files
+    """
+    copied = 0
+    try:
+        while True:
+            count = step(KERNEL_COPY_CHUNK)
+            if count == 0:
+                break
+            copied += count
+    except OSError as e:
+        if copied or e.errno not in _FALLBACK_ERRNOS:
+            raise
+        return None
+    if copied == 0 and size > 0:
+        # Some filesystems (procfs, sysfs) report a size but copy nothing
+        return None
+    return copied
+
+
+def copy_file(src: str, dst: str, preserve: bool = True) -> Tuple[int, str]:
+    """
+    Copy one file, atomically replacing the destination.
+
+    Args:
+        src: Source file
+        dst: Destination file path
+        preserve: Whether to copy permission bits and timestamps
+
+    Returns:
+        Tuple of (bytes copied, name of the mechanism used)
+    """
+    with open(src, "rb") as fsrc:
+        size = os.fstat(fsrc.fileno()).st_size
+        with AtomicFile(dst) as fdst:
+            copied, method = copy_data(fsrc, fdst, size)
+    if preserve:
+        shutil.copystat(src, dst)
+    return copied, method
+
+
+def copy_tree(
+    src: str, dst: str, preserve: bool = True, overwrite: bool = False
+) -> Tuple[int, int, str]:
+    """
+    Copy a directory tree; symbolic links are copied as links.
+
+    Args:
+        src: Source directory
+        dst: Destination directory, created if missing
+        preserve: Whether to copy permission bits and timestamps
+        overwrite: Whether files that already exist may be replaced
+
+    Returns:
+        Tuple of (files copied, bytes copied, name of the mechanism used)
+    """
+    real_src = os.path.realpath(src)
+    if os.path.realpath(dst).startswith(real_src + os.sep):
+        raise ValueError("Cannot copy a directory into itself")
+
+    files = copied = 0
+    method = "read_write"
+    for directory, dirnames, filenames in os.walk(src):
+        rel_dir = os.path.relpath(directory, src)
+        target_dir = os.path.normpath(os.path.join(dst, rel_dir))
+        os.makedirs(target_dir, exist_ok=True)
+
+        # os.walk lists symlinks to directories as directories
+        for name in dirnames + filenames:
+            source = os.path.join(directory, name)
+            target = os.path.join(target_dir, name)
+            is_link = os.path.islink(source)
+            if not is_link and os.path.isdir(source):
+                continue
+            if os.path.lexists(target):
+                if not overwrite:
+                    raise FileExistsError(f"Destination exists: {target}")
+                if is_link or os.path.islink(target):
+                    os.unlink(target)
+            if is_link:
+                os.symlink(os.readlink(source), target)
+            else:
+                count, method = copy_file(source, target, preserve)
+                copied += count
+            files += 1
+
+        if preserve:
+            shutil.copystat(directory, target_dir)
+    return files, copied, method
+
+
+def move_path(src: str, dst: str, overwrite: bool = False) -> Tuple[int, int, str]:
+    """
+    Move a file or directory.
+
+    Within one filesystem this is a single rename. Across filesystems the
+    data is copied and the source removed afterwards.
+
+    Args:
+        src: Source path
+        dst: Destination path
+        overwrite: Whether an existing destination may be replaced
+
+    Returns:
+        Tuple of (files copied, bytes copied, name of the mechanism used);
+        counts are zero for a rename
+    """
+    if os.path.lexists(dst) and not overwrite:
+        raise FileExistsError(f"Destination exists: {dst}")
+    try:
+        os.replace(src, dst)
+        return 0, 0, "rename"
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+
+    if os.path.isdir(src) and not os.path.islink(src):
+        files, copied, method = copy_tree(src, dst, overwrite=overwrite)
+        shutil.rmtree(src)
+    elif os.path.islink(src):
+        if os.path.lexists(dst):
+            os.unlink(dst)
+        os.symlink(os.readlink(src), dst)
+        os.unlink(src)
+        files, copied, method = 1, 0, "symlink"
+    else:
+        copied, method = copy_file(src, dst)
+        os.unlink(src)
+        files = 1
+    return files, copied, method
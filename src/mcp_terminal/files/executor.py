@@ -0,0 +1,107 @@
+"""
+Worker pool for blocking file operations.
+Keeps disk I/O off the event loop while serializing operations that touch
+the same path.
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional
+
+from mcp_terminal.metrics import observe_phase
+
+
+def default_workers() -> int:
+    """Default pool size, matching ``ThreadPoolExecutor``'s own heuristic."""
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+class PathLockedExecutor:
+    """
+    Runs blocking callables on a bounded thread pool with per-path locking.
+
+    Operations on the same (resolved) path run one at a time in submission
+    order; operations on unrelated paths run in parallel up to the pool size.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        """
+        Initialize the executor.
+
+        Args:
+            max_workers: Maximum number of worker threads
+        """
+        self.max_workers = max_workers or default_workers()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        # path -> [lock, number of holders and waiters]
+        self._locks: Dict[str, List[Any]] = {}
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        """The thread pool, created on first use."""
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="mcp-file-io"
+            )
+        return self._pool
+
+    @asynccontextmanager
+    async def _locked(self, key: str) -> AsyncIterator[None]:
+        """Hold the lock for one path, dropping it once nobody needs it."""
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[key]
+
+    async def run(
+        self, paths: Iterable[str], func: Callable[..., Any], *args: Any, **kwargs: Any
+    ) -> Any:
+        """
+        Run a blocking callable on the pool while holding the locks for paths.
+
+        Locks are taken in sorted order so operations on overlapping path sets
+        cannot deadlock.
+
+        Args:
+            paths: Paths the callable reads or writes
+            func: Blocking callable
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            Whatever func returns
+        """
+        keys = sorted({os.path.realpath(path) for path in paths})
+        loop = asyncio.get_running_loop()
+        submitted = time.perf_counter()
+        started: List[float] = []
+
+        def call() -> Any:
+            started.append(time.perf_counter())
+            return func(*args, **kwargs)
+
+        async with AsyncExitStack() as stack:
+            for key in keys:
+                await stack.enter_async_context(self._locked(key))
+            try:
+                return await loop.run_in_executor(self.pool, call)
+            finally:
+                # Time spent waiting for path locks and a free worker
+                if started:
+                    observe_phase("queue", started[0] - submitted)
+
+    def shutdown(self) -> None:
+        """Stop the worker threads after queued work completes."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
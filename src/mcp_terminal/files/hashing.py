@@ -0,0 +1,147 @@
+"""
+File hashing for the file tool.
+Files are read in large chunks into a reused buffer, and digests are cached
+by the file's inode, size and modification time so unchanged files are not
+hashed again.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+
+from mcp_terminal.files.content_cache import RACY_WINDOW_NS
+
+# Size of the buffer files are read into while hashing
+HASH_CHUNK = 1024 * 1024
+
+# Algorithms accepted by file_hash; variable-length SHAKE digests are left out
+HASH_ALGORITHMS = tuple(
+    sorted(
+        name for name in hashlib.algorithms_guaranteed if not name.startswith("shake")
+    )
+)
+
+
+class _CachedDigest(NamedTuple):
+    inode: int
+    size: int
+    mtime_ns: int
+    digest: str
+
+
+class DigestCache:
+    """
+    Bounded LRU cache of file digests, safe to use from worker threads.
+    """
+
+    def __init__(self, max_entries: int = 8192):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of digests to keep
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], _CachedDigest]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str, algorithm: str, st: os.stat_result) -> Optional[str]:
+        """
+        Get the digest of a file version, if it is cached.
+
+        Args:
+            path: Resolved file path
+            algorithm: Hash algorithm name
+            st: Current ``os.stat`` result for the file
+
+        Returns:
+            The hex digest, or None on a miss
+        """
+        key = (path, algorithm)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None:
+                return None
+            if (cached.inode, cached.size, cached.mtime_ns) != (
+                st.st_ino,
+                st.st_size,
+                st.st_mtime_ns,
+            ):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return cached.digest
+
+    def put(self, path: str, algorithm: str, st: os.stat_result, digest: str) -> None:
+        """
+        Store the digest of a file version.
+
+        Args:
+            path: Resolved file path
+            algorithm: Hash algorithm name
+            st: ``os.stat`` result the digest belongs to
+            digest: Hex digest
+        """
+        if time.time_ns() - st.st_mtime_ns < RACY_WINDOW_NS:
+            return
+        key = (path, algorithm)
+        with self._lock:
+            self._entries[key] = _CachedDigest(
+                st.st_ino, st.st_size, st.st_mtime_ns, digest
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every cached digest."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def hash_file(
+    path: str, algorithm: str, cache: Optional[DigestCache] = None
+) -> Tuple[str, int, bool]:
+    """
+    Hash one file.
+
+    Args:
+        path: File to hash
+        algorithm: Name of a hashlib algorithm
+        cache: Digest cache to consult and fill
+
+    Returns:
+        Tuple of (hex digest, file size, whether the digest was cached)
+    """
+    real = os.path.realpath(path)
+    with open(real, "rb") as f:
+        st = os.fstat(f.fileno())
+        if cache is not None:
+            digest = cache.get(real, algorithm, st)
+            if digest is not None:
+                return digest, st.st_size, True
+
+        hasher = hashlib.new(algorithm)
+        buf = bytearray(min(HASH_CHUNK, max(st.st_size, 1)))
+        view = memoryview(buf)
+        while True:
+            count = f.readinto(buf)
+            if not count:
+                break
+            hasher.update(view[:count])
+        digest = hasher.hexdigest()
+
+        # Only cache if the file did not change while it was being read
+        after = os.fstat(f.fileno())
+        if cache is not None and (after.st_size, after.st_mtime_ns) == (
+            st.st_size,
+            st.st_mtime_ns,
+        ):
+            cache.put(real, algorithm, st, digest)
+    return digest, st.st_size, False
@@ -0,0 +1,250 @@
+"""
+Line offset index for ranged file reads.
+Maps line numbers to byte offsets so reading a slice of a large file
+does not require scanning it from the start every time.
+"""
+
+import mmap
+import os
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Optional, Union
+
+# Record the start offset of every Nth line
+LINE_INDEX_STRIDE = 1024
+
+# Amount of data examined per step while building the index
+_SCAN_CHUNK = 1024 * 1024
+
+Buffer = Union[bytes, mmap.mmap]
+
+
+def _after_nth_newline(data: bytes, start: int, n: int) -> int:
+    """
+    Find the offset just past the n-th newline in data[start:].
+
+    The caller guarantees that at least n newlines exist. The window holding
+    the target is found with a growing ``bytes.count`` probe and then halved,
+    so only a short tail is walked newline by newline.
+
+    Args:
+        data: Chunk of file content
+        start: Offset to start searching from
+        n: Which newline to locate (1-based)
+
+    Returns:
+        Offset of the byte following the n-th newline
+    """
+    lo, hi, step = start, len(data), 4096
+    while n > 1:
+        probe = min(lo + step, hi)
+        count = data.count(b"\n", lo, probe)
+        if count >= n:
+            hi = probe
+            break
+        lo, n, step = probe, n - count, step * 2
+
+    while n > 1 and hi - lo > 256:
+        mid = (lo + hi) // 2
+        count = data.count(b"\n", lo, mid)
+        if count >= n:
+            hi = mid
+        else:
+            lo, n = mid, n - count
+
+    pos = lo
+    for _ in range(n):
+        pos = data.find(b"\n", pos, hi) + 1
+    return pos
+
+
+class LineIndex:
+    """
+    Sparse index of line start offsets for a single file version.
+
+    The start offset of every ``stride``-th line is recorded, so locating any
+    line costs one array lookup plus a scan of fewer than ``stride`` lines.
+    The index is built lazily: only the part of the file up to the highest
+    requested line is ever scanned.
+    """
+
+    def __init__(
+        self, size: int, mtime_ns: int, inode: int = 0, stride: int = LINE_INDEX_STRIDE
+    ):
+        """
+        Initialize an empty index.
+
+        Args:
+            size: File size the index was built for
+            mtime_ns: File modification time the index was built for
+            inode: File inode the index was built for
+            stride: Number of lines between recorded offsets
+        """
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.inode = inode
+        self.stride = stride
+        # checkpoints[i] is the byte offset of line i * stride (0-based)
+        self.checkpoints = array("Q", [0])
+        self._scan_pos = 0
+        self._since_checkpoint = 0
+        self._total_lines: Optional[int] = None
+
+    def matches(self, st: os.stat_result) -> bool:
+        """
+        Check whether the index is still valid for the given file status.
+
+        Args:
+            st: Result of ``os.stat`` on the file
+
+        Returns:
+            True if the file has not changed since the index was built
+        """
+        return (
+            st.st_size == self.size
+            and st.st_mtime_ns == self.mtime_ns
+            and st.st_ino == self.inode
+        )
+
+    @property
+    def complete(self) -> bool:
+        """Whether the whole file has been scanned."""
+        return self._scan_pos >= self.size
+
+    def _scan(self, buf: Buffer, checkpoints_wanted: int) -> None:
+        """
+        Extend the index until enough checkpoints exist or the file ends.
+
+        Args:
+            buf: File contents (bytes or mmap)
+            checkpoints_wanted: Number of checkpoints required
+        """
+        while len(self.checkpoints) < checkpoints_wanted and not self.complete:
+            start = self._scan_pos
+            end = min(start + _SCAN_CHUNK, self.size)
+            chunk = buf[start:end]
+            count = chunk.count(b"\n")
+            need = self.stride - self._since_checkpoint
+
+            pos = 0
+            while count >= need:
+                pos = _after_nth_newline(chunk, pos, need)
+                self.checkpoints.append(start + pos)
+                count -= need
+                need = self.stride
+                self._since_checkpoint = 0
+
+            self._since_checkpoint += count
+            self._scan_pos = end
+
+        if self.complete and self._total_lines is None:
+            newlines = (
+                len(self.checkpoints) - 1
+            ) * self.stride + self._since_checkpoint
+            trailing = self.size > 0 and buf[self.size - 1 : self.size] != b"\n"
+            self._total_lines = newlines + (1 if trailing else 0)
+
+    def line_offset(self, buf: Buffer, line: int) -> Optional[int]:
+        """
+        Get the byte offset where a line starts.
+
+        Args:
+            buf: File contents (bytes or mmap)
+            line: 0-based line number
+
+        Returns:
+            Byte offset of the line, or None if the file has fewer lines
+        """
+        slot = line // self.stride
+        if slot >= len(self.checkpoints):
+            self._scan(buf, slot + 1)
+        if slot >= len(self.checkpoints):
+            return None
+
+        pos = self.checkpoints[slot]
+        for _ in range(line - slot * self.stride):
+            newline = buf.find(b"\n", pos)
+            if newline < 0:
+                return None
+            pos = newline + 1
+
+        return pos if pos < self.size else None
+
+    def total_lines(self, buf: Buffer) -> int:
+        """
+        Get the number of lines in the file, scanning the rest of it if needed.
+
+        Args:
+            buf: File contents (bytes or mmap)
+
+        Returns:
+            The line count
+        """
+        if self._total_lines is None:
+            self._scan(buf, sys.maxsize)
+        return self._total_lines
+
+    @property
+    def known_total_lines(self) -> Optional[int]:
+        """The line count if the file has already been fully scanned."""
+        return self._total_lines
+
+
+class LineIndexCache:
+    """
+    Bounded LRU cache of line indexes keyed by file path.
+
+    Entries are validated against the file's inode, size and modification
+    time on every lookup and rebuilt when the file changes. The cache may be
+    shared between worker threads.
+    """
+
+    def __init__(self, max_entries: int = 32):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of indexes to keep
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, LineIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str, st: os.stat_result) -> LineIndex:
+        """
+        Get a valid index for a file, creating a fresh one if needed.
+
+        Args:
+            path: Absolute file path
+            st: Current ``os.stat`` result for the file
+
+        Returns:
+            A line index matching the current file version
+        """
+        with self._lock:
+            index = self._entries.get(path)
+            if index is not None and index.matches(st):
+                self._entries.move_to_end(path)
+                return index
+
+            index = LineIndex(st.st_size, st.st_mtime_ns, st.st_ino)
+            self._entries[path] = index
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return index
+
+    def invalidate(self, path: str) -> None:
+        """
+        Drop the index for a file.
+
+        Args:
+            path: Absolute file path
+        """
+        with self._lock:
+            self._entries.pop(path, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,149 @@
+"""
+Cached directory listings for the file tool.
+Each directory's entries are cached together with the directory's own
+status, so listing an unchanged tree again costs one ``stat`` per directory.
+"""
+
+import os
+import stat
+import threading
+import time
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional
+
+# Listings taken this soon after the directory changed are not cached, as a
+# further change within the same timestamp tick would go unnoticed
+RACY_WINDOW_NS = 2_000_000_000
+
+
+class EntryInfo(NamedTuple):
+    """Status of one directory entry."""
+
+    name: str
+    type: str
+    size: int
+    mtime_ns: int
+    mode: int
+
+
+class _CachedListing(NamedTuple):
+    mtime_ns: int
+    inode: int
+    entries: List[EntryInfo]
+
+
+def _entry_type(mode: int) -> str:
+    if stat.S_ISDIR(mode):
+        return "directory"
+    if stat.S_ISREG(mode):
+        return "file"
+    if stat.S_ISLNK(mode):
+        return "symlink"
+    return "other"
+
+
+class DirectoryCache:
+    """
+    Bounded LRU cache of directory listings.
+
+    A listing is reused while the directory's inode and modification time
+    are unchanged. Creating, deleting or renaming an entry updates the
+    directory's modification time; rewriting a file in place does not, so
+    callers that modify files should call ``invalidate`` for the parent
+    directory.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of directories to keep
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _CachedListing]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def list(self, directory: str) -> List[EntryInfo]:
+        """
+        List a directory, using the cached listing if it is still valid.
+
+        Args:
+            directory: Directory to list
+
+        Returns:
+            Entries sorted by name
+        """
+        key = os.path.abspath(directory)
+        st = os.stat(key)
+
+        with self._lock:
+            cached = self._entries.get(key)
+            if (
+                cached is not None
+                and cached.mtime_ns == st.st_mtime_ns
+                and cached.inode == st.st_ino
+            ):
+                self._entries.move_to_end(key)
+                return cached.entries
+
+        entries = []
+        with os.scandir(key) as it:
+            for entry in it:
+                try:
+                    est = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                entries.append(
+                    EntryInfo(
+                        entry.name,
+                        _entry_type(est.st_mode),
+                        est.st_size,
+                        est.st_mtime_ns,
+                        est.st_mode,
+                    )
+                )
+        entries.sort(key=lambda info: info.name)
+
+        with self._lock:
+            if time.time_ns() - st.st_mtime_ns >= RACY_WINDOW_NS:
+                self._entries[key] = _CachedListing(st.st_mtime_ns, st.st_ino, entries)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.pop(key, None)
+        return entries
+
+    def invalidate(self, directory: str) -> None:
+        """
+        Drop the cached listing of a directory.
+
+        Args:
+            directory: Directory whose contents changed
+        """
+        with self._lock:
+            self._entries.pop(os.path.abspath(directory), None)
+
+    def clear(self) -> None:
+        """Drop every cached listing."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def format_mode(mode: int) -> str:
+    """Render a mode the way ``ls -l`` does, e.g. ``-rw-r--r--``."""
+    return stat.filemode(mode)
+
+
+def is_hidden(name: str) -> bool:
+    """Whether an entry name is hidden by Unix convention."""
+    return name.startswith(".")
+
+
+def entry_path(rel_dir: Optional[str], name: str) -> str:
+    """Join a root-relative directory and an entry name with "/"."""
+    return f"{rel_dir}/{name}" if rel_dir else name
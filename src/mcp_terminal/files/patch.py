@@ -0,0 +1,283 @@
+"""
+Patch application for the file tool.
+Parses unified diffs and exact search/replace edits and resolves them to
+byte ranges of the original file, so they can be applied in a single
+streaming pass.
+"""
+
+import re
+from itertools import accumulate
+from typing import List, Optional, Sequence, Tuple
+
+_HUNK_HEADER = re.compile(rb"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+class Hunk:
+    """A single hunk of a unified diff."""
+
+    def __init__(self, old_start: int, old_count: int):
+        """
+        Initialize the hunk.
+
+        Args:
+            old_start: Line number the hunk starts at in the original file
+            old_count: Number of original lines covered by the hunk
+        """
+        self.old_start = old_start
+        self.old_count = old_count
+        # (tag, text, has_newline) where tag is " ", "-" or "+"
+        self.lines: List[Tuple[str, bytes, bool]] = []
+
+    @property
+    def old_lines(self) -> List[Tuple[bytes, bool]]:
+        return [(text, nl) for tag, text, nl in self.lines if tag != "+"]
+
+    @property
+    def new_lines(self) -> List[Tuple[bytes, bool]]:
+        return [(text, nl) for tag, text, nl in self.lines if tag != "-"]
+
+    def context_run(self, from_end: bool) -> int:
+        """Count the context lines at the start or end of the hunk."""
+        lines = reversed(self.lines) if from_end else self.lines
+        count = 0
+        for tag, _, _ in lines:
+            if tag != " ":
+                break
+            count += 1
+        return count
+
+
+class PatchResult:
+    """Outcome of resolving one hunk or search/replace edit."""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.applied = False
+        self.line: Optional[int] = None
+        self.offset = 0
+        self.fuzz = 0
+        self.error: Optional[str] = None
+
+
+def parse_unified_diff(diff: str) -> List[Hunk]:
+    """
+    Parse the hunks of a single-file unified diff.
+
+    Args:
+        diff: Unified diff text; file headers are optional
+
+    Returns:
+        The hunks in the order they appear
+    """
+    hunks: List[Hunk] = []
+    current: Optional[Hunk] = None
+    headers = 0
+
+    # Split on "\n" only so carriage returns stay part of the line text
+    for raw in _split_lines(diff.encode("utf-8")):
+        raw = raw.rstrip(b"\n")
+        if raw.startswith(b"--- ") and (current is None or _hunk_complete(current)):
+            headers += 1
+            if headers > 1:
+                raise ValueError("Diff touches more than one file")
+            current = None
+            continue
+        if raw.startswith(b"+++ ") and current is None:
+            continue
+
+        match = _HUNK_HEADER.match(raw)
+        if match:
+            old_count = int(match.group(2)) if match.group(2) is not None else 1
+            current = Hunk(int(match.group(1)), old_count)
+            hunks.append(current)
+            continue
+
+        if current is None:
+            # Preamble such as "diff --git" or "index" lines
+            continue
+
+        if raw.startswith(b"\\"):
+            # "\ No newline at end of file" applies to the previous line
+            if current.lines:
+                tag, text, _ = current.lines[-1]
+                current.lines[-1] = (tag, text, False)
+            continue
+
+        tag = raw[:1].decode() if raw else " "
+        if tag not in (" ", "-", "+"):
+            raise ValueError(f"Malformed diff line: {raw[:40]!r}")
+        current.lines.append((tag, raw[1:], True))
+
+    if not hunks:
+        raise ValueError("Diff contains no hunks")
+    return hunks
+
+
+def _split_lines(content: bytes) -> List[bytes]:
+    """Split content after every newline, keeping the newlines."""
+    lines = [line + b"\n" for line in content.split(b"\n")]
+    lines[-1] = lines[-1][:-1]
+    if not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def _hunk_complete(hunk: Hunk) -> bool:
+    """Whether a hunk already holds all the original lines it announced."""
+    return len(hunk.old_lines) >= hunk.old_count
+
+
+def _matches(
+    lines: Sequence[bytes], at: int, pattern: List[Tuple[bytes, bool]]
+) -> bool:
+    """Check whether pattern lines match the file lines starting at index at."""
+    if at < 0 or at + len(pattern) > len(lines):
+        return False
+    for i, (text, _) in enumerate(pattern):
+        if lines[at + i].rstrip(b"\n") != text:
+            return False
+    return True
+
+
+def _render(lines: List[Tuple[bytes, bool]]) -> bytes:
+    return b"".join(text + (b"\n" if nl else b"") for text, nl in lines)
+
+
+def resolve_hunks(
+    content: bytes, hunks: List[Hunk], max_fuzz: int = 2
+) -> Tuple[List[Tuple[int, int, bytes]], List[PatchResult]]:
+    """
+    Locate every hunk in the original content.
+
+    Each hunk is first tried at the line given in its header (adjusted by the
+    drift of earlier hunks), then at increasing distances from it. If no exact
+    match is found, up to ``max_fuzz`` context lines are dropped from each end
+    of the hunk and the search is repeated, as ``patch`` does.
+
+    Args:
+        content: Original file content
+        hunks: Parsed hunks in file order
+        max_fuzz: Maximum number of context lines that may be ignored
+
+    Returns:
+        Tuple of (byte range edits, per-hunk results)
+    """
+    lines = _split_lines(content)
+    offsets = [0] + list(accumulate(len(line) for line in lines))
+
+    edits: List[Tuple[int, int, bytes]] = []
+    results: List[PatchResult] = []
+    drift = 0
+    floor = 0
+
+    for number, hunk in enumerate(hunks, start=1):
+        result = PatchResult(number)
+        results.append(result)
+
+        old, new = hunk.old_lines, hunk.new_lines
+        # Pure insertions are anchored after old_start, others at it
+        expected = hunk.old_start if not old else hunk.old_start - 1
+        expected += drift
+
+        leading = hunk.context_run(from_end=False)
+        trailing = hunk.context_run(from_end=True)
+
+        found = None
+        for fuzz in range(max_fuzz + 1):
+            top, bottom = min(fuzz, leading), min(fuzz, trailing)
+            if fuzz and top + bottom == 0:
+                break
+            pattern = old[top : len(old) - bottom]
+            if fuzz and not pattern:
+                break
+            at = _search(lines, expected + top, pattern, floor)
+            if at is not None:
+                found = (at, top, bottom, fuzz)
+                break
+
+        if found is None:
+            result.error = f"Hunk {number} does not match the file"
+            continue
+
+        at, top, bottom, fuzz = found
+        matched = len(old) - top - bottom
+        replacement = new[top : len(new) - bottom]
+        edits.append((offsets[at], offsets[at + matched], _render(replacement)))
+
+        result.applied = True
+        result.line = at + 1
+        result.offset = at - top - (expected - drift)
+        result.fuzz = fuzz
+        drift = at - top - (expected - drift)
+        floor = at + matched
+
+    return edits, results
+
+
+def _search(
+    lines: Sequence[bytes], expected: int, pattern: List[Tuple[bytes, bool]], floor: int
+) -> Optional[int]:
+    """Find pattern nearest to the expected line, at or after floor."""
+    limit = len(lines) - len(pattern)
+    expected = min(max(expected, floor), max(limit, floor))
+    for distance in range(max(expected - floor, limit - expected) + 1):
+        for at in (expected + distance, expected - distance):
+            if floor <= at <= limit and _matches(lines, at, pattern):
+                return at
+            if distance == 0:
+                break
+    return None
+
+
+def resolve_search_replace(
+    content: bytes, blocks: Sequence[Tuple[str, str]]
+) -> Tuple[List[Tuple[int, int, bytes]], List[PatchResult]]:
+    """
+    Locate exact search/replace blocks in the original content.
+
+    Every search text must occur exactly once so the edit is unambiguous.
+
+    Args:
+        content: Original file content
+        blocks: (search, replace) pairs
+
+    Returns:
+        Tuple of (byte range edits, per-edit results)
+    """
+    edits: List[Tuple[int, int, bytes]] = []
+    results: List[PatchResult] = []
+
+    for number, (search, replace) in enumerate(blocks, start=1):
+        result = PatchResult(number)
+        results.append(result)
+
+        needle = search.encode("utf-8")
+        if not needle:
+            result.error = f"Edit {number} has an empty search text"
+            continue
+
+        start = content.find(needle)
+        if start < 0:
+            result.error = f"Edit {number}: search text not found"
+            continue
+        if content.find(needle, start + 1) >= 0:
+            result.error = (
+                f"Edit {number}: search text matches more than once; "
+                "add surrounding context to make it unique"
+            )
+            continue
+
+        edits.append((start, start + len(needle), replace.encode("utf-8")))
+        result.applied = True
+        result.line = content.count(b"\n", 0, start) + 1
+
+    # Edits resolved independently may still collide with each other
+    ordered = sorted(zip(edits, [r for r in results if r.applied]), key=lambda e: e[0])
+    for (prev, _), (edit, result) in zip(ordered, ordered[1:]):
+        if edit[0] < prev[1]:
+            result.applied = False
+            result.error = f"Edit {result.index} overlaps another edit"
+    applied = {r.index for r in results if r.applied}
+    edits = [edit for edit, result in ordered if result.index in applied]
+
+    return edits, results
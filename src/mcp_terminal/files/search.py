@@ -0,0 +1,360 @@
+"""
+In-process code search for the file tool.
+Walks directory trees with ``os.scandir`` while honoring ``.gitignore``
+files and scans file contents through memory maps with a precompiled
+pattern.
+"""
+
+import mmap
+import os
+import re
+from collections import deque
+from concurrent.futures import Executor
+from typing import Iterator, List, Optional, Pattern, Tuple
+
+# Directories that are never descended into
+EXCLUDED_DIRS = frozenset({".git", "node_modules"})
+
+# Files larger than this are skipped by content searches
+MAX_SEARCH_FILE_SIZE = 64 * 1024 * 1024
+
+# Matched lines are cut to this many characters in results
+MAX_LINE_LENGTH = 300
+
+# Amount of leading data checked for NUL bytes to detect binary files
+_BINARY_SNIFF = 8192
+
+
+def translate_glob(pattern: str) -> str:
+    """
+    Translate a gitignore-style glob into a regular expression.
+
+    ``*`` and ``?`` do not cross ``/``; ``**`` matches any number of
+    directories.
+
+    Args:
+        pattern: Glob pattern
+
+    Returns:
+        Regular expression source matching the whole path
+    """
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**", i):
+                at_start = i == 0 or pattern[i - 1] == "/"
+                if at_start and pattern.startswith("**/", i):
+                    out.append("(?:.*/)?")
+                    i += 3
+                    continue
+                if at_start and i + 2 == n:
+                    out.append(".*")
+                    i += 2
+                    continue
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 1)
+            if end < 0:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1 : end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+class IgnoreRules:
+    """Patterns from a single ``.gitignore`` file."""
+
+    def __init__(self, base: str, lines: List[str]):
+        """
+        Parse ignore patterns.
+
+        Args:
+            base: Directory of the ``.gitignore`` relative to the search root,
+                  using "/" separators ("" for the root itself)
+            lines: Lines of the ``.gitignore`` file
+        """
+        self.base = base
+        self.rules: List[Tuple[Pattern[str], bool, bool, bool]] = []
+        for line in lines:
+            line = line.rstrip("\n").rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            anchored = "/" in line
+            line = line.lstrip("/")
+            if not line:
+                continue
+            regex = re.compile(translate_glob(line) + r"\Z")
+            self.rules.append((regex, negate, dir_only, anchored))
+
+    @classmethod
+    def load(cls, directory: str, base: str) -> Optional["IgnoreRules"]:
+        """Read the ``.gitignore`` in a directory, if there is one."""
+        try:
+            with open(
+                os.path.join(directory, ".gitignore"),
+                encoding="utf-8",
+                errors="replace",
+            ) as f:
+                rules = cls(base, f.readlines())
+        except OSError:
+            return None
+        return rules if rules.rules else None
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """
+        Check a path against these rules.
+
+        Args:
+            rel_path: Path relative to the search root, "/" separated
+            is_dir: Whether the path is a directory
+
+        Returns:
+            True if ignored, False if explicitly re-included, None if no
+            rule applies
+        """
+        if self.base:
+            if not rel_path.startswith(self.base + "/"):
+                return None
+            rel_path = rel_path[len(self.base) + 1 :]
+        name = rel_path.rsplit("/", 1)[-1]
+
+        result = None
+        for regex, negate, dir_only, anchored in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path if anchored else name):
+                result = not negate
+        return result
+
+
+def _is_ignored(stack: List[IgnoreRules], rel_path: str, is_dir: bool) -> bool:
+    """Apply ignore files from the root down; deeper and later rules win."""
+    ignored = False
+    for rules in stack:
+        verdict = rules.match(rel_path, is_dir)
+        if verdict is not None:
+            ignored = verdict
+    return ignored
+
+
+def walk_files(
+    root: str,
+    include: Optional[Pattern[str]] = None,
+    use_gitignore: bool = True,
+) -> Iterator[str]:
+    """
+    Yield files below root in a stable, sorted order.
+
+    Args:
+        root: Directory to walk
+        include: Only yield files whose root-relative path matches this
+        use_gitignore: Whether to skip paths ignored by ``.gitignore`` files
+
+    Yields:
+        Paths relative to root, "/" separated
+    """
+    pending: List[Tuple[str, List[IgnoreRules]]] = [("", [])]
+    while pending:
+        rel_dir, parent_rules = pending.pop()
+        directory = os.path.join(root, rel_dir) if rel_dir else root
+
+        rules = parent_rules
+        if use_gitignore:
+            own = IgnoreRules.load(directory, rel_dir)
+            if own is not None:
+                rules = parent_rules + [own]
+
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            continue
+
+        subdirs = []
+        for entry in entries:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if is_dir:
+                if entry.name in EXCLUDED_DIRS:
+                    continue
+                if rules and _is_ignored(rules, rel_path, True):
+                    continue
+                subdirs.append(rel_path)
+                continue
+            if rules and _is_ignored(rules, rel_path, False):
+                continue
+            if include is None or include.match(rel_path):
+                yield rel_path
+
+        # Depth-first, visiting subdirectories in name order
+        for rel_path in reversed(subdirs):
+            pending.append((rel_path, rules))
+
+
+def compile_include(glob: Optional[str]) -> Optional[Pattern[str]]:
+    """
+    Compile a file filter glob.
+
+    A glob without "/" matches file names at any depth, like ``*.py``.
+
+    Args:
+        glob: Glob pattern, or None for no filter
+    """
+    if not glob:
+        return None
+    source = translate_glob(glob.lstrip("/"))
+    if "/" not in glob:
+        source = "(?:.*/)?" + source
+    return re.compile(source + r"\Z")
+
+
+def scan_file(
+    path: str, pattern: Pattern[bytes], max_matches: int
+) -> List[Tuple[int, int, str]]:
+    """
+    Find pattern matches in one file.
+
+    Args:
+        path: File to scan
+        pattern: Compiled bytes pattern
+        max_matches: Stop after this many matches
+
+    Returns:
+        List of (line, column, line text) tuples, 1-based
+    """
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0 or size > MAX_SEARCH_FILE_SIZE:
+                return []
+            if b"\0" in f.read(_BINARY_SNIFF):
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                return _scan_buffer(buf, pattern, max_matches)
+    except (OSError, ValueError):
+        return []
+
+
+def _scan_buffer(
+    buf: mmap.mmap, pattern: Pattern[bytes], max_matches: int
+) -> List[Tuple[int, int, str]]:
+    """Collect matches from a mapped file, one per line."""
+    results: List[Tuple[int, int, str]] = []
+    line_no = 1
+    counted_to = 0
+    pos = 0
+    size = len(buf)
+
+    while len(results) < max_matches and pos <= size:
+        match = pattern.search(buf, pos)
+        if match is None:
+            break
+        start = match.start()
+        line_no += buf[counted_to:start].count(b"\n")
+        counted_to = start
+
+        line_start = buf.rfind(b"\n", 0, start) + 1
+        line_end = buf.find(b"\n", start)
+        if line_end < 0:
+            line_end = size
+
+        line = buf[line_start:line_end]
+        column = len(line[: start - line_start].decode("utf-8", errors="replace")) + 1
+        text = line.decode("utf-8", errors="replace").rstrip("\r")
+        results.append((line_no, column, text[:MAX_LINE_LENGTH]))
+
+        # Report each line once
+        pos = line_end + 1
+    return results
+
+
+def search_files(
+    root: str,
+    pattern: Optional[Pattern[bytes]],
+    executor: Executor,
+    include: Optional[Pattern[str]] = None,
+    use_gitignore: bool = True,
+    skip: int = 0,
+    limit: int = 100,
+    workers: int = 4,
+) -> Tuple[List[Tuple[str, Optional[int], Optional[int], Optional[str]]], bool]:
+    """
+    Search the files below root, in parallel, in a stable order.
+
+    Files are scanned by ``workers`` concurrent tasks; results are consumed
+    in walk order, so paging with ``skip`` is deterministic. Scanning stops
+    as soon as one result past the requested page has been seen.
+
+    Args:
+        root: Directory to search
+        pattern: Compiled bytes pattern, or None to list matching files
+        executor: Executor that runs file scans
+        include: Only search files whose relative path matches this
+        use_gitignore: Whether to honor ``.gitignore`` files
+        skip: Number of results to skip
+        limit: Maximum number of results to return
+        workers: Number of files scanned concurrently
+
+    Returns:
+        Tuple of (results as (path, line, column, text), whether more exist)
+    """
+    wanted = skip + limit
+    results: List[Tuple[str, Optional[int], Optional[int], Optional[str]]] = []
+    files = walk_files(root, include, use_gitignore)
+
+    if pattern is None:
+        for rel_path in files:
+            results.append((rel_path, None, None, None))
+            if len(results) > wanted:
+                break
+        return results[skip:wanted], len(results) > wanted
+
+    in_flight: deque = deque()
+
+    def submit() -> bool:
+        rel_path = next(files, None)
+        if rel_path is None:
+            return False
+        future = executor.submit(
+            scan_file, os.path.join(root, rel_path), pattern, wanted + 1
+        )
+        in_flight.append((rel_path, future))
+        return True
+
+    for _ in range(max(workers, 1) * 2):
+        if not submit():
+            break
+
+    try:
+        while in_flight and len(results) <= wanted:
+            rel_path, future = in_flight.popleft()
+            submit()
+            for line, column, text in future.result():
+                results.append((rel_path, line, column, text))
+    finally:
+        for _, future in in_flight:
+            future.cancel()
+
+    return results[skip:wanted], len(results) > wanted
@@ -0,0 +1,202 @@
+"""
+Resumable chunked uploads for the file tool.
+An upload streams chunks into a temporary file next to its target and is
+renamed into place on commit, so an interrupted transfer can continue from
+the last acknowledged offset and never leaves a partial target behind.
+"""
+
+import hashlib
+import os
+import secrets
+import threading
+import time
+from typing import Dict, List, Optional
+
+from mcp_terminal.files.atomic import AtomicFile, fsync_directory
+
+# Largest chunk accepted or returned by a single transfer request
+MAX_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Uploads without activity for this long are discarded
+UPLOAD_TTL = 60 * 60
+
+# Maximum number of uploads in progress at once
+MAX_UPLOADS = 64
+
+
+class Upload:
+    """An upload in progress."""
+
+    def __init__(self, path: str, size: Optional[int]):
+        """
+        Stage an upload.
+
+        Args:
+            path: Target file path
+            size: Expected total size in bytes, if known
+        """
+        self.id = secrets.token_hex(8)
+        self.target = AtomicFile(path)
+        self.path = self.target.path
+        self.size = size
+        self.received = 0
+        self.digest = hashlib.sha256()
+        self.touched = time.monotonic()
+        # The temporary file is reopened for every chunk
+        self.target.stage().close()
+        self.target.file = None
+
+    def write(self, offset: int, data: bytes) -> None:
+        """
+        Append a chunk at the acknowledged offset.
+
+        Args:
+            offset: Offset the chunk starts at; must equal ``received``
+            data: Chunk content
+        """
+        if offset != self.received:
+            raise ValueError(
+                f"Chunk offset {offset} does not match the acknowledged "
+                f"offset {self.received}; resume from there"
+            )
+        if self.size is not None and offset + len(data) > self.size:
+            raise ValueError(f"Chunk extends past the declared size {self.size}")
+
+        with open(self.target.temp_path, "r+b") as f:
+            f.seek(offset)
+            f.write(data)
+            f.truncate()
+        self.received += len(data)
+        self.digest.update(data)
+        self.touched = time.monotonic()
+
+    def commit(self) -> str:
+        """
+        Flush the uploaded data and rename it over the target.
+
+        Returns:
+            SHA-256 hex digest of the whole file
+        """
+        if self.size is not None and self.received != self.size:
+            raise ValueError(
+                f"Upload is incomplete: {self.received} of {self.size} bytes received"
+            )
+        with open(self.target.temp_path, "r+b") as f:
+            os.fsync(f.fileno())
+        self.target.publish()
+        fsync_directory(self.target.directory)
+        return self.digest.hexdigest()
+
+    def discard(self) -> None:
+        """Remove the temporary file."""
+        self.target.discard()
+
+
+class UploadRegistry:
+    """
+    Uploads in progress, by id.
+
+    The registry is safe to use from worker threads.
+    """
+
+    def __init__(self, max_uploads: int = MAX_UPLOADS, ttl: float = UPLOAD_TTL):
+        """
+        Initialize the registry.
+
+        Args:
+            max_uploads: Maximum number of uploads in progress
+            ttl: Seconds of inactivity after which an upload is discarded
+        """
+        self.max_uploads = max_uploads
+        self.ttl = ttl
+        self._uploads: Dict[str, Upload] = {}
+        self._lock = threading.Lock()
+
+    def begin(self, path: str, size: Optional[int], resume: bool = True) -> Upload:
+        """
+        Start an upload, or continue the one already in progress for path.
+
+        Args:
+            path: Target file path
+            size: Expected total size in bytes, if known
+            resume: Whether to continue an existing upload to the same path
+
+        Returns:
+            The upload
+        """
+        self.expire()
+        real = os.path.realpath(path)
+        with self._lock:
+            for upload in self._uploads.values():
+                if upload.path != real:
+                    continue
+                if resume and (size is None or size == upload.size):
+                    upload.touched = time.monotonic()
+                    return upload
+                raise ValueError(
+                    f"An upload to {path} is already in progress ({upload.id}); "
+                    "resume or abort it first"
+                )
+            if len(self._uploads) >= self.max_uploads:
+                raise RuntimeError(f"Too many uploads in progress ({self.max_uploads})")
+            upload = Upload(path, size)
+            self._uploads[upload.id] = upload
+            return upload
+
+    def get(self, upload_id: str) -> Upload:
+        """
+        Look up an upload.
+
+        Args:
+            upload_id: Id returned when the upload began
+
+        Returns:
+            The upload
+        """
+        with self._lock:
+            upload = self._uploads.get(upload_id)
+        if upload is None:
+            raise KeyError(f"Unknown or expired upload: {upload_id}")
+        return upload
+
+    def target(self, upload_id: str) -> Optional[str]:
+        """Target path of an upload, or None if there is no such upload."""
+        with self._lock:
+            upload = self._uploads.get(upload_id)
+        return upload.path if upload is not None else None
+
+    def finish(self, upload_id: str, discard: bool = False) -> None:
+        """
+        Forget an upload after it was committed or aborted.
+
+        Args:
+            upload_id: Id of the upload
+            discard: Whether to remove its temporary file
+        """
+        with self._lock:
+            upload = self._uploads.pop(upload_id, None)
+        if upload is not None and discard:
+            upload.discard()
+
+    def expire(self) -> None:
+        """Discard uploads that have been idle for longer than the TTL."""
+        deadline = time.monotonic() - self.ttl
+        with self._lock:
+            stale: List[Upload] = [
+                u for u in self._uploads.values() if u.touched < deadline
+            ]
+            for upload in stale:
+                del self._uploads[upload.id]
+        for upload in stale:
+            upload.discard()
+
+    def clear(self) -> None:
+        """Discard every upload in progress."""
+        with self._lock:
+            uploads = list(self._uploads.values())
+            self._uploads.clear()
+        for upload in uploads:
+            upload.discard()
+
+    def __len__(self) -> int:
+        return len(self._uploads)
@@ -0,0 +1,514 @@
+"""
+Filesystem watches for the file tool.
+Changes are detected with inotify where it is available and by periodic
+scans otherwise, coalesced over a short debounce window and delivered to a
+callback in batches.
+"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import logging
+import os
+import re
+import secrets
+import struct
+import sys
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Pattern,
+    Set,
+    Tuple,
+)
+
+from mcp_terminal.files.search import EXCLUDED_DIRS, compile_include
+
+logger = logging.getLogger("MCP:Terminal:FileWatch")
+
+# Default time events are collected for before they are delivered
+DEFAULT_DEBOUNCE = 0.2
+
+# Interval between scans when inotify is not available
+POLL_INTERVAL = 1.0
+
+# Maximum number of watches a single client may hold
+MAX_WATCHES_PER_CLIENT = 16
+
+# Maximum number of directories a single recursive watch may cover
+MAX_WATCH_DIRS = 4096
+
+# Maximum number of changes delivered in one batch
+MAX_CHANGES_PER_BATCH = 1000
+
+# Callback receiving (watch id, [(path, event)]) for each batch of changes
+WatchCallback = Callable[[str, List[Tuple[str, str]]], Awaitable[None]]
+
+# Event bits from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+_WATCH_MASK = (
+    IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class Inotify:
+    """Minimal ctypes binding to the Linux inotify API."""
+
+    def __init__(self):
+        """Create a non-blocking inotify instance."""
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code))
+
+    @staticmethod
+    def available() -> bool:
+        """Whether inotify can be used on this platform."""
+        if not sys.platform.startswith("linux"):
+            return False
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"))
+        except OSError:
+            return False
+        return hasattr(libc, "inotify_init1")
+
+    def add_watch(self, directory: str) -> int:
+        """
+        Watch a directory for entry changes.
+
+        Args:
+            directory: Directory to watch
+
+        Returns:
+            The watch descriptor; watching the same directory twice returns
+            the same descriptor
+        """
+        wd = self._add_watch(self.fd, os.fsencode(directory), _WATCH_MASK | IN_ONLYDIR)
+        if wd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code), directory)
+        return wd
+
+    def rm_watch(self, wd: int) -> None:
+        """Stop watching a descriptor; errors for vanished watches are ignored."""
+        self._rm_watch(self.fd, wd)
+
+    def read_events(self) -> List[Tuple[int, int, str]]:
+        """
+        Read all pending events without blocking.
+
+        Returns:
+            List of (watch descriptor, mask, entry name) tuples
+        """
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            pos = 0
+            while pos + _EVENT_HEADER.size <= len(data):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(data, pos)
+                pos += _EVENT_HEADER.size
+                name = os.fsdecode(data[pos : pos + length].rstrip(b"\0"))
+                pos += length
+                events.append((wd, mask, name))
+        return events
+
+    def close(self) -> None:
+        """Close the inotify instance, dropping all of its watches."""
+        os.close(self.fd)
+
+
+class Watch:
+    """A watch held by one client."""
+
+    def __init__(
+        self,
+        client: Hashable,
+        callback: WatchCallback,
+        root: str,
+        include: Optional[Pattern[str]],
+        recursive: bool,
+        debounce: float,
+    ):
+        """
+        Initialize the watch.
+
+        Args:
+            client: Key of the client that owns the watch
+            callback: Receives batches of changes
+            root: Directory being watched
+            include: Only report paths relative to root that match this
+            recursive: Whether subdirectories are watched too
+            debounce: Seconds to collect events for before delivering them
+        """
+        self.id = secrets.token_hex(6)
+        self.client = client
+        self.callback = callback
+        self.root = root
+        self.include = include
+        self.recursive = recursive
+        self.debounce = debounce
+        # path -> first event seen in the current window
+        self.pending: Dict[str, str] = {}
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
+        # inotify descriptors, or the last scan when polling
+        self.wds: Set[int] = set()
+        self.snapshot: Dict[str, Tuple[int, int, int]] = {}
+
+    def wants(self, rel_path: str) -> bool:
+        """Whether changes to a root-relative path are reported."""
+        return self.include is None or bool(self.include.match(rel_path))
+
+
+def _scan(
+    root: str, recursive: bool
+) -> Tuple[List[str], List[Tuple[str, os.stat_result]]]:
+    """
+    Collect the directories and files below root.
+
+    Returns:
+        Tuple of (root-relative directories including "", (file, status) pairs)
+    """
+    dirs: List[str] = []
+    files: List[Tuple[str, os.stat_result]] = []
+    pending = [""]
+    while pending:
+        rel_dir = pending.pop()
+        dirs.append(rel_dir)
+        if len(dirs) > MAX_WATCH_DIRS:
+            raise ValueError(
+                f"Too many directories to watch (more than {MAX_WATCH_DIRS}); "
+                "watch a narrower path"
+            )
+        try:
+            with os.scandir(os.path.join(root, rel_dir)) as it:
+                for entry in it:
+                    rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive and entry.name not in EXCLUDED_DIRS:
+                                pending.append(rel_path)
+                        else:
+                            files.append((rel_path, entry.stat(follow_symlinks=False)))
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return dirs, files
+
+
+def _snapshot(watch: Watch) -> Dict[str, Tuple[int, int, int]]:
+    """Record the identity, size and mtime of every watched file."""
+    _, files = _scan(watch.root, watch.recursive)
+    return {
+        rel_path: (st.st_ino, st.st_size, st.st_mtime_ns)
+        for rel_path, st in files
+        if watch.wants(rel_path)
+    }
+
+
+class WatchManager:
+    """
+    Watches held by all clients, driven by the running event loop.
+    """
+
+    def __init__(
+        self,
+        use_inotify: Optional[bool] = None,
+        max_per_client: int = MAX_WATCHES_PER_CLIENT,
+        poll_interval: float = POLL_INTERVAL,
+    ):
+        """
+        Initialize the manager.
+
+        Args:
+            use_inotify: Whether to use inotify; detected if None
+            max_per_client: Maximum number of watches per client
+            poll_interval: Seconds between scans when polling
+        """
+        self.use_inotify = Inotify.available() if use_inotify is None else use_inotify
+        self.max_per_client = max_per_client
+        self.poll_interval = poll_interval
+        self._watches: Dict[str, Watch] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._inotify: Optional[Inotify] = None
+        # inotify descriptor -> {watch id: directory relative to its root}
+        self._wd_dirs: Dict[int, Dict[str, str]] = {}
+        self._poller: Optional[asyncio.Task] = None
+        self._deliveries: Set[asyncio.Task] = set()
+
+    @property
+    def backend(self) -> str:
+        """Name of the change detection mechanism in use."""
+        return "inotify" if self.use_inotify else "polling"
+
+    def client_watches(self, client: Hashable) -> List[Watch]:
+        """Watches held by a client."""
+        return [watch for watch in self._watches.values() if watch.client == client]
+
+    async def add(
+        self,
+        client: Hashable,
+        callback: WatchCallback,
+        path: str,
+        glob: Optional[str] = None,
+        recursive: bool = True,
+        debounce: float = DEFAULT_DEBOUNCE,
+    ) -> Watch:
+        """
+        Start watching a file or directory.
+
+        Args:
+            client: Key of the client that owns the watch
+            callback: Receives batches of changes
+            path: File or directory to watch
+            glob: For directories, only report paths matching this glob
+            recursive: For directories, whether to watch subdirectories
+            debounce: Seconds to collect events for before delivering them
+
+        Returns:
+            The new watch
+        """
+        if len(self.client_watches(client)) >= self.max_per_client:
+            raise RuntimeError(
+                f"Watch limit reached ({self.max_per_client} per client); "
+                "remove a watch first"
+            )
+
+        path = os.path.abspath(path)
+        if os.path.isdir(path):
+            root, include = path, compile_include(glob)
+        elif os.path.exists(path):
+            # Watch the parent so replacing the file by rename is noticed
+            root = os.path.dirname(path)
+            include = re.compile(re.escape(os.path.basename(path)) + r"\Z")
+            recursive = False
+        else:
+            raise FileNotFoundError(f"No such file or directory: {path}")
+
+        self._loop = asyncio.get_running_loop()
+        watch = Watch(client, callback, root, include, recursive, debounce)
+
+        if self.use_inotify:
+            dirs, _ = await self._loop.run_in_executor(None, _scan, root, recursive)
+            self._ensure_inotify()
+            try:
+                for rel_dir in dirs:
+                    self._add_dir(watch, rel_dir)
+            except OSError:
+                self._remove_dirs(watch)
+                raise
+        else:
+            watch.snapshot = await self._loop.run_in_executor(None, _snapshot, watch)
+
+        self._watches[watch.id] = watch
+        if not self.use_inotify and (self._poller is None or self._poller.done()):
+            self._poller = self._loop.create_task(self._poll())
+        return watch
+
+    def remove(self, watch_id: str, client: Optional[Hashable] = None) -> None:
+        """
+        Stop a watch.
+
+        Args:
+            watch_id: Id of the watch
+            client: If given, the watch must belong to this client
+        """
+        watch = self._watches.get(watch_id)
+        if watch is None or (client is not None and watch.client != client):
+            raise KeyError(f"Unknown watch: {watch_id}")
+        del self._watches[watch_id]
+        if watch.flush_handle is not None:
+            watch.flush_handle.cancel()
+            watch.flush_handle = None
+        self._remove_dirs(watch)
+
+    def remove_client(self, client: Hashable) -> None:
+        """Stop every watch held by a client."""
+        for watch in self.client_watches(client):
+            self.remove(watch.id)
+
+    async def close(self) -> None:
+        """Stop all watches and release inotify and polling resources."""
+        for watch_id in list(self._watches):
+            self.remove(watch_id)
+        if self._poller is not None:
+            self._poller.cancel()
+            self._poller = None
+        if self._inotify is not None:
+            if self._loop is not None and not self._loop.is_closed():
+                self._loop.remove_reader(self._inotify.fd)
+            self._inotify.close()
+            self._inotify = None
+            self._wd_dirs.clear()
+        for task in list(self._deliveries):
+            task.cancel()
+
+    def _ensure_inotify(self) -> None:
+        if self._inotify is None:
+            self._inotify = Inotify()
+            self._loop.add_reader(self._inotify.fd, self._on_inotify)
+
+    def _add_dir(self, watch: Watch, rel_dir: str) -> None:
+        directory = os.path.join(watch.root, rel_dir) if rel_dir else watch.root
+        wd = self._inotify.add_watch(directory)
+        self._wd_dirs.setdefault(wd, {})[watch.id] = rel_dir
+        watch.wds.add(wd)
+
+    def _remove_dirs(self, watch: Watch) -> None:
+        for wd in watch.wds:
+            dirs = self._wd_dirs.get(wd)
+            if dirs is None:
+                continue
+            dirs.pop(watch.id, None)
+            if not dirs:
+                del self._wd_dirs[wd]
+                if self._inotify is not None:
+                    self._inotify.rm_watch(wd)
+        watch.wds.clear()
+
+    def _on_inotify(self) -> None:
+        """Translate pending inotify events into per-watch changes."""
+        for wd, mask, name in self._inotify.read_events():
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost; tell every client to rescan
+                for watch in self._watches.values():
+                    self._record(watch, "", "overflow")
+                continue
+            if mask & IN_IGNORED:
+                for watch_id in self._wd_dirs.pop(wd, {}):
+                    watch = self._watches.get(watch_id)
+                    if watch is not None:
+                        watch.wds.discard(wd)
+                continue
+
+            dirs = self._wd_dirs.get(wd)
+            if not dirs or not name:
+                continue
+            for watch_id, rel_dir in list(dirs.items()):
+                watch = self._watches.get(watch_id)
+                if watch is None:
+                    continue
+                rel_path = f"{rel_dir}/{name}" if rel_dir else name
+                if mask & IN_ISDIR:
+                    if (
+                        watch.recursive
+                        and mask & (IN_CREATE | IN_MOVED_TO)
+                        and name not in EXCLUDED_DIRS
+                    ):
+                        self._watch_new_dir(watch, rel_path)
+                    continue
+                if not watch.wants(rel_path):
+                    continue
+                if mask & IN_CREATE:
+                    self._record(watch, rel_path, "created")
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    self._record(watch, rel_path, "deleted")
+                else:
+                    self._record(watch, rel_path, "modified")
+
+    def _watch_new_dir(self, watch: Watch, rel_dir: str) -> None:
+        """Watch a directory that appeared and report the files already in it."""
+        try:
+            dirs, files = _scan(os.path.join(watch.root, rel_dir), True)
+            for sub_dir in dirs:
+                self._add_dir(watch, f"{rel_dir}/{sub_dir}" if sub_dir else rel_dir)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not watch new directory {rel_dir}: {e}")
+            return
+        for rel_path, _ in files:
+            rel_path = f"{rel_dir}/{rel_path}"
+            if watch.wants(rel_path):
+                self._record(watch, rel_path, "created")
+
+    async def _poll(self) -> None:
+        """Detect changes by rescanning every watch periodically."""
+        while self._watches:
+            await asyncio.sleep(self.poll_interval)
+            for watch in list(self._watches.values()):
+                try:
+                    current = await self._loop.run_in_executor(None, _snapshot, watch)
+                except (OSError, ValueError):
+                    continue
+                if watch.id not in self._watches:
+                    continue
+                previous, watch.snapshot = watch.snapshot, current
+                for rel_path, signature in current.items():
+                    old = previous.get(rel_path)
+                    if old is None:
+                        self._record(watch, rel_path, "created")
+                    elif old != signature:
+                        self._record(watch, rel_path, "modified")
+                for rel_path in previous.keys() - current.keys():
+                    self._record(watch, rel_path, "deleted")
+
+    def _record(self, watch: Watch, rel_path: str, event: str) -> None:
+        """Add an event to the watch's window, opening one if needed."""
+        watch.pending.setdefault(rel_path, event)
+        if watch.flush_handle is None:
+            watch.flush_handle = self._loop.call_later(
+                watch.debounce, self._flush, watch
+            )
+
+    def _flush(self, watch: Watch) -> None:
+        """
+        Deliver the changes collected in a window.
+
+        Each path is reported once. Whether it still exists decides between
+        "modified" and "deleted", so a file replaced by rename shows up as
+        modified and a temporary file that came and went is not reported.
+        """
+        watch.flush_handle = None
+        pending, watch.pending = watch.pending, {}
+
+        changes: List[Tuple[str, str]] = []
+        for rel_path, first in sorted(pending.items()):
+            if first == "overflow":
+                changes.append((rel_path, first))
+            elif os.path.lexists(os.path.join(watch.root, rel_path)):
+                changes.append(
+                    (rel_path, "created" if first == "created" else "modified")
+                )
+            elif first != "created":
+                changes.append((rel_path, "deleted"))
+        if not changes:
+            return
+
+        if len(changes) > MAX_CHANGES_PER_BATCH:
+            changes = changes[:MAX_CHANGES_PER_BATCH] + [("", "overflow")]
+        task = self._loop.create_task(self._deliver(watch, changes))
+        self._deliveries.add(task)
+        task.add_done_callback(self._deliveries.discard)
+
+    async def _deliver(self, watch: Watch, changes: List[Tuple[str, str]]) -> None:
+        try:
+            await watch.callback(watch.id, changes)
+        except Exception as e:
+            # The client is gone; its watches have nobody left to notify
+            logger.info(f"Dropping watches of unreachable client: {e}")
+            self.remove_client(watch.client)
@@ -0,0 +1,399 @@
+"""
+Command history.
+Every executed command is recorded with its working directory, timings,
+exit status and a truncated copy of its output in a local SQLite database,
+indexed with FTS5 so past results can be searched instead of recomputed.
+Records are written by a background thread, so a command's response never
+waits for the disk, and retention limits keep the database bounded.
+"""
+
+import logging
+import os
+import queue
+import sqlite3
+import stat
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("MCP:Terminal:History")
+
+# Default number of commands kept
+DEFAULT_HISTORY_ROWS = 10000
+
+# Default days a command is kept
+DEFAULT_HISTORY_DAYS = 30.0
+
+# Default characters of output and of error output kept per command
+DEFAULT_HISTORY_OUTPUT = 64 * 1024
+
+# Default and maximum number of results returned by one search
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 200
+
+# Records waiting to be written before new ones are dropped
+MAX_PENDING = 10000
+
+# Records written per transaction
+_BATCH_SIZE = 256
+
+# Seconds between retention passes
+_PRUNE_INTERVAL = 60.0
+
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS commands ("
+    "id INTEGER PRIMARY KEY, command TEXT NOT NULL, cwd TEXT, "
+    "started REAL NOT NULL, duration REAL NOT NULL, return_code INTEGER, "
+    "success INTEGER NOT NULL, output TEXT, error TEXT, output_digest TEXT, "
+    "truncated INTEGER NOT NULL DEFAULT 0, client TEXT)",
+    "CREATE INDEX IF NOT EXISTS commands_started ON commands (started)",
+    "CREATE INDEX IF NOT EXISTS commands_command ON commands (command)",
+    # External content index: the text lives once, in commands
+    "CREATE VIRTUAL TABLE IF NOT EXISTS commands_fts USING fts5("
+    "command, output, error, content='commands', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS commands_ai AFTER INSERT ON commands BEGIN "
+    "INSERT INTO commands_fts (rowid, command, output, error) "
+    "VALUES (new.id, new.command, new.output, new.error); END",
+    "CREATE TRIGGER IF NOT EXISTS commands_ad AFTER DELETE ON commands BEGIN "
+    "INSERT INTO commands_fts (commands_fts, rowid, command, output, error) "
+    "VALUES ('delete', old.id, old.command, old.output, old.error); END",
+]
+
+_COLUMNS = (
+    "command",
+    "cwd",
+    "started",
+    "duration",
+    "return_code",
+    "success",
+    "output",
+    "error",
+    "output_digest",
+    "truncated",
+)
+
+# Columns written for each command; the client is not returned by searches
+_RECORD_COLUMNS = _COLUMNS + ("client",)
+
+
+def default_history_path() -> str:
+    """Per-user state file for the history database."""
+    state = os.environ.get("XDG_STATE_HOME") or os.path.expanduser("~/.local/state")
+    return os.path.join(state, "mcp-terminal", "history.db")
+
+
+def fts_query(text: str) -> str:
+    """
+    Turn free text into an FTS5 query matching all of its words.
+
+    Each word is quoted, so punctuation and FTS5 operators in the text are
+    matched literally instead of being parsed.
+    """
+    words = text.split()
+    return " ".join('"' + word.replace('"', '""') + '"' for word in words)
+
+
+class CommandHistory:
+    """
+    Records commands to SQLite from a background thread and searches them.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_rows: int = DEFAULT_HISTORY_ROWS,
+        max_days: float = DEFAULT_HISTORY_DAYS,
+        max_output: int = DEFAULT_HISTORY_OUTPUT,
+    ):
+        """
+        Initialize the history. The database is opened on first use.
+
+        Args:
+            path: Database file
+            max_rows: Most commands kept; the oldest are deleted first
+            max_days: Days after which commands are deleted
+            max_output: Characters of output and of error output kept per
+                        command
+        """
+        self.path = path
+        self.max_rows = max_rows
+        self.max_days = max_days
+        self.max_output = max_output
+        self.dropped = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue(MAX_PENDING)
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._writer: Optional[threading.Thread] = None
+        self._last_prune = 0.0
+
+    def record(
+        self,
+        command: str,
+        cwd: Optional[str],
+        started: float,
+        duration: float,
+        return_code: Optional[int],
+        success: bool,
+        output: Optional[str],
+        error: Optional[str],
+        output_digest: Optional[str] = None,
+        client: Optional[str] = None,
+    ) -> None:
+        """
+        Queue a command for recording without waiting for the disk.
+
+        Args:
+            command: The command line
+            cwd: Working directory it ran in
+            started: Unix timestamp it started at
+            duration: Seconds it took
+            return_code: Its exit status, if known
+            success: Whether it succeeded
+            output: Its output
+            error: Its error output
+            output_digest: Digest of the full output in the artifact store
+            client: Key of the client that ran it, if clients are told apart
+        """
+        truncated = False
+        if output is not None and len(output) > self.max_output:
+            output, truncated = output[: self.max_output], True
+        if error is not None and len(error) > self.max_output:
+            error, truncated = error[: self.max_output], True
+        row = (
+            command,
+            cwd,
+            started,
+            duration,
+            return_code,
+            int(success),
+            output,
+            error,
+            output_digest,
+            int(truncated),
+            client,
+        )
+        self._start_writer()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            # Better to lose history than to stall commands
+            self.dropped += 1
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every record queued so far has been written.
+
+        Args:
+            timeout: Most seconds to wait
+
+        Returns:
+            Whether the records were written in time
+        """
+        if self._writer is None or not self._writer.is_alive():
+            return True
+        written = threading.Event()
+        self._queue.put(written)
+        return written.wait(timeout)
+
+    def search(
+        self,
+        text: Optional[str] = None,
+        command_prefix: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        return_code: Optional[int] = None,
+        success: Optional[bool] = None,
+        limit: int = DEFAULT_SEARCH_LIMIT,
+        offset: int = 0,
+        client: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Find recorded commands, most recent first.
+
+        Args:
+            text: Words that must all appear in the command or its output
+            command_prefix: Only commands starting with this
+            since: Only commands started at or after this Unix timestamp
+            until: Only commands started before this Unix timestamp
+            return_code: Only commands that exited with this status
+            success: Only commands that succeeded, or failed
+            limit: Most results to return
+            offset: Results to skip
+            client: Only commands run by this client
+
+        Returns:
+            Matching commands; with text, each has a snippet of the match
+        """
+        clauses: List[str] = []
+        params: List[Any] = []
+        columns = ", ".join(f"c.{name}" for name in _COLUMNS)
+        if text and text.strip():
+            sql = (
+                f"SELECT c.id, {columns}, "
+                "snippet(commands_fts, -1, '[', ']', '...', 16) "
+                "FROM commands_fts JOIN commands c ON c.id = commands_fts.rowid"
+            )
+            clauses.append("commands_fts MATCH ?")
+            params.append(fts_query(text))
+        else:
+            sql = f"SELECT c.id, {columns}, NULL FROM commands c"
+        if command_prefix:
+            escaped = (
+                command_prefix.replace("\\", "\\\\")
+                .replace("%", "\\%")
+                .replace("_", "\\_")
+            )
+            clauses.append("c.command LIKE ? ESCAPE '\\'")
+            params.append(escaped + "%")
+        if since is not None:
+            clauses.append("c.started >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("c.started < ?")
+            params.append(until)
+        if return_code is not None:
+            clauses.append("c.return_code = ?")
+            params.append(return_code)
+        if success is not None:
+            clauses.append("c.success = ?")
+            params.append(int(success))
+        if client is not None:
+            clauses.append("c.client = ?")
+            params.append(client)
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY c.started DESC, c.id DESC LIMIT ? OFFSET ?"
+        params.extend([max(1, min(limit, MAX_SEARCH_LIMIT)), max(0, offset)])
+
+        with self._lock:
+            rows = self._connect().execute(sql, params).fetchall()
+        results = []
+        for row in rows:
+            entry = dict(zip(("id",) + _COLUMNS, row[:-1]))
+            entry["success"] = bool(entry["success"])
+            entry["truncated"] = bool(entry["truncated"])
+            if row[-1] is not None:
+                entry["snippet"] = row[-1]
+            results.append(entry)
+        return results
+
+    def prune(self) -> int:
+        """
+        Delete commands beyond the retention limits.
+
+        Returns:
+            Number of commands deleted
+        """
+        cutoff = time.time() - self.max_days * 86400
+        with self._lock:
+            db = self._connect()
+            with db:
+                deleted = db.execute(
+                    "DELETE FROM commands WHERE started < ?", (cutoff,)
+                ).rowcount
+                deleted += db.execute(
+                    "DELETE FROM commands WHERE id <= (SELECT id FROM commands "
+                    "ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                    (self.max_rows,),
+                ).rowcount
+        self._last_prune = time.monotonic()
+        return deleted
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Write queued records and close the database.
+
+        Args:
+            timeout: Most seconds to wait for queued records
+        """
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(timeout)
+        self._writer = None
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database and create the schema the first time."""
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, mode=0o700, exist_ok=True)
+            # Commands and their output may hold secrets; SQLite gives its
+            # journal files the database's mode
+            os.close(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600))
+            if stat.S_IMODE(os.stat(self.path).st_mode) & 0o077:
+                os.chmod(self.path, 0o600)
+            db = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            with db:
+                db.execute("PRAGMA journal_mode=WAL")
+                # WAL keeps the database consistent; losing the last records
+                # on power failure is acceptable for a history
+                db.execute("PRAGMA synchronous=NORMAL")
+                for statement in _SCHEMA:
+                    db.execute(statement)
+                # Databases from before clients were recorded lack the column
+                columns = [row[1] for row in db.execute("PRAGMA table_info(commands)")]
+                if "client" not in columns:
+                    db.execute("ALTER TABLE commands ADD COLUMN client TEXT")
+                db.execute(
+                    "CREATE INDEX IF NOT EXISTS commands_client "
+                    "ON commands (client, started)"
+                )
+            self._db = db
+        return self._db
+
+    def _start_writer(self) -> None:
+        """Start the background writer thread if it is not running."""
+        if self._writer is None or not self._writer.is_alive():
+            self._writer = threading.Thread(
+                target=self._write_loop, name="mcp-history-writer", daemon=True
+            )
+            self._writer.start()
+
+    def _write_loop(self) -> None:
+        """Write queued records in batches until told to stop."""
+        while True:
+            item = self._queue.get()
+            batch: List[tuple] = []
+            waiters: List[threading.Event] = []
+            stop = False
+            while True:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if stop or len(batch) >= _BATCH_SIZE:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if batch:
+                try:
+                    self._write(batch)
+                except Exception as e:
+                    logger.error(f"Error writing command history: {e}")
+            for waiter in waiters:
+                waiter.set()
+            if stop:
+                return
+
+    def _write(self, batch: List[tuple]) -> None:
+        """Insert a batch of records in one transaction."""
+        placeholders = ", ".join("?" for _ in _RECORD_COLUMNS)
+        with self._lock:
+            db = self._connect()
+            with db:
+                db.executemany(
+                    f"INSERT INTO commands ({', '.join(_RECORD_COLUMNS)}) "
+                    f"VALUES ({placeholders})",
+                    batch,
+                )
+        if time.monotonic() - self._last_prune >= _PRUNE_INTERVAL:
+            self.prune()
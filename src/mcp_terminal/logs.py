@@ -0,0 +1,204 @@
+"""
+Logging setup for the MCP Terminal Server.
+Every component logs through the standard logging module. Records are put
+on a queue by the thread that logs them and formatted and written by a
+background thread, so a slow or blocked stderr never stalls the event loop.
+Each record carries the correlation id of the MCP request it was logged
+for, and records can be written as JSON lines.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import queue
+import secrets
+import sys
+import weakref
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional, TextIO
+
+# Format of text log lines
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Format of text log lines logged while handling a request
+TEXT_FORMAT_WITH_ID = (
+    "%(asctime)s - %(name)s - %(levelname)s - [%(correlation_id)s] %(message)s"
+)
+
+# Correlation id overriding the one derived from the MCP request
+correlation_id: ContextVar[Optional[str]] = ContextVar(
+    "mcp_terminal_correlation_id", default=None
+)
+
+# Short random tag per client session, so request ids are unique across them
+_session_tags: "weakref.WeakKeyDictionary[Any, str]" = weakref.WeakKeyDictionary()
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+_stream_handler: Optional[logging.Handler] = None
+
+# Renders tracebacks before records are queued
+_exception_formatter = logging.Formatter()
+
+
+def current_correlation_id() -> Optional[str]:
+    """
+    Correlation id of the request being handled, if any.
+
+    Derived from the client session and the MCP request id, e.g.
+    ``3fa2c1d0-7`` for request 7 of a session.
+    """
+    value = correlation_id.get()
+    if value:
+        return value
+    # Imported here so importing this module stays cheap
+    from mcp.server.lowlevel.server import request_ctx
+
+    try:
+        ctx = request_ctx.get()
+    except LookupError:
+        return None
+    return f"{_session_tag(ctx.session)}-{ctx.request_id}"
+
+
+def _session_tag(session: Any) -> str:
+    """Tag identifying a session in correlation ids."""
+    try:
+        tag = _session_tags.get(session)
+        if tag is None:
+            tag = _session_tags[session] = secrets.token_hex(4)
+        return tag
+    except TypeError:
+        # Not weakly referenceable or hashable
+        return f"{id(session):x}"
+
+
+class CorrelationFilter(logging.Filter):
+    """Stamps records with the correlation id of the current request."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.correlation_id = current_correlation_id()
+        return True
+
+
+class TextFormatter(logging.Formatter):
+    """The server's text format, with the correlation id when there is one."""
+
+    def __init__(self):
+        super().__init__(TEXT_FORMAT)
+        self._with_id = logging.Formatter(TEXT_FORMAT_WITH_ID)
+
+    def format(self, record: logging.LogRecord) -> str:
+        if getattr(record, "correlation_id", None):
+            return self._with_id.format(record)
+        return super().format(record)
+
+
+class _QueueHandler(QueueHandler):
+    """Queues records with their message and traceback rendered separately."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Arguments and tracebacks may change or pin frames once we return,
+        # so render them now; the rest of formatting happens on the writer
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class _StderrHandler(logging.StreamHandler):
+    """Writes to whatever sys.stderr is when each record is written."""
+
+    @property
+    def stream(self) -> TextIO:
+        return sys.stderr
+
+    @stream.setter
+    def stream(self, value: TextIO) -> None:
+        pass
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "correlation_id", None):
+            entry["correlation_id"] = record.correlation_id
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def setup_logging(
+    level: str = "INFO", json_format: bool = False, stream: Optional[TextIO] = None
+) -> None:
+    """
+    Route all logging through a queue to a background writer thread.
+
+    Replaces the root logger's stream handlers, including a previous setup,
+    so it can be called again to change the level or format.
+
+    Args:
+        level: Logging level name
+        json_format: Write JSON lines instead of text
+        stream: Where to write; defaults to stderr, which keeps stdout free
+                for the stdio transport
+    """
+    global _listener, _queue_handler, _stream_handler
+
+    stop_logging()
+    handler = logging.StreamHandler(stream) if stream else _StderrHandler()
+    handler.setFormatter(JsonFormatter() if json_format else TextFormatter())
+
+    records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    queue_handler = _QueueHandler(records)
+    queue_handler.addFilter(CorrelationFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        if existing is _stream_handler or type(existing) is logging.StreamHandler:
+            root.removeHandler(existing)
+    root.addHandler(queue_handler)
+    root.setLevel(getattr(logging, level))
+
+    _listener = QueueListener(records, handler, respect_handler_level=True)
+    _listener.start()
+    _queue_handler = queue_handler
+    _stream_handler = handler
+
+
+def stop_logging() -> None:
+    """
+    Write out queued records and stop the background thread.
+
+    Later records are written directly, so nothing logged during the rest
+    of shutdown is lost.
+    """
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    root = logging.getLogger()
+    root.addHandler(_stream_handler)
+    root.removeHandler(_queue_handler)
+    _listener.stop()
+    _listener = None
+    _queue_handler = None
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,344 @@
+"""
+Runtime metrics for MCP tools.
+Counts calls, errors and in-flight requests per tool and records latency
+histograms for whole calls and for the phases inside them (filter check,
+spawn, wait, serialize, queue), rendered as a dictionary or in the
+Prometheus text exposition format.
+"""
+
+import contextvars
+import functools
+import inspect
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from mcp.server.fastmcp import FastMCP
+
+# Upper bounds of the latency buckets in seconds
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+# The tool call being handled by the current task, if any
+_current_call: contextvars.ContextVar[Optional["_Call"]] = contextvars.ContextVar(
+    "mcp_terminal_tool_call", default=None
+)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram."""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        """
+        Initialize the histogram.
+
+        Args:
+            buckets: Sorted upper bounds of the buckets in seconds
+        """
+        self.buckets = tuple(buckets)
+        # One extra slot for observations above the last bound (+Inf)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record one observation."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """Return (upper bound label, cumulative count) pairs including +Inf."""
+        pairs = []
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            pairs.append((format_float(bound), total))
+        pairs.append(("+Inf", self.count))
+        return pairs
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a quantile as the upper bound of the bucket containing it.
+
+        Returns:
+            The estimate in seconds, the last finite bound if it falls in the
+            overflow bucket, or None if nothing was observed
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            if total >= rank:
+                return bound
+        return self.buckets[-1]
+
+    def summary(self) -> Dict[str, Any]:
+        """Summarize the histogram for JSON output."""
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class ToolStats:
+    """Counters and histograms for one tool."""
+
+    def __init__(self):
+        """Initialize empty statistics."""
+        self.calls = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.latency = Histogram()
+        self.phases: Dict[str, Histogram] = {}
+
+    def phase(self, name: str) -> Histogram:
+        """Return the histogram for a phase, creating it on first use."""
+        histogram = self.phases.get(name)
+        if histogram is None:
+            histogram = self.phases[name] = Histogram()
+        return histogram
+
+
+class _Call:
+    """State of one tool call while it runs."""
+
+    __slots__ = ("stats", "failed", "returned")
+
+    def __init__(self, stats: ToolStats):
+        self.stats = stats
+        self.failed = False
+        # perf_counter() value when the handler returned its result
+        self.returned: Optional[float] = None
+
+
+def observe_phase(name: str, seconds: float) -> None:
+    """
+    Record the duration of a phase of the current tool call.
+
+    Does nothing outside an instrumented tool call.
+
+    Args:
+        name: Phase name, e.g. "spawn"
+        seconds: Duration of the phase
+    """
+    call = _current_call.get()
+    if call is not None:
+        call.stats.phase(name).observe(seconds)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """
+    Time a block as a phase of the current tool call.
+
+    Args:
+        name: Phase name, e.g. "filter"
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_phase(name, time.perf_counter() - start)
+
+
+class ServerMetrics:
+    """
+    Metrics for every tool registered on a FastMCP server.
+    """
+
+    def __init__(self):
+        """Initialize the metrics registry."""
+        self.started = time.time()
+        self.tools: Dict[str, ToolStats] = {}
+
+    def stats(self, tool: str) -> ToolStats:
+        """Return the statistics for a tool, creating them on first use."""
+        stats = self.tools.get(tool)
+        if stats is None:
+            stats = self.tools[tool] = ToolStats()
+        return stats
+
+    @contextmanager
+    def track(self, tool: str) -> Iterator[_Call]:
+        """
+        Account for one call of a tool.
+
+        The call counts as an error if the block raises or the handler
+        returned a response with ``success`` set to False.
+
+        Args:
+            tool: Tool name
+        """
+        stats = self.stats(tool)
+        call = _Call(stats)
+        token = _current_call.set(call)
+        stats.calls += 1
+        stats.in_flight += 1
+        start = time.perf_counter()
+        try:
+            yield call
+        except BaseException:
+            call.failed = True
+            raise
+        finally:
+            end = time.perf_counter()
+            stats.in_flight -= 1
+            stats.latency.observe(end - start)
+            if call.returned is not None:
+                stats.phase("serialize").observe(end - call.returned)
+            if call.failed:
+                stats.errors += 1
+            _current_call.reset(token)
+
+    def instrument(self, mcp: FastMCP) -> None:
+        """
+        Wrap every tool registered on a server so its calls are tracked.
+
+        Tools registered afterwards are tracked too, but without the
+        serialize phase.
+
+        Args:
+            mcp: The server whose tools to instrument
+        """
+        manager = mcp._tool_manager
+        for tool in manager.list_tools():
+            if not getattr(tool.fn, "_metrics_wrapped", False):
+                tool.fn = _wrap_handler(tool.fn)
+
+        call_tool = manager.call_tool
+
+        @functools.wraps(call_tool)
+        async def tracked_call_tool(name: str, arguments: Dict[str, Any], **kwargs):
+            if manager.get_tool(name) is None:
+                # Unknown names would add a label per typo; just fail the call
+                return await call_tool(name, arguments, **kwargs)
+            with self.track(name):
+                return await call_tool(name, arguments, **kwargs)
+
+        manager.call_tool = tracked_call_tool
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return all metrics as a JSON-serializable dictionary."""
+        return {
+            "uptime": round(time.time() - self.started, 3),
+            "tools": {
+                name: {
+                    "calls": stats.calls,
+                    "errors": stats.errors,
+                    "in_flight": stats.in_flight,
+                    "latency": stats.latency.summary(),
+                    "phases": {
+                        phase_name: histogram.summary()
+                        for phase_name, histogram in sorted(stats.phases.items())
+                    },
+                }
+                for name, stats in sorted(self.tools.items())
+            },
+        }
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = [
+            "# HELP mcp_uptime_seconds Seconds since the server started.",
+            "# TYPE mcp_uptime_seconds gauge",
+            f"mcp_uptime_seconds {format_float(time.time() - self.started)}",
+        ]
+        tools = sorted(self.tools.items())
+
+        for metric, kind, help_text, attr in (
+            ("mcp_tool_calls_total", "counter", "Tool calls started.", "calls"),
+            ("mcp_tool_errors_total", "counter", "Tool calls that failed.", "errors"),
+            ("mcp_tool_in_flight", "gauge", "Tool calls running.", "in_flight"),
+        ):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for name, stats in tools:
+                lines.append(f"{metric}{{tool={label(name)}}} {getattr(stats, attr)}")
+
+        metric = "mcp_tool_duration_seconds"
+        lines.append(f"# HELP {metric} Duration of tool calls.")
+        lines.append(f"# TYPE {metric} histogram")
+        for name, stats in tools:
+            lines.extend(_histogram_lines(metric, f"tool={label(name)}", stats.latency))
+
+        metric = "mcp_tool_phase_duration_seconds"
+        lines.append(f"# HELP {metric} Duration of phases within tool calls.")
+        lines.append(f"# TYPE {metric} histogram")
+        for name, stats in tools:
+            for phase_name, histogram in sorted(stats.phases.items()):
+                labels = f"tool={label(name)},phase={label(phase_name)}"
+                lines.extend(_histogram_lines(metric, labels, histogram))
+
+        return "\n".join(lines) + "\n"
+
+
+def _wrap_handler(fn):
+    """Mark when a tool handler returns and whether it reported failure."""
+
+    def returned(result):
+        call = _current_call.get()
+        if call is not None:
+            call.returned = time.perf_counter()
+            if getattr(result, "success", True) is False:
+                call.failed = True
+        return result
+
+    if inspect.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def handler(*args, **kwargs):
+            return returned(await fn(*args, **kwargs))
+
+    else:
+
+        @functools.wraps(fn)
+        def handler(*args, **kwargs):
+            return returned(fn(*args, **kwargs))
+
+    handler._metrics_wrapped = True
+    return handler
+
+
+def label(value: str) -> str:
+    """Quote a label value, escaping as the exposition format requires."""
+    escaped = value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+def format_float(value: float) -> str:
+    """Format a number the way Prometheus clients do."""
+    return repr(float(value))
+
+
+def _histogram_lines(metric: str, labels: str, histogram: Histogram) -> List[str]:
+    """Render the bucket, sum and count series of one histogram."""
+    lines = [
+        f'{metric}_bucket{{{labels},le="{bound}"}} {count}'
+        for bound, count in histogram.cumulative()
+    ]
+    lines.append(f"{metric}_sum{{{labels}}} {format_float(histogram.sum)}")
+    lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+    return lines
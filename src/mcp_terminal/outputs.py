@@ -0,0 +1,265 @@
+"""
+Server-side storage for large command outputs.
+Outputs over the inline limit are kept here under their digest and the
+response carries only a preview, so a huge output neither floods the
+client's context nor has to be serialized in one piece. Clients page
+through the rest, or filter it, with read_output. Recently used outputs
+are held in memory, split into lines, and dropped when unused for a while
+or to keep memory under its cap; with an artifact store behind it the
+content stays readable from disk after that.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from mcp_terminal.artifacts import ArtifactStore, digest_of
+
+logger = logging.getLogger("MCP:Terminal:Outputs")
+
+# Default characters of output returned inline before it is stored
+DEFAULT_INLINE_LIMIT = 16 * 1024
+
+# Default characters of output held in memory across all handles
+DEFAULT_STORE_SIZE = 64 * 1024 * 1024
+
+# Default seconds a stored output is held in memory after it was last read
+DEFAULT_OUTPUT_TTL = 600.0
+
+# Default and maximum number of lines returned by one read
+DEFAULT_READ_LINES = 200
+MAX_READ_LINES = 1000
+
+
+class Offloaded(NamedTuple):
+    """What to return for one output."""
+
+    text: Optional[str]  # The output itself, or a preview of it
+    digest: Optional[str]  # SHA-256 of the full output
+    handle: Optional[str]  # Handle for read_output, if the output was kept
+
+
+class _Output:
+    """A stored output and when it was last used."""
+
+    __slots__ = ("lines", "size", "last_used")
+
+    def __init__(self, lines: List[str], size: int):
+        self.lines = lines
+        self.size = size
+        self.last_used = time.monotonic()
+
+
+class OutputStore:
+    """
+    Keeps large outputs under their digest, least recently used first out.
+
+    Identical outputs share one entry, whichever command or client
+    produced them.
+    """
+
+    def __init__(
+        self,
+        inline_limit: int = DEFAULT_INLINE_LIMIT,
+        max_size: int = DEFAULT_STORE_SIZE,
+        ttl: float = DEFAULT_OUTPUT_TTL,
+        artifacts: Optional[ArtifactStore] = None,
+    ):
+        """
+        Initialize the store.
+
+        Args:
+            inline_limit: Outputs longer than this many characters are stored
+                          and replaced by a preview of about this size
+            max_size: Most characters held in memory across stored outputs
+            ttl: Seconds a stored output is held in memory after it was last
+                 read
+            artifacts: Disk store keeping outputs beyond memory eviction
+        """
+        self.inline_limit = inline_limit
+        self.max_size = max_size
+        self.ttl = ttl
+        self.artifacts = artifacts
+        self.size = 0
+        # digest -> output, least recently used first
+        self._outputs: "OrderedDict[str, _Output]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._outputs)
+
+    async def offload(self, text: Optional[str]) -> Offloaded:
+        """
+        Digest an output and store it if it is too long to return inline.
+
+        Args:
+            text: The full output
+
+        Returns:
+            The text to return inline (the output itself or a preview of its
+            head and tail), its digest and the handle it is stored under
+        """
+        if text is None:
+            return Offloaded(None, None, None)
+        if len(text) <= self.inline_limit:
+            return Offloaded(text, digest_of(text.encode()), None)
+
+        # Hashing and splitting a large output is CPU-bound; keep it off the loop
+        loop = asyncio.get_running_loop()
+        data, digest, lines, preview = await loop.run_in_executor(
+            None, self._prepare, text
+        )
+        handle = None
+        if self._keep(digest, lines, len(text)):
+            handle = digest
+        if self.artifacts is not None:
+            try:
+                if await loop.run_in_executor(None, self.artifacts.put, data, digest):
+                    handle = digest
+            except OSError as e:
+                logger.warning(f"Error storing output {digest}: {e}")
+        return Offloaded(preview, digest, handle)
+
+    async def lines(self, handle: str) -> List[str]:
+        """
+        Look up a stored output, marking it as recently used.
+
+        Args:
+            handle: Handle returned with the output
+
+        Returns:
+            The lines of the output
+
+        Raises:
+            KeyError: If the handle is unknown or has expired
+        """
+        self._evict()
+        output = self._outputs.get(handle)
+        if output is not None:
+            output.last_used = time.monotonic()
+            self._outputs.move_to_end(handle)
+            return output.lines
+
+        if self.artifacts is not None:
+            loop = asyncio.get_running_loop()
+            data = await loop.run_in_executor(None, self.artifacts.get, handle)
+            if data is not None:
+                text = data.decode("utf-8", errors="replace")
+                lines = await loop.run_in_executor(None, text.splitlines)
+                self._keep(handle, lines, len(text))
+                return lines
+        raise KeyError(f"Unknown or expired output handle: {handle}")
+
+    async def read(self, handle: str, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+        """Read a page of a stored output; see paginate for the arguments."""
+        return paginate(await self.lines(handle), *args, **kwargs)
+
+    def clear(self) -> None:
+        """Drop every output held in memory."""
+        self._outputs.clear()
+        self.size = 0
+
+    def _keep(self, digest: str, lines: List[str], size: int) -> bool:
+        """Hold an output in memory if it fits; False if it does not."""
+        output = self._outputs.get(digest)
+        if output is not None:
+            output.last_used = time.monotonic()
+            self._outputs.move_to_end(digest)
+            return True
+        if size > self.max_size:
+            return False
+        self._outputs[digest] = _Output(lines, size)
+        self.size += size
+        self._evict()
+        return True
+
+    def _evict(self) -> None:
+        """Drop outputs past their TTL, then the oldest while over the cap."""
+        deadline = time.monotonic() - self.ttl
+        while self._outputs:
+            handle, output = next(iter(self._outputs.items()))
+            if output.last_used > deadline and self.size <= self.max_size:
+                break
+            del self._outputs[handle]
+            self.size -= output.size
+
+    def _prepare(self, text: str) -> Tuple[bytes, str, List[str], str]:
+        """Encode, digest, split and preview an output."""
+        data = text.encode()
+        digest = digest_of(data)
+        kept = len(text) <= self.max_size or (
+            self.artifacts is not None and len(data) <= self.artifacts.max_size
+        )
+        return data, digest, text.splitlines(), self._preview(text, kept and digest)
+
+    def _preview(self, text: str, handle: Optional[str]) -> str:
+        """Head and tail of an output, cut at line boundaries."""
+        half = self.inline_limit // 2
+        head = text[:half]
+        cut = head.rfind("\n")
+        if cut > 0:
+            head = head[: cut + 1]
+        tail = text[-half:]
+        cut = tail.find("\n")
+        if 0 <= cut < len(tail) - 1:
+            tail = tail[cut + 1 :]
+
+        omitted = text.count("\n", len(head), len(text) - len(tail))
+        if handle:
+            note = f"call read_output with handle {handle} for the full output"
+        else:
+            note = "output too large to keep"
+        if not head.endswith("\n"):
+            head += "\n"
+        return f"{head}[... {omitted} lines omitted; {note} ...]\n{tail}"
+
+
+def paginate(
+    lines: List[str],
+    offset: int = 0,
+    limit: int = DEFAULT_READ_LINES,
+    pattern: Optional[str] = None,
+    ignore_case: bool = False,
+) -> Dict[str, Any]:
+    """
+    Return one page of lines, optionally only those matching a pattern.
+
+    Args:
+        lines: All lines of an output
+        offset: Lines to skip; with a pattern, matching lines to skip
+        limit: Most lines to return
+        pattern: Only return lines matching this regular expression
+        ignore_case: Match the pattern case-insensitively
+
+    Returns:
+        Dictionary with the lines (1-based line number and text), the offset
+        of the next page if there is one, and the total number of lines
+    """
+    limit = max(1, min(limit, MAX_READ_LINES))
+    offset = max(0, offset)
+    page: List[Dict[str, Any]] = []
+    if pattern is None:
+        # Unfiltered pages are a slice; no need to walk the skipped lines
+        page = [
+            {"line": n, "text": line}
+            for n, line in enumerate(lines[offset : offset + limit], offset + 1)
+        ]
+        more = offset + limit < len(lines)
+    else:
+        regex = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+        matches = ((n, line) for n, line in enumerate(lines, 1) if regex.search(line))
+        more = False
+        for index, (n, line) in enumerate(matches):
+            if index < offset:
+                continue
+            if len(page) == limit:
+                more = True
+                break
+            page.append({"line": n, "text": line})
+    return {
+        "lines": page,
+        "next_offset": offset + len(page) if more else None,
+        "total_lines": len(lines),
+    }
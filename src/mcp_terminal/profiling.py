@@ -0,0 +1,231 @@
+"""
+On-demand profilers for a running server.
+A sampling profiler reads the event loop thread's stack from a background
+thread at a fixed interval and aggregates it into collapsed stacks, and a
+tracemalloc wrapper keeps numbered snapshots for top-allocation reports and
+diffs. Neither costs anything while it is not running.
+"""
+
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+# Bounds of the sampling interval in seconds
+MIN_SAMPLE_INTERVAL = 0.001
+MAX_SAMPLE_INTERVAL = 1.0
+
+# Longest sampling run
+MAX_PROFILE_DURATION = 300.0
+
+# Deepest stack recorded per sample
+MAX_STACK_DEPTH = 128
+
+# Memory snapshots kept for diffing
+MAX_SNAPSHOTS = 8
+
+
+def _frame_label(frame) -> str:
+    """Label a frame as "file.py:function"."""
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of one thread and counts identical stacks.
+
+    The sampling thread only reads ``sys._current_frames()``, so the
+    profiled thread is never interrupted; the cost to it is the GIL hand-off
+    once per interval.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        """
+        Initialize the profiler.
+
+        Args:
+            thread_id: Identifier of the thread to sample
+            interval: Seconds between samples
+        """
+        self.thread_id = thread_id
+        self.interval = min(max(interval, MIN_SAMPLE_INTERVAL), MAX_SAMPLE_INTERVAL)
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started: Optional[float] = None
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the sampling thread is active."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start sampling in a background thread."""
+        if self.running:
+            raise RuntimeError("Profiler is already running")
+        self._stop.clear()
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._run, name="mcp-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the sampling thread to exit."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.started is not None:
+            self.elapsed = time.perf_counter() - self.started
+
+    def _run(self) -> None:
+        """Take samples until stopped."""
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                # The thread has exited
+                break
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            del frame
+            stack.reverse()
+            self.stacks[";".join(stack)] += 1
+            self.samples += 1
+
+    def collapsed(self, limit: Optional[int] = None) -> Tuple[List[str], bool]:
+        """
+        Return the samples in the collapsed-stack format used by flame graph
+        tools: one "root;...;leaf count" line per distinct stack.
+
+        Args:
+            limit: Maximum number of stacks, most frequent first
+
+        Returns:
+            Tuple of (lines, whether stacks were omitted)
+        """
+        common = self.stacks.most_common(limit)
+        return [f"{stack} {count}" for stack, count in common], len(common) < len(
+            self.stacks
+        )
+
+
+class MemoryTracker:
+    """
+    tracemalloc snapshots identified by number.
+
+    Tracing only sees allocations made after it starts, so the first
+    snapshot is normally taken some time after ``start``.
+    """
+
+    def __init__(self, max_snapshots: int = MAX_SNAPSHOTS):
+        """
+        Initialize the tracker.
+
+        Args:
+            max_snapshots: Snapshots kept; the oldest are dropped first
+        """
+        self.max_snapshots = max_snapshots
+        self.snapshots: "OrderedDict[int, tracemalloc.Snapshot]" = OrderedDict()
+        self._next_id = 1
+
+    @property
+    def tracing(self) -> bool:
+        """Whether tracemalloc is tracing allocations."""
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 1) -> None:
+        """
+        Start tracing allocations.
+
+        Args:
+            frames: Number of frames stored per allocation traceback
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(max(1, frames))
+
+    def stop(self) -> None:
+        """Stop tracing and drop all snapshots."""
+        self.snapshots.clear()
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def usage(self) -> Tuple[int, int]:
+        """Return (current, peak) bytes of traced memory."""
+        return tracemalloc.get_traced_memory()
+
+    def take(self) -> int:
+        """
+        Take a snapshot, starting tracing first if needed.
+
+        Returns:
+            The snapshot id
+        """
+        self.start()
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),)
+        )
+        snapshot_id = self._next_id
+        self._next_id += 1
+        self.snapshots[snapshot_id] = snapshot
+        while len(self.snapshots) > self.max_snapshots:
+            self.snapshots.popitem(last=False)
+        return snapshot_id
+
+    def top(
+        self,
+        snapshot_id: int,
+        limit: int = 20,
+        key_type: str = "lineno",
+        compare_to: Optional[int] = None,
+    ) -> List[Dict[str, object]]:
+        """
+        Report the largest allocation sites of a snapshot.
+
+        Args:
+            snapshot_id: Snapshot to report on
+            limit: Number of sites to return
+            key_type: Grouping, "lineno", "filename" or "traceback"
+            compare_to: Earlier snapshot to diff against; sites are then
+                ordered by growth
+
+        Returns:
+            One dictionary per site with location, size and count, plus
+            size_diff and count_diff when comparing
+        """
+        snapshot = self._get(snapshot_id)
+        if compare_to is not None:
+            stats = snapshot.compare_to(self._get(compare_to), key_type)
+        else:
+            stats = snapshot.statistics(key_type)
+
+        sites = []
+        for stat in stats[:limit]:
+            frames = stat.traceback
+            site: Dict[str, object] = {
+                "location": " <- ".join(
+                    f"{frame.filename}:{frame.lineno}" for frame in frames
+                ),
+                "size": stat.size,
+                "count": stat.count,
+            }
+            if compare_to is not None:
+                site["size_diff"] = stat.size_diff
+                site["count_diff"] = stat.count_diff
+            sites.append(site)
+        return sites
+
+    def _get(self, snapshot_id: int) -> tracemalloc.Snapshot:
+        """Look up a snapshot, failing clearly if it was dropped."""
+        snapshot = self.snapshots.get(snapshot_id)
+        if snapshot is None:
+            raise KeyError(f"Unknown or expired snapshot id: {snapshot_id}")
+        return snapshot
@@ -3,35 +3,95 @@
 MCP Terminal Server
 
 This module implements a terminal control server using the Model Context Protocol (MCP).
-It supports both standard input/output (stdio) and Server-Sent Events (SSE) transports.
+It supports standard input/output (stdio), Server-Sent Events (SSE) and
+streamable HTTP transports.
 """
 
 import argparse
 import asyncio
 import logging
+import os
 import platform
 import signal
+import stat
 import sys
+import time
+from contextlib import contextmanager
 from enum import Enum
-from typing import Optional
+from typing import Any, AsyncIterator, Dict, Optional
 
 from mcp.server.fastmcp import FastMCP
-
+from pydantic import BaseModel, Field
+
+from mcp_terminal.admission import (
+    DEFAULT_MAX_LOAD,
+    DEFAULT_MAX_QUEUE,
+    DEFAULT_MIN_FREE_MEMORY,
+    DEFAULT_QUEUE_TIMEOUT,
+    AdmissionController,
+)
+from mcp_terminal.artifacts import (
+    DEFAULT_ARTIFACT_STORE_SIZE,
+    ArtifactStore,
+    default_artifact_dir,
+)
+from mcp_terminal.controllers.manager import DEFAULT_IDLE_TTL, DEFAULT_MAX_CONTROLLERS
+from mcp_terminal.history import (
+    DEFAULT_HISTORY_DAYS,
+    DEFAULT_HISTORY_OUTPUT,
+    DEFAULT_HISTORY_ROWS,
+    CommandHistory,
+    default_history_path,
+)
+from mcp_terminal.logs import setup_logging, stop_logging
+from mcp_terminal.metrics import ServerMetrics
+from mcp_terminal.outputs import (
+    DEFAULT_INLINE_LIMIT,
+    DEFAULT_OUTPUT_TTL,
+    DEFAULT_STORE_SIZE,
+    OutputStore,
+)
 from mcp_terminal.tools.file import FileTool
 from mcp_terminal.tools.terminal import TerminalTool
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
 logger = logging.getLogger("MCP:Terminal:Server")
 
+# Default seconds from a shutdown signal until the server has stopped
+DEFAULT_SHUTDOWN_TIMEOUT = 10.0
+
+# Seconds of the shutdown timeout kept for closing the transport, stopping
+# leftover commands and flushing, rather than spent waiting for commands
+SHUTDOWN_RESERVE = 3.0
+
+# Seconds open HTTP streams get to close once commands have drained
+STREAM_CLOSE_TIMEOUT = 0.5
+
+# Bytes read from stdin at a time in stdio mode
+STDIN_CHUNK_SIZE = 64 * 1024
+
 
 class ServerMode(str, Enum):
     """Server transport modes."""
 
     STDIO = "stdio"
     SSE = "sse"
+    STREAMABLE_HTTP = "streamable-http"
+
+
+class ServerStatsResponse(BaseModel):
+    """Response model for server statistics."""
+
+    uptime: float = Field(..., description="Seconds since the server started")
+    tools: Dict[str, Any] = Field(
+        ...,
+        description="Per-tool calls, errors, in-flight count and latency "
+        "summaries for whole calls and for each phase",
+    )
+    admission: Dict[str, Any] = Field(
+        ...,
+        description="Commands running and queued, host load and memory, and "
+        "rejections by reason",
+    )
 
 
 class MCPTerminalServer:
@@ -46,22 +106,59 @@ class MCPTerminalServer:
         host: str = "127.0.0.1",
         port: int = 3000,
         log_level: str = "INFO",
+        log_format: str = "text",
         whitelist_file: Optional[str] = None,
         blacklist_file: Optional[str] = None,
         whitelist_mode: bool = False,
+        enable_profiling: bool = False,
+        state_dir: Optional[str] = None,
+        worker_name: Optional[str] = None,
+        stateless: bool = False,
+        max_clients: int = DEFAULT_MAX_CONTROLLERS,
+        client_idle_ttl: float = DEFAULT_IDLE_TTL,
+        admission: Optional[Dict[str, Any]] = None,
+        outputs: Optional[Dict[str, Any]] = None,
+        artifacts: Optional[Dict[str, Any]] = None,
+        history: Optional[Dict[str, Any]] = None,
+        shutdown_timeout: float = DEFAULT_SHUTDOWN_TIMEOUT,
     ):
         """
         Initialize the MCP Terminal Server.
 
         Args:
             controller_type: Type of terminal controller to use ("iterm", "applescript", "subprocess")
-            mode: Server transport mode (stdio or sse)
-            host: Host to bind the server to (for SSE mode)
-            port: Port to bind the server to (for SSE mode)
+            mode: Server transport mode (stdio, sse or streamable-http)
+            host: Host to bind the server to (for HTTP modes)
+            port: Port to bind the server to (for HTTP modes)
             log_level: Logging level
+            log_format: Format of log lines, "text" or "json"
             whitelist_file: Path to command whitelist file
             blacklist_file: Path to command blacklist file
             whitelist_mode: If True, only whitelisted commands are allowed
+            enable_profiling: If True, register the profiling admin tools
+            state_dir: Directory shared by SSE workers for their session
+                       registry and sockets
+            worker_name: Name of this process when it is one of several SSE
+                         workers sharing a port
+            stateless: If True, streamable HTTP requests are handled without
+                       sessions, each one independently
+            max_clients: Most clients with their own terminal controller at
+                         once in HTTP modes
+            client_idle_ttl: Seconds before an idle client's controller is
+                             closed in HTTP modes
+            admission: Keyword arguments for the AdmissionController that
+                       limits running commands
+            outputs: Keyword arguments for the OutputStore that keeps large
+                     command outputs
+            artifacts: Keyword arguments for the ArtifactStore that keeps
+                       outputs on disk; root defaults to a per-user cache
+                       directory
+            history: Keyword arguments for the CommandHistory that records
+                     executed commands; path defaults to a per-user state
+                     file, and max_rows 0 turns the history off
+            shutdown_timeout: Seconds from a shutdown signal until the server
+                              has stopped; running commands get all but
+                              SHUTDOWN_RESERVE of it to finish
         """
         self.controller_type = controller_type
         self.mode = mode
@@ -70,15 +167,46 @@ class MCPTerminalServer:
         self.whitelist_file = whitelist_file
         self.blacklist_file = blacklist_file
         self.whitelist_mode = whitelist_mode
+        self.enable_profiling = enable_profiling
+        self.state_dir = state_dir
+        self.worker_name = worker_name
+        self.shutdown_timeout = shutdown_timeout
+        # The uvicorn server in HTTP modes, told to exit on shutdown
+        self._http_server: Any = None
+        # Stdin in stdio mode when read on the event loop, ended on shutdown
+        self._stdin: Optional[asyncio.StreamReader] = None
+        self.stateless = stateless
+        self.max_clients = max_clients
+        self.client_idle_ttl = client_idle_ttl
+        self.admission = AdmissionController(**(admission or {}))
+        artifacts = dict(artifacts or {})
+        artifacts["root"] = artifacts.get("root") or default_artifact_dir()
+        self.outputs = OutputStore(
+            **(outputs or {}), artifacts=ArtifactStore(**artifacts)
+        )
+        history = dict(history or {})
+        history["path"] = history.get("path") or default_history_path()
+        self.history = (
+            CommandHistory(**history)
+            if history.get("max_rows", DEFAULT_HISTORY_ROWS) > 0
+            else None
+        )
 
-        # Set up logging
-        logging.getLogger().setLevel(getattr(logging, log_level))
+        # Set up logging before FastMCP, whose own setup then stands aside
+        setup_logging(log_level, json_format=log_format == "json")
 
         # Create MCP server
-        self.mcp = FastMCP("mcp-terminal", host=host, port=port, log_level=log_level)
+        self.mcp = FastMCP(
+            "mcp-terminal",
+            host=host,
+            port=port,
+            log_level=log_level,
+            stateless_http=stateless,
+        )
 
         self.tools = {}
         self.tools_registered = False
+        self.metrics = ServerMetrics()
 
     def register_tools(self) -> None:
         """
@@ -96,12 +224,28 @@ class MCPTerminalServer:
                 whitelist_file=self.whitelist_file,
                 blacklist_file=self.blacklist_file,
                 whitelist_mode=self.whitelist_mode,
+                # Clients sharing an HTTP server each get their own controller
+                per_client=self.mode == ServerMode.SSE
+                or (self.mode == ServerMode.STREAMABLE_HTTP and not self.stateless),
+                max_clients=self.max_clients,
+                client_idle_ttl=self.client_idle_ttl,
+                admission=self.admission,
+                outputs=self.outputs,
+                history=self.history,
             )
             file_tool = FileTool()
             terminal_tool.register_mcp(self.mcp)
             file_tool.register_mcp(self.mcp)
             self.tools["terminal"] = terminal_tool
             self.tools["file"] = file_tool
+            if self.enable_profiling:
+                from mcp_terminal.tools.profiling import ProfilingTool
+
+                profiling_tool = ProfilingTool()
+                profiling_tool.register_mcp(self.mcp)
+                self.tools["profiling"] = profiling_tool
+                logger.info("Profiling tools enabled")
+            self.register_metrics()
 
             self.tools_registered = True
             logger.info("Terminal tool registered with MCP server")
@@ -109,6 +253,158 @@ class MCPTerminalServer:
             logger.error(f"Failed to register terminal tool: {str(e)}", exc_info=True)
             raise
 
+    def register_metrics(self) -> None:
+        """
+        Expose metrics and instrument every registered tool.
+
+        HTTP modes serve them in the Prometheus text format at /metrics on the
+        same HTTP app; stdio mode has no HTTP server, so they are available
+        through the get_server_stats tool instead.
+        """
+        if self.mode in (ServerMode.SSE, ServerMode.STREAMABLE_HTTP):
+            from starlette.requests import Request
+            from starlette.responses import PlainTextResponse, Response
+
+            @self.mcp.custom_route("/metrics", methods=["GET"])
+            async def metrics_endpoint(request: Request) -> Response:
+                return PlainTextResponse(
+                    self.metrics.render_prometheus()
+                    + self.admission.render_prometheus(),
+                    media_type="text/plain; version=0.0.4",
+                )
+
+        else:
+
+            @self.mcp.tool(
+                name="get_server_stats",
+                description="Gets per-tool call counts, errors, in-flight calls "
+                "and latency percentiles, overall and per phase (queue, filter, "
+                "spawn, wait, serialize)",
+            )
+            async def get_server_stats() -> ServerStatsResponse:
+                return ServerStatsResponse(
+                    **self.metrics.snapshot(), admission=self.admission.stats()
+                )
+
+        self.metrics.instrument(self.mcp)
+
+    async def serve(self) -> None:
+        """
+        Run the server until its transport ends or SIGINT/SIGTERM arrives,
+        then shut it down.
+        """
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+
+        def request_stop(name: str) -> None:
+            if stop.is_set():
+                logger.info("Shutdown already in progress, ignoring additional signal")
+                return
+            logger.info(f"Received {name}, shutting down")
+            stop.set()
+
+        # Windows doesn't support SIGTERM/SIGINT handling in the same way
+        signals = [] if sys.platform == "win32" else [signal.SIGTERM, signal.SIGINT]
+        for sig in signals:
+            loop.add_signal_handler(sig, request_stop, sig.name)
+
+        serving = asyncio.create_task(self.start())
+        stopping = asyncio.create_task(stop.wait())
+        try:
+            await asyncio.wait({serving, stopping}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            stopping.cancel()
+            await self.shutdown(serving)
+            for sig in signals:
+                loop.remove_signal_handler(sig)
+        if serving.done() and not serving.cancelled():
+            # Raise whatever ended the transport
+            serving.result()
+
+    async def shutdown(self, serving: Optional[asyncio.Task] = None) -> None:
+        """
+        Shut down within shutdown_timeout seconds.
+
+        New commands are rejected at once, while running ones get until
+        SHUTDOWN_RESERVE seconds before the deadline to finish. Commands
+        still running then are stopped along with their children and the
+        history is written out. Last, the transport is closed, once it has
+        sent the results of the commands.
+
+        Args:
+            serving: The task running start(), if it may still be running
+        """
+        started = time.monotonic()
+        deadline = started + self.shutdown_timeout
+        terminal = self.tools.get("terminal")
+        if terminal is not None:
+            running = terminal.admission.running
+            if running:
+                logger.info(f"Waiting for {running} running commands to finish")
+            drain_timeout = max(0.0, deadline - SHUTDOWN_RESERVE - time.monotonic())
+            if not await terminal.drain(drain_timeout):
+                logger.warning(
+                    f"{terminal.admission.running} commands still running after "
+                    f"{drain_timeout:.1f}s; stopping them"
+                )
+
+        await self.cleanup()
+        await self._stop_serving(serving, deadline)
+        logger.info(f"Shutdown completed in {time.monotonic() - started:.2f}s")
+
+    async def _stop_serving(
+        self, serving: Optional[asyncio.Task], deadline: float
+    ) -> None:
+        """
+        Stop the transport, cancelling it if it does not stop by itself.
+
+        Args:
+            serving: The task running start()
+            deadline: time.monotonic() by which the server should have stopped
+        """
+        if serving is None or serving.done():
+            return
+        if self._http_server is not None:
+            # Open SSE streams never end on their own; every command has
+            # returned by now, so do not wait long for them
+            self._http_server.config.timeout_graceful_shutdown = STREAM_CLOSE_TIMEOUT
+            self._http_server.should_exit = True
+        elif self._stdin is not None:
+            # As if the client closed stdin: the server stops once the
+            # responses still being sent are out
+            self._stdin.feed_eof()
+        else:
+            serving.cancel()
+        remaining = max(STREAM_CLOSE_TIMEOUT, deadline - time.monotonic())
+        await asyncio.wait({serving}, timeout=remaining)
+        if not serving.done():
+            serving.cancel()
+            await asyncio.wait({serving}, timeout=STREAM_CLOSE_TIMEOUT)
+        if not serving.done():
+            logger.warning("Transport did not stop before the shutdown deadline")
+
+    def _make_http_server(self, config: Any) -> Any:
+        """
+        Create a uvicorn server that leaves signal handling to serve().
+
+        Args:
+            config: The uvicorn.Config to serve
+        """
+        import uvicorn
+
+        class Server(uvicorn.Server):
+            # uvicorn would otherwise take over SIGINT and SIGTERM and start
+            # its own shutdown before running commands have drained
+            def install_signal_handlers(self) -> None:  # uvicorn < 0.29
+                pass
+
+            @contextmanager
+            def capture_signals(self):
+                yield
+
+        self._http_server = Server(config)
+        return self._http_server
+
     async def start(self) -> None:
         """
         Start the MCP Terminal Server.
@@ -121,10 +417,100 @@ class MCPTerminalServer:
             logger.info(
                 f"Starting MCP Terminal Server in SSE mode on {self.host}:{self.port}"
             )
-            await self.mcp.run_sse_async()
+            if self.worker_name:
+                await self._serve_worker()
+            else:
+                await self._serve_http(self.mcp.sse_app())
+        elif self.mode == ServerMode.STREAMABLE_HTTP:
+            logger.info(
+                "Starting MCP Terminal Server in streamable HTTP mode on "
+                f"{self.host}:{self.port}{self.mcp.settings.streamable_http_path}"
+            )
+            await self._serve_http(self.mcp.streamable_http_app())
         else:  # STDIO mode
             logger.info("Starting MCP Terminal Server in stdio mode")
-            await self.mcp.run_stdio_async()
+            await self._serve_stdio()
+
+    async def _serve_stdio(self) -> None:
+        """
+        Serve over stdin and stdout.
+
+        When stdin is a pipe it is read on the event loop rather than in a
+        thread, so shutdown need not wait for input that may never come.
+        """
+        from mcp.server.stdio import stdio_server
+
+        self._stdin = await _open_stdin()
+        stdin = _split_lines(self._stdin) if self._stdin is not None else None
+        async with stdio_server(stdin=stdin) as (read_stream, write_stream):
+            server = self.mcp._mcp_server
+            await server.run(
+                read_stream, write_stream, server.create_initialization_options()
+            )
+
+    async def _serve_http(self, app: Any) -> None:
+        """
+        Serve an HTTP app with uvicorn, logging through our own handlers.
+
+        Args:
+            app: The ASGI app to serve
+        """
+        import uvicorn
+
+        config = uvicorn.Config(
+            app,
+            host=self.host,
+            port=self.port,
+            log_level=self.mcp.settings.log_level.lower(),
+            # Keep uvicorn from installing handlers that write synchronously
+            log_config=None,
+        )
+        await self._make_http_server(config).serve()
+
+    async def _serve_worker(self) -> None:
+        """
+        Serve SSE as one of several workers sharing the port.
+
+        Besides the shared TCP port, the worker listens on a private Unix
+        socket that other workers forward POSTs for its sessions to.
+        """
+        import uvicorn
+
+        from mcp_terminal.workers import (
+            SessionAffinity,
+            SessionRegistry,
+            bind_reuseport,
+            bind_unix,
+        )
+
+        registry = SessionRegistry(os.path.join(self.state_dir, "registry.db"))
+        address = os.path.join(self.state_dir, f"{self.worker_name}.sock")
+        sockets = [bind_reuseport(self.host, self.port), bind_unix(address)]
+        app = SessionAffinity(
+            self.mcp.sse_app(),
+            registry,
+            self.worker_name,
+            self.mcp.settings.sse_path,
+            self.mcp.settings.message_path,
+        )
+        registry.register_worker(self.worker_name, address, os.getpid())
+        logger.info(
+            f"Starting SSE {self.worker_name} (pid {os.getpid()}) "
+            f"on {self.host}:{self.port}"
+        )
+        config = uvicorn.Config(
+            app,
+            log_level=self.mcp.settings.log_level.lower(),
+            log_config=None,
+        )
+        try:
+            await self._make_http_server(config).serve(sockets=sockets)
+        finally:
+            await app.aclose()
+            registry.remove_worker(self.worker_name)
+            registry.close()
+            if os.path.exists(address):
+                os.unlink(address)
 
     async def cleanup(self) -> None:
         """
@@ -132,29 +518,63 @@ class MCPTerminalServer:
         """
         logger.info("Starting cleanup process")
 
-        # First ensure MCP resources are properly cleaned up
-        if hasattr(self.mcp, "_mcp_server") and hasattr(
-            self.mcp._mcp_server, "_task_group"
-        ):
-            logger.info("Ensuring MCP task groups are properly closed")
-            try:
-                # Give in-flight requests a chance to complete
-                await asyncio.sleep(0.1)
-            except Exception as e:
-                logger.warning(f"Error during MCP cleanup delay: {e}")
-
-        # Then clean up tool controllers
         for tool_name, tool in self.tools.items():
-            if hasattr(tool, "controller") and hasattr(tool.controller, "cleanup"):
-                logger.info(f"Cleaning up {tool_name} controller")
+            if hasattr(tool, "cleanup"):
+                logger.info(f"Cleaning up {tool_name} tool")
                 try:
-                    await tool.controller.cleanup()
+                    await tool.cleanup()
                 except Exception as e:
-                    logger.warning(f"Error cleaning up {tool_name} controller: {e}")
+                    logger.warning(f"Error cleaning up {tool_name} tool: {e}")
 
         logger.info("Cleanup process completed")
 
 
+async def _open_stdin() -> Optional[asyncio.StreamReader]:
+    """
+    Read stdin on the event loop.
+
+    Returns:
+        A reader of stdin, or None if stdin is not a pipe; only then is it
+        safe to make non-blocking, as a terminal is shared with stdout
+    """
+    try:
+        if not stat.S_ISFIFO(os.fstat(sys.stdin.fileno()).st_mode):
+            return None
+        pipe = os.fdopen(os.dup(sys.stdin.fileno()), "rb", buffering=0)
+    except (AttributeError, OSError, ValueError):
+        return None
+    reader = asyncio.StreamReader()
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), pipe)
+    except (NotImplementedError, OSError, ValueError):
+        pipe.close()
+        return None
+    return reader
+
+
+async def _split_lines(reader: asyncio.StreamReader) -> AsyncIterator[str]:
+    """Decode a stream into lines of any length."""
+    pending = bytearray()
+    while True:
+        chunk = await reader.read(STDIN_CHUNK_SIZE)
+        if not chunk:
+            break
+        # Only the new bytes can hold a line break
+        searched = len(pending)
+        pending += chunk
+        start = 0
+        while True:
+            end = pending.find(b"\n", max(start, searched))
+            if end < 0:
+                break
+            yield pending[start : end + 1].decode("utf-8", errors="replace")
+            start = end + 1
+        del pending[:start]
+    if pending:
+        yield pending.decode("utf-8", errors="replace")
+
+
 def main() -> None:
     """
     Main entry point for the MCP Terminal Server.
@@ -184,14 +604,56 @@ def main() -> None:
     server_group.add_argument(
         "--host",
         default="127.0.0.1",
-        help="Host to bind the server to in SSE mode (default: 127.0.0.1)",
+        help="Host to bind the server to in HTTP modes (default: 127.0.0.1)",
+    )
+    server_group.add_argument(
+        "--stateless",
+        action="store_true",
+        help="Handle streamable HTTP requests without sessions, so any request "
+        "can be served independently (file_watch needs a session)",
+    )
+    server_group.add_argument(
+        "--max-clients",
+        type=int,
+        default=DEFAULT_MAX_CONTROLLERS,
+        help="Most clients holding their own terminal controller at once in "
+        f"HTTP modes (default: {DEFAULT_MAX_CONTROLLERS})",
+    )
+    server_group.add_argument(
+        "--client-idle-ttl",
+        type=float,
+        default=DEFAULT_IDLE_TTL,
+        help="Seconds before an idle client's terminal controller is closed "
+        f"in HTTP modes (default: {DEFAULT_IDLE_TTL:g})",
+    )
+    server_group.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=1,
+        help="Number of SSE worker processes sharing the port (default: 1)",
+    )
+    server_group.add_argument(
+        "--state-dir",
+        type=str,
+        help="Directory for the shared session registry of SSE workers; "
+        "must be private to the current user (default: a per-port "
+        "directory under $XDG_RUNTIME_DIR or the system temp directory)",
     )
     server_group.add_argument(
         "--port",
         "-p",
         type=int,
         default=3000,
-        help="Port to bind the server to in SSE mode (default: 3000)",
+        help="Port to bind the server to in HTTP modes (default: 3000)",
+    )
+    server_group.add_argument(
+        "--shutdown-timeout",
+        type=float,
+        default=DEFAULT_SHUTDOWN_TIMEOUT,
+        help="Seconds from SIGTERM or SIGINT until the server has stopped; "
+        f"running commands get all but the last {SHUTDOWN_RESERVE:g} to finish "
+        f"before they are killed (default: {DEFAULT_SHUTDOWN_TIMEOUT:g})",
     )
 
     # Command filtering options
@@ -212,6 +674,133 @@ def main() -> None:
         help="Enable whitelist mode (only allow commands in whitelist)",
     )
 
+    # Admission control options
+    admission_group = parser.add_argument_group("Admission Control Options")
+    admission_group.add_argument(
+        "--max-running",
+        type=int,
+        help="Most commands running at once; more wait in a queue "
+        "(default: twice the CPU count, at least 4)",
+    )
+    admission_group.add_argument(
+        "--max-queue",
+        type=int,
+        default=DEFAULT_MAX_QUEUE,
+        help="Most commands waiting to run before new ones are rejected "
+        f"(default: {DEFAULT_MAX_QUEUE})",
+    )
+    admission_group.add_argument(
+        "--queue-timeout",
+        type=float,
+        default=DEFAULT_QUEUE_TIMEOUT,
+        help="Seconds a command may wait to run before it is rejected "
+        f"(default: {DEFAULT_QUEUE_TIMEOUT:g})",
+    )
+    admission_group.add_argument(
+        "--max-load",
+        type=float,
+        default=DEFAULT_MAX_LOAD,
+        help="1-minute load average per CPU above which commands are rejected, "
+        f"0 to ignore load (default: {DEFAULT_MAX_LOAD:g})",
+    )
+    admission_group.add_argument(
+        "--min-free-memory",
+        type=int,
+        default=DEFAULT_MIN_FREE_MEMORY // (1024 * 1024),
+        help="MiB of available memory below which commands are rejected, "
+        f"0 to ignore memory (default: {DEFAULT_MIN_FREE_MEMORY // (1024 * 1024)})",
+    )
+    admission_group.add_argument(
+        "--rate-limit",
+        type=float,
+        help="Commands per second each client may start (default: unlimited)",
+    )
+    admission_group.add_argument(
+        "--rate-burst",
+        type=float,
+        help="Commands a client may start at once before --rate-limit applies "
+        "(default: the rate limit)",
+    )
+
+    # Output options
+    output_group = parser.add_argument_group("Output Options")
+    output_group.add_argument(
+        "--inline-output-limit",
+        type=int,
+        default=DEFAULT_INLINE_LIMIT,
+        help="Characters of command output returned inline; longer outputs are "
+        "kept on the server for read_output and a preview is returned "
+        f"(default: {DEFAULT_INLINE_LIMIT})",
+    )
+    output_group.add_argument(
+        "--output-store-size",
+        type=int,
+        default=DEFAULT_STORE_SIZE // (1024 * 1024),
+        help="MiB of command output held in memory for read_output, least "
+        "recently used"
+        f" first out (default: {DEFAULT_STORE_SIZE // (1024 * 1024)})",
+    )
+    output_group.add_argument(
+        "--output-ttl",
+        type=float,
+        default=DEFAULT_OUTPUT_TTL,
+        help="Seconds a kept output stays in memory after it was last read "
+        f"(default: {DEFAULT_OUTPUT_TTL:g})",
+    )
+
+    output_group.add_argument(
+        "--artifact-dir",
+        type=str,
+        help="Directory where command outputs are kept by content digest "
+        "(default: ~/.cache/mcp-terminal/artifacts)",
+    )
+    output_group.add_argument(
+        "--artifact-store-size",
+        type=int,
+        default=DEFAULT_ARTIFACT_STORE_SIZE // (1024 * 1024),
+        help="MiB of command outputs kept on disk, least recently used first "
+        "out; 0 disables the disk store "
+        f"(default: {DEFAULT_ARTIFACT_STORE_SIZE // (1024 * 1024)})",
+    )
+
+    # History options
+    history_group = parser.add_argument_group("History Options")
+    history_group.add_argument(
+        "--history-file",
+        type=str,
+        help="SQLite database recording executed commands for history_search "
+        "(default: ~/.local/state/mcp-terminal/history.db)",
+    )
+    history_group.add_argument(
+        "--history-max-rows",
+        type=int,
+        default=DEFAULT_HISTORY_ROWS,
+        help="Most commands kept in the history, oldest deleted first; 0 turns "
+        f"the history off (default: {DEFAULT_HISTORY_ROWS})",
+    )
+    history_group.add_argument(
+        "--history-max-age",
+        type=float,
+        default=DEFAULT_HISTORY_DAYS,
+        help="Days a command is kept in the history "
+        f"(default: {DEFAULT_HISTORY_DAYS:g})",
+    )
+    history_group.add_argument(
+        "--history-max-output",
+        type=int,
+        default=DEFAULT_HISTORY_OUTPUT,
+        help="Characters of output and of error output kept per command "
+        f"(default: {DEFAULT_HISTORY_OUTPUT})",
+    )
+
+    # Administration options
+    admin_group = parser.add_argument_group("Administration Options")
+    admin_group.add_argument(
+        "--enable-profiling",
+        action="store_true",
+        help="Register the profile_event_loop and profile_memory admin tools",
+    )
+
     # Logging options
     logging_group = parser.add_argument_group("Logging Options")
     logging_group.add_argument(
@@ -221,8 +810,16 @@ def main() -> None:
         default="INFO",
         help="Logging level (default: INFO)",
     )
+    logging_group.add_argument(
+        "--log-format",
+        choices=["text", "json"],
+        default="text",
+        help="Format of log lines; json writes one object per line with the "
+        "request's correlation id (default: text)",
+    )
 
     args = parser.parse_args()
+    setup_logging(args.log_level, json_format=args.log_format == "json")
 
     # Determine controller type
     controller_type = None if args.controller == "auto" else args.controller
@@ -234,118 +831,70 @@ def main() -> None:
         )
         controller_type = "subprocess"
 
-    # Create the server
-    server = MCPTerminalServer(
+    server_kwargs = dict(
         controller_type=controller_type,
         mode=args.mode,
         host=args.host,
         port=args.port,
         log_level=args.log_level,
+        log_format=args.log_format,
         whitelist_file=args.whitelist_file,
         blacklist_file=args.blacklist_file,
         whitelist_mode=args.whitelist_mode,
+        enable_profiling=args.enable_profiling,
+        stateless=args.stateless,
+        max_clients=args.max_clients,
+        client_idle_ttl=args.client_idle_ttl,
+        admission=dict(
+            max_running=args.max_running,
+            max_queue=args.max_queue,
+            queue_timeout=args.queue_timeout,
+            max_load=args.max_load or None,
+            min_free_memory=args.min_free_memory * 1024 * 1024 or None,
+            rate=args.rate_limit,
+            burst=args.rate_burst,
+        ),
+        outputs=dict(
+            inline_limit=args.inline_output_limit,
+            max_size=args.output_store_size * 1024 * 1024,
+            ttl=args.output_ttl,
+        ),
+        artifacts=dict(
+            root=args.artifact_dir,
+            max_size=args.artifact_store_size * 1024 * 1024,
+        ),
+        history=dict(
+            path=args.history_file,
+            max_rows=args.history_max_rows,
+            max_days=args.history_max_age,
+            max_output=args.history_max_output,
+        ),
+        shutdown_timeout=args.shutdown_timeout,
     )
 
-    # Run the server
-    loop = asyncio.get_event_loop()
-    shutdown_in_progress = False
+    # Several SSE workers are run by a supervisor process instead
+    if args.workers > 1:
+        if args.mode != ServerMode.SSE.value:
+            parser.error("--workers requires --mode sse")
+        from mcp_terminal.workers import run_workers
 
-    # Define a shutdown handler that ensures we only run shutdown once
-    async def handle_shutdown():
-        nonlocal shutdown_in_progress
-        if shutdown_in_progress:
-            logger.info("Shutdown already in progress, ignoring additional signal")
-            return
-
-        shutdown_in_progress = True
-        await shutdown(loop, server)
+        server_kwargs["state_dir"] = args.state_dir
+        sys.exit(run_workers(args.workers, server_kwargs))
 
+    # Create and run the server
+    server = MCPTerminalServer(**server_kwargs)
+    status = 0
     try:
-        # Set up signal handlers for graceful shutdown
-        if (
-            sys.platform != "win32"
-        ):  # Windows doesn't support SIGTERM/SIGINT handling in the same way
-            for signal_name in ["SIGTERM", "SIGINT"]:
-                loop.add_signal_handler(
-                    getattr(signal, signal_name),
-                    lambda: asyncio.create_task(handle_shutdown()),
-                )
-
-        # Run the server
-        loop.run_until_complete(server.start())
+        asyncio.run(server.serve())
     except KeyboardInterrupt:
+        # Only reached where signals are not handled by serve()
         logger.info("Received keyboard interrupt")
-        # Handle KeyboardInterrupt manually by running the shutdown coroutine
-        if not shutdown_in_progress:
-            try:
-                # Make sure we properly shut down even if interrupted
-                loop.run_until_complete(handle_shutdown())
-            except Exception as e:
-                logger.error(f"Error during shutdown after keyboard interrupt: {e}")
     except Exception as e:
         logger.error(f"Error during server execution: {e}", exc_info=True)
-    finally:
-        logger.info("Server shutting down")
-
-        # Close the event loop
-        try:
-            # Gather any remaining tasks
-            pending = asyncio.all_tasks(loop)
-            if pending:
-                # Cancel all remaining tasks
-                for task in pending:
-                    task.cancel()
-
-                # Use a separate try/except block to avoid suppressing the original exception
-                try:
-                    # Wait for a short time for tasks to cancel
-                    loop.run_until_complete(asyncio.wait(pending, timeout=0.5))
-                except (asyncio.CancelledError, RuntimeError):
-                    # Ignore cancelled errors and "Event loop stopped before Future completed"
-                    pass
-        except Exception as e:
-            logger.error(f"Error during final cleanup: {e}")
-        finally:
-            # Close the event loop
-            try:
-                loop.close()
-            except Exception as e:
-                logger.error(f"Error closing event loop: {e}")
-
-        # Exit with a success code
-        sys.exit(0)
-
-
-async def shutdown(loop, server):
-    """Handle graceful shutdown."""
-    logger.info("Shutdown signal received")
-
-    # Give pending tasks a chance to complete
-    await asyncio.sleep(0.2)
-
-    # Perform cleanup
-    await server.cleanup()
-
-    # Cancel all running tasks
-    tasks = [t for t in asyncio.all_tasks(loop) if t is not asyncio.current_task()]
-    if tasks:
-        logger.info(f"Cancelling {len(tasks)} pending tasks")
-        for task in tasks:
-            task.cancel()
-
-        # Wait for tasks to cancel with a timeout
-        try:
-            await asyncio.wait_for(
-                asyncio.gather(*tasks, return_exceptions=True),
-                timeout=3.0,  # Increased timeout
-            )
-        except asyncio.TimeoutError:
-            logger.warning("Some tasks did not cancel within the timeout period")
-        except Exception as e:
-            logger.warning(f"Error during task cancellation: {e}")
-
-    # Stop the loop
-    loop.stop()
+        status = 1
+    logger.info("Server shut down")
+    stop_logging()
+    sys.exit(status)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,59 @@
+"""
+Per-client keys for MCP sessions.
+State kept for a client, such as its controller, rate limit or file watches,
+is stored under a key handed out for its session rather than under the
+session itself, so it does not keep a closed session alive. The key is
+found through a weak reference to the session and is never handed out
+again, and the state is dropped once the session has been collected.
+"""
+
+import asyncio
+import uuid
+import weakref
+from typing import Any, Callable
+
+
+class ClientKeys:
+    """
+    Hands out a key per MCP session and reports sessions that are gone.
+    """
+
+    def __init__(self, on_disconnect: Callable[[str], None]):
+        """
+        Initialize the keys.
+
+        Args:
+            on_disconnect: Called on the event loop with a session's key once
+                           the session has been garbage collected
+        """
+        self.on_disconnect = on_disconnect
+        self._keys: "weakref.WeakKeyDictionary[Any, str]" = weakref.WeakKeyDictionary()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def key(self, session: Any) -> str:
+        """
+        Key of a session, assigned on first use.
+
+        Must be called on the event loop on_disconnect should run on.
+
+        Args:
+            session: The client's MCP session
+        """
+        key = self._keys.get(session)
+        if key is None:
+            key = self._keys[session] = uuid.uuid4().hex
+            weakref.finalize(
+                session, self._disconnected, asyncio.get_running_loop(), key
+            )
+        return key
+
+    def _disconnected(self, loop: asyncio.AbstractEventLoop, key: str) -> None:
+        """Hand a collected session's key to on_disconnect on its loop."""
+        # The garbage collector may run this in any thread
+        try:
+            loop.call_soon_threadsafe(self.on_disconnect, key)
+        except RuntimeError:
+            # The event loop has already shut down
+            pass
@@ -1,6 +1,27 @@
 """MCP Terminal tools package."""
 
-from .file import FileOperationResponse, FileTool, WriteMode
-from .terminal import TerminalTool
+import importlib
 
-__all__ = ["FileTool", "WriteMode", "FileOperationResponse", "TerminalTool"]
+# Exported name -> module, imported on first access so that loading one tool
+# module does not import the others
+_LAZY_EXPORTS = {
+    "FileTool": ".file",
+    "WriteMode": ".file",
+    "FileOperationResponse": ".file",
+    "FileReadResponse": ".file",
+    "TerminalTool": ".terminal",
+}
+
+__all__ = [
+    "FileTool",
+    "WriteMode",
+    "FileOperationResponse",
+    "FileReadResponse",
+    "TerminalTool",
+]
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        return getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
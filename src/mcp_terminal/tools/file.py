@@ -5,20 +5,82 @@ File tool for MCP.
 Provides file operations through the MCP interface.
 """
 
+import base64
+import hashlib
 import logging
+import mmap
 import os
+import re
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from enum import Enum
-from typing import Any, Dict, Optional
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    BinaryIO,
+    Dict,
+    Hashable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
 
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
 from pydantic import BaseModel, Field
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+from mcp_terminal.files.atomic import (
+    AtomicFile,
+    commit_files,
+    splice_file,
+    splice_ranges,
+)
+from mcp_terminal.files.content_cache import DEFAULT_CACHE_BYTES, ContentCache
+from mcp_terminal.files.executor import PathLockedExecutor, default_workers
+from mcp_terminal.files.line_index import Buffer, LineIndex, LineIndexCache
+from mcp_terminal.files.listing import (
+    DirectoryCache,
+    entry_path,
+    format_mode,
+    is_hidden,
+)
+from mcp_terminal.files.patch import (
+    parse_unified_diff,
+    resolve_hunks,
+    resolve_search_replace,
 )
+from mcp_terminal.files.search import compile_include, search_files, walk_files
+from mcp_terminal.files.transfer import MAX_CHUNK_SIZE, UploadRegistry
+from mcp_terminal.sessions import ClientKeys
+
+# Archives, copies, hashing and watches pull in tarfile, zipfile and ctypes,
+# so their modules are imported on first use to keep start-up fast
+if TYPE_CHECKING:
+    from mcp_terminal.files.hashing import DigestCache
+    from mcp_terminal.files.watch import WatchCallback, WatchManager
+
 logger = logging.getLogger("MCP:Terminal:FileTool")
 
+# Files at least this large are memory-mapped and get a cached line index
+MMAP_THRESHOLD = 1024 * 1024
+
+# Default cap on the amount of content returned by a single read
+DEFAULT_READ_LIMIT = 1024 * 1024
+
+# Default chunk size of file_download
+DEFAULT_DOWNLOAD_CHUNK = 1024 * 1024
+
+# Upper bound on the page size of file_search
+MAX_SEARCH_RESULTS = 1000
+
+# Upper bound on the number of entries returned by file_list
+MAX_LIST_ENTRIES = 5000
+
+# Upper bound on the number of files hashed by one file_hash call
+MAX_HASH_FILES = 10000
+
 
 class WriteMode(str, Enum):
     """Enum representing different file writing modes."""
@@ -26,6 +88,15 @@ class WriteMode(str, Enum):
     OVERWRITE = "overwrite"  # Overwrite the entire file
     APPEND = "append"  # Append to the end of the file
     INSERT = "insert"  # Insert at a specific position
+    REPLACE = "replace"  # Replace a range of lines
+    DELETE = "delete"  # Delete a range of lines
+
+
+class ArchiveAction(str, Enum):
+    """Enum representing file_archive actions."""
+
+    CREATE = "create"  # Pack paths into a new archive
+    EXTRACT = "extract"  # Unpack an archive into a directory
 
 
 class FileOperationResponse(BaseModel):
@@ -41,6 +112,259 @@ class FileOperationResponse(BaseModel):
     )
 
 
+class FileReadResponse(BaseModel):
+    """Response model for ranged file reads."""
+
+    success: bool = Field(..., description="Whether the read was successful")
+    error: Optional[str] = Field(None, description="Error message if the read failed")
+    filepath: str = Field(..., description="Path to the file that was read")
+    content: Optional[str] = Field(None, description="The content that was read")
+    offset: Optional[int] = Field(
+        None, description="Byte offset where the returned content starts"
+    )
+    length: Optional[int] = Field(
+        None, description="Number of bytes of content returned"
+    )
+    start_line: Optional[int] = Field(
+        None, description="First line returned (1-based) for line range reads"
+    )
+    end_line: Optional[int] = Field(
+        None, description="Last line returned (1-based) for line range reads"
+    )
+    file_size: Optional[int] = Field(None, description="Total file size in bytes")
+    total_lines: Optional[int] = Field(
+        None, description="Total number of lines in the file, if known"
+    )
+    truncated: bool = Field(
+        False, description="Whether the content was cut short by max_bytes"
+    )
+
+
+class SearchReplaceEdit(BaseModel):
+    """An exact search/replace edit for file_patch."""
+
+    search: str = Field(
+        ..., description="Exact text to find; must occur exactly once in the file"
+    )
+    replace: str = Field(..., description="Text to put in place of the search text")
+
+
+class PatchHunkResult(BaseModel):
+    """Outcome of a single hunk or edit of a patch."""
+
+    index: int = Field(..., description="1-based position of the hunk in the patch")
+    applied: bool = Field(..., description="Whether the hunk matched the file")
+    line: Optional[int] = Field(
+        None, description="Line of the original file where the hunk matched"
+    )
+    offset: int = Field(
+        0, description="Lines the hunk moved relative to its diff header"
+    )
+    fuzz: int = Field(
+        0, description="Number of context lines ignored to make the hunk match"
+    )
+    error: Optional[str] = Field(None, description="Why the hunk did not match")
+
+
+class FilePatchResponse(BaseModel):
+    """Response model for file_patch."""
+
+    success: bool = Field(..., description="Whether the whole patch was applied")
+    error: Optional[str] = Field(
+        None, description="Error message if the patch was not applied"
+    )
+    filepath: str = Field(..., description="Path to the file that was patched")
+    hunks: List[PatchHunkResult] = Field(
+        default_factory=list, description="Per-hunk results"
+    )
+    dry_run: bool = Field(False, description="Whether the file was left untouched")
+    size: Optional[int] = Field(None, description="Size of the patched file in bytes")
+
+
+class BatchWriteEntry(BaseModel):
+    """A single file write within file_batch."""
+
+    filepath: str = Field(..., description="Path to the file to write")
+    content: str = Field(..., description="Full new content of the file")
+
+
+class FileBatchResponse(BaseModel):
+    """Response model for file_batch."""
+
+    success: bool = Field(..., description="Whether all files were written")
+    error: Optional[str] = Field(
+        None, description="Error message if the batch was rolled back"
+    )
+    filepaths: List[str] = Field(
+        default_factory=list, description="Paths of the files in the batch"
+    )
+    bytes_written: int = Field(0, description="Total number of bytes written")
+
+
+class FileUploadResponse(BaseModel):
+    """Response model for the chunked upload tools."""
+
+    success: bool = Field(..., description="Whether the operation was successful")
+    error: Optional[str] = Field(
+        None, description="Error message if the operation failed"
+    )
+    upload_id: Optional[str] = Field(None, description="Id of the upload")
+    filepath: Optional[str] = Field(None, description="Target file of the upload")
+    offset: Optional[int] = Field(
+        None, description="Bytes received so far; the next chunk starts here"
+    )
+    size: Optional[int] = Field(None, description="Declared total size in bytes")
+    sha256: Optional[str] = Field(
+        None, description="SHA-256 of the whole file, once committed"
+    )
+    committed: bool = Field(False, description="Whether the file is in place")
+
+
+class FileDownloadResponse(BaseModel):
+    """Response model for file_download."""
+
+    success: bool = Field(..., description="Whether the read was successful")
+    error: Optional[str] = Field(None, description="Error message if the read failed")
+    filepath: str = Field(..., description="Path to the file that was read")
+    data: Optional[str] = Field(None, description="Base64-encoded chunk content")
+    offset: Optional[int] = Field(None, description="Byte offset of the chunk")
+    length: Optional[int] = Field(None, description="Chunk length in bytes")
+    sha256: Optional[str] = Field(None, description="SHA-256 of the chunk")
+    file_size: Optional[int] = Field(None, description="Total file size in bytes")
+    next_offset: Optional[int] = Field(
+        None, description="Offset of the next chunk, if the file continues"
+    )
+    version: Optional[str] = Field(
+        None,
+        description="Token identifying this version of the file; pass it back "
+        "to make later chunks fail if the file changes",
+    )
+
+
+class SearchMatch(BaseModel):
+    """A single file_search result."""
+
+    path: str = Field(..., description="File path relative to the search root")
+    line: Optional[int] = Field(None, description="Line number of the match")
+    column: Optional[int] = Field(None, description="Column of the match")
+    text: Optional[str] = Field(None, description="The matching line")
+
+
+class FileSearchResponse(BaseModel):
+    """Response model for file_search."""
+
+    success: bool = Field(..., description="Whether the search was successful")
+    error: Optional[str] = Field(None, description="Error message if the search failed")
+    root: str = Field(..., description="Directory that was searched")
+    matches: List[SearchMatch] = Field(
+        default_factory=list, description="Matches on this page"
+    )
+    offset: int = Field(0, description="Number of matches skipped before this page")
+    next_offset: Optional[int] = Field(
+        None, description="Offset of the next page, if there are more matches"
+    )
+
+
+class FileDigest(BaseModel):
+    """A single file_hash result."""
+
+    path: str = Field(..., description="Path of the file")
+    digest: Optional[str] = Field(None, description="Hex digest of the content")
+    size: Optional[int] = Field(None, description="Size in bytes")
+    cached: bool = Field(
+        False, description="Whether the digest was reused from an earlier hash"
+    )
+    matches: Optional[bool] = Field(
+        None, description="Whether the digest equals the expected one, if given"
+    )
+    error: Optional[str] = Field(None, description="Why the file was not hashed")
+
+
+class FileHashResponse(BaseModel):
+    """Response model for file_hash."""
+
+    success: bool = Field(..., description="Whether the hashing was successful")
+    error: Optional[str] = Field(
+        None, description="Error message if the hashing failed"
+    )
+    algorithm: str = Field(..., description="Hash algorithm that was used")
+    files: List[FileDigest] = Field(
+        default_factory=list, description="Digests in the order the files were given"
+    )
+    verified: Optional[bool] = Field(
+        None,
+        description="Whether every expected digest matched, if any were given",
+    )
+    truncated: bool = Field(
+        False, description="Whether files were omitted because of the limit"
+    )
+
+
+class FileWatchResponse(BaseModel):
+    """Response model for file_watch and file_unwatch."""
+
+    success: bool = Field(..., description="Whether the operation was successful")
+    error: Optional[str] = Field(
+        None, description="Error message if the operation failed"
+    )
+    watch_id: Optional[str] = Field(None, description="Id of the watch")
+    path: Optional[str] = Field(None, description="Directory being watched")
+    backend: Optional[str] = Field(
+        None, description="How changes are detected: inotify or polling"
+    )
+    active_watches: int = Field(
+        0, description="Number of watches the client holds afterwards"
+    )
+
+
+class FileCopyResponse(BaseModel):
+    """Response model for file_copy, file_move and file_archive."""
+
+    success: bool = Field(..., description="Whether the operation was successful")
+    error: Optional[str] = Field(
+        None, description="Error message if the operation failed"
+    )
+    source: str = Field(..., description="Path that was copied, moved or read")
+    destination: Optional[str] = Field(None, description="Path that was written")
+    method: Optional[str] = Field(
+        None,
+        description="How data was transferred: rename, copy_file_range, "
+        "sendfile, read_write, tar or zip",
+    )
+    files: int = Field(0, description="Number of entries transferred")
+    bytes_transferred: int = Field(0, description="Bytes of file data transferred")
+    elapsed: float = Field(0.0, description="Duration in seconds")
+    throughput: Optional[float] = Field(
+        None, description="Bytes of file data transferred per second"
+    )
+
+
+class FileEntry(BaseModel):
+    """A single file_list entry."""
+
+    path: str = Field(..., description="Path relative to the listed directory")
+    type: str = Field(..., description="Entry type: file, directory, symlink or other")
+    size: int = Field(..., description="Size in bytes")
+    mtime: float = Field(..., description="Modification time as a Unix timestamp")
+    mode: str = Field(..., description="Permissions as shown by ls -l")
+
+
+class FileListResponse(BaseModel):
+    """Response model for file_list."""
+
+    success: bool = Field(..., description="Whether the listing was successful")
+    error: Optional[str] = Field(
+        None, description="Error message if the listing failed"
+    )
+    root: str = Field(..., description="Directory that was listed")
+    entries: List[FileEntry] = Field(
+        default_factory=list, description="Entries grouped by directory, in name order"
+    )
+    truncated: bool = Field(
+        False, description="Whether entries were omitted because of the limit"
+    )
+
+
 class FileTool:
     """
     MCP tool for file operations.
@@ -51,70 +375,1567 @@ class FileTool:
 
     name = "file"
 
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        cache_bytes: int = DEFAULT_CACHE_BYTES,
+    ):
+        """
+        Initialize the file tool.
+
+        Args:
+            max_workers: Size of the thread pool used for disk I/O
+            cache_bytes: Memory budget for cached file contents
+        """
+        # Contents of small files, shared by reads, edits and patches
+        self.contents = ContentCache(cache_bytes)
+        self.line_indexes = LineIndexCache()
+        self._digests: Optional["DigestCache"] = None
+        self.uploads = UploadRegistry()
+        self._watches: Optional["WatchManager"] = None
+        # Watches are keyed by client and dropped when it disconnects
+        self.watch_clients = ClientKeys(self._watch_client_gone)
+        self.directories = DirectoryCache()
+        # Blocking file operations run here instead of on the event loop
+        self.io = PathLockedExecutor(max_workers)
+        # Content searches and hashing fan out to their own pool so a call
+        # running on self.io never waits for a slot it is itself occupying
+        self.search_workers = max_workers or default_workers()
+        self._search_pool: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def digests(self) -> "DigestCache":
+        """Digest cache of file_hash, created on first use."""
+        if self._digests is None:
+            from mcp_terminal.files.hashing import DigestCache
+
+            self._digests = DigestCache()
+        return self._digests
+
+    @property
+    def watches(self) -> "WatchManager":
+        """Watch manager of file_watch, created on first use."""
+        if self._watches is None:
+            from mcp_terminal.files.watch import WatchManager
+
+            self._watches = WatchManager()
+        return self._watches
+
+    @watches.setter
+    def watches(self, manager: "WatchManager") -> None:
+        self._watches = manager
+
+    async def cleanup(self) -> None:
+        """
+        Clean up resources.
+        """
+        if self._watches is not None:
+            await self._watches.close()
+        self.io.shutdown()
+        self.uploads.clear()
+        if self._search_pool is not None:
+            self._search_pool.shutdown(wait=True)
+            self._search_pool = None
+
+    def read_file(
+        self,
+        filepath: str,
+        start_line: Optional[int] = None,
+        end_line: Optional[int] = None,
+        offset: Optional[int] = None,
+        length: Optional[int] = None,
+        max_bytes: int = DEFAULT_READ_LIMIT,
+    ) -> FileReadResponse:
+        """
+        Read part of a file by line range or byte range.
+
+        Line ranges are 1-based and inclusive. Byte ranges start at ``offset``
+        and span ``length`` bytes. If no range is given the file is read from
+        the start. At most ``max_bytes`` bytes of content are returned.
+
+        Args:
+            filepath: Path to the file
+            start_line: First line to read (1-based)
+            end_line: Last line to read (inclusive), defaults to end of file
+            offset: Byte offset to start reading from
+            length: Number of bytes to read, defaults to end of file
+            max_bytes: Maximum number of bytes to return
+
+        Returns:
+            A FileReadResponse with the content that was read
+        """
+        try:
+            line_mode = start_line is not None or end_line is not None
+            if line_mode and (offset is not None or length is not None):
+                raise ValueError(
+                    "Specify either a line range or a byte range, not both"
+                )
+            if max_bytes <= 0:
+                raise ValueError("max_bytes must be positive")
+
+            path = os.path.realpath(filepath)
+            with open(path, "rb") as f:
+                st = os.fstat(f.fileno())
+                if line_mode:
+                    return self._read_lines(
+                        filepath, path, f, st, start_line or 1, end_line, max_bytes
+                    )
+                return self._read_bytes(
+                    filepath, path, f, st, offset or 0, length, max_bytes
+                )
+
+        except Exception as e:
+            logger.error(f"Error reading file {filepath}: {e}")
+            return FileReadResponse(
+                success=False, error=f"Error reading file: {str(e)}", filepath=filepath
+            )
+
+    def _read_bytes(
+        self,
+        filepath: str,
+        path: str,
+        f,
+        st: os.stat_result,
+        offset: int,
+        length: Optional[int],
+        max_bytes: int,
+    ) -> FileReadResponse:
+        """Read a byte range from an open file."""
+        if offset < 0 or (length is not None and length < 0):
+            raise ValueError("offset and length must not be negative")
+
+        available = max(st.st_size - offset, 0)
+        wanted = available if length is None else min(length, available)
+        count = min(wanted, max_bytes)
+
+        if st.st_size >= MMAP_THRESHOLD:
+            f.seek(offset)
+            data = f.read(count)
+            text = data.decode("utf-8", errors="replace")
+        elif offset == 0 and count == st.st_size:
+            # Whole-file reads reuse the decoded text as well
+            data = self._load(path, f, st)
+            text = self.contents.get_text(path, st)
+            if text is None:
+                text = data.decode("utf-8", errors="replace")
+        else:
+            data = self._load(path, f, st)[offset : offset + count]
+            text = data.decode("utf-8", errors="replace")
+
+        return FileReadResponse(
+            success=True,
+            filepath=filepath,
+            content=text,
+            offset=offset,
+            length=len(data),
+            file_size=st.st_size,
+            truncated=wanted > max_bytes,
+        )
+
+    def _read_lines(
+        self,
+        filepath: str,
+        path: str,
+        f,
+        st: os.stat_result,
+        start_line: int,
+        end_line: Optional[int],
+        max_bytes: int,
+    ) -> FileReadResponse:
+        """Read a line range from an open file using a line offset index."""
+        if start_line < 1:
+            raise ValueError("start_line must be at least 1")
+        if end_line is not None and end_line < start_line:
+            raise ValueError("end_line must not be less than start_line")
+
+        with self._line_view(path, f, st) as (buf, index):
+            begin = index.line_offset(buf, start_line - 1)
+            if begin is None:
+                begin = st.st_size
+                stop = st.st_size
+            else:
+                stop = None
+                if end_line is not None:
+                    stop = index.line_offset(buf, end_line)
+                if stop is None:
+                    stop = st.st_size
+
+            data = buf[begin : min(stop, begin + max_bytes)]
+            truncated = stop - begin > max_bytes
+            if truncated and b"\n" in data:
+                # Don't return a partial trailing line
+                data = data[: data.rfind(b"\n") + 1]
+
+            lines = data.count(b"\n")
+            if data and not data.endswith(b"\n"):
+                lines += 1
+
+            return FileReadResponse(
+                success=True,
+                filepath=filepath,
+                content=data.decode("utf-8", errors="replace"),
+                offset=begin,
+                length=len(data),
+                start_line=start_line,
+                end_line=start_line + lines - 1 if lines else None,
+                file_size=st.st_size,
+                total_lines=index.known_total_lines,
+                truncated=truncated,
+            )
+
+    @contextmanager
+    def _line_view(
+        self, path: str, f: BinaryIO, st: os.stat_result
+    ) -> Iterator[Tuple[Buffer, LineIndex]]:
+        """
+        Provide the contents of an open file together with a line index.
+
+        Large files are memory-mapped and share a cached index; small files
+        come from the content cache and are indexed on the fly.
+        """
+        if st.st_size >= MMAP_THRESHOLD:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                yield buf, self.line_indexes.get(path, st)
+            finally:
+                buf.close()
+        else:
+            yield self._load(path, f, st), LineIndex(
+                st.st_size, st.st_mtime_ns, st.st_ino
+            )
+
+    def _load(self, path: str, f: BinaryIO, st: os.stat_result) -> bytes:
+        """Get the whole content of an open file, from the cache if possible."""
+        data = self.contents.get(path, st)
+        if data is None:
+            f.seek(0)
+            data = f.read()
+            if len(data) == st.st_size:
+                self.contents.put(path, st, data)
+        return data
+
+    def modify_file(
+        self,
+        filepath: str,
+        content: str = "",
+        mode: WriteMode = WriteMode.OVERWRITE,
+        position: Optional[int] = None,
+        line: Optional[int] = None,
+        end_line: Optional[int] = None,
+        create_dirs: bool = True,
+    ) -> FileOperationResponse:
+        """
+        Write content to a file.
+
+        OVERWRITE, INSERT, REPLACE and DELETE stream the result into a
+        temporary file that is atomically renamed over the original, so
+        memory use does not grow with the file size and a failed write never
+        leaves a partially written file behind.
+
+        Args:
+            filepath: Path to the file
+            content: Content to write
+            mode: How the content is written
+            position: Byte offset for INSERT mode
+            line: Line number (1-based) for INSERT, REPLACE and DELETE modes;
+                  INSERT places the content before this line
+            end_line: Last line (inclusive) affected by REPLACE and DELETE,
+                      defaults to ``line``
+            create_dirs: Whether to create missing parent directories
+
+        Returns:
+            A FileOperationResponse describing the result
+        """
+        try:
+            # Create directories if they don't exist
+            if create_dirs:
+                directory = os.path.dirname(filepath)
+                if directory and not os.path.exists(directory):
+                    os.makedirs(directory)
+
+            # Handle different write modes
+            details: Dict[str, Any] = {"mode": mode}
+            data = content.encode("utf-8")
+
+            if mode in (WriteMode.INSERT, WriteMode.REPLACE, WriteMode.DELETE):
+                if mode == WriteMode.DELETE:
+                    data = b""
+                start, end, data = self._resolve_range(
+                    filepath, mode, data, position, line, end_line
+                )
+                details["position"] = start
+                if line is not None:
+                    details["line"] = line
+                if mode != WriteMode.INSERT:
+                    details["end_line"] = end_line or line
+                    details["bytes_removed"] = end - start
+                details["size"] = splice_file(filepath, start, end, data)
+
+            elif mode == WriteMode.APPEND:
+                # Append to file
+                with open(filepath, "ab") as f:
+                    f.write(data)
+
+            else:  # OVERWRITE
+                with AtomicFile(filepath) as f:
+                    f.write(data)
+
+            self._file_changed(filepath)
+            return FileOperationResponse(
+                success=True, filepath=filepath, details=details
+            )
+
+        except Exception as e:
+            logger.error(f"Error writing to file {filepath}: {e}")
+            return FileOperationResponse(
+                success=False,
+                error=f"Error writing to file: {str(e)}",
+                filepath=filepath,
+            )
+
+    def _resolve_range(
+        self,
+        filepath: str,
+        mode: WriteMode,
+        data: bytes,
+        position: Optional[int],
+        line: Optional[int],
+        end_line: Optional[int],
+    ) -> Tuple[int, int, bytes]:
+        """
+        Translate a position or line range into the byte range to replace.
+
+        Content written by line is treated as whole lines, so a missing
+        trailing newline is added where it would otherwise join two lines.
+
+        Returns:
+            Tuple of (start offset, end offset, data to write)
+        """
+        if mode == WriteMode.INSERT and line is None and position is None:
+            raise ValueError(
+                "Position or line must be specified when using INSERT mode"
+            )
+        if mode != WriteMode.INSERT and line is None:
+            raise ValueError(f"Line must be specified when using {mode.value} mode")
+        if line is not None and line < 1:
+            raise ValueError("Line numbers start at 1")
+        if position is not None and position < 0:
+            raise ValueError("Position must not be negative")
+        if end_line is not None and line is not None and end_line < line:
+            raise ValueError("end_line must not be less than line")
+
+        path = os.path.realpath(filepath)
+        if not os.path.exists(path):
+            if mode != WriteMode.INSERT:
+                raise FileNotFoundError(f"No such file: {filepath}")
+            return 0, 0, data
+
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+
+            if line is None:
+                start = min(position, st.st_size)
+                f.seek(start)
+                following = f.read(1)
+                if following and 0x80 <= following[0] < 0xC0:
+                    raise ValueError(
+                        f"Position {position} falls inside a multi-byte character"
+                    )
+                return start, start, data
+
+            with self._line_view(path, f, st) as (buf, index):
+                start = index.line_offset(buf, line - 1)
+
+                if mode == WriteMode.INSERT:
+                    if start is None:
+                        # Inserting after the last line
+                        start = st.st_size
+                        if start and buf[start - 1 : start] != b"\n":
+                            data = b"\n" + data
+                    elif data and not data.endswith(b"\n"):
+                        data += b"\n"
+                    return start, start, data
+
+                if start is None:
+                    raise ValueError(f"Line {line} is beyond the end of the file")
+                end = index.line_offset(buf, end_line or line)
+                if end is None:
+                    end = st.st_size
+                if data and not data.endswith(b"\n") and buf[end - 1 : end] == b"\n":
+                    data += b"\n"
+                return start, end, data
+
+    def patch_file(
+        self,
+        filepath: str,
+        diff: Optional[str] = None,
+        edits: Optional[List[SearchReplaceEdit]] = None,
+        max_fuzz: int = 2,
+        dry_run: bool = False,
+    ) -> FilePatchResponse:
+        """
+        Apply a unified diff or a list of search/replace edits to a file.
+
+        All hunks are located in the original file first; if any of them
+        does not match, nothing is written. Otherwise every hunk is applied
+        in one streaming pass into a temporary file that replaces the
+        original atomically.
+
+        Args:
+            filepath: Path to the file
+            diff: Unified diff for this file
+            edits: Exact search/replace edits
+            max_fuzz: Maximum context lines a diff hunk may ignore to match
+            dry_run: Only check whether the patch applies
+
+        Returns:
+            A FilePatchResponse with per-hunk results
+        """
+        try:
+            if (diff is None) == (edits is None):
+                raise ValueError("Specify either diff or edits")
+
+            path = os.path.realpath(filepath)
+            content = b""
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    content = self._load(path, f, os.fstat(f.fileno()))
+
+            if diff is not None:
+                ranges, results = resolve_hunks(
+                    content, parse_unified_diff(diff), max_fuzz
+                )
+            else:
+                ranges, results = resolve_search_replace(
+                    content, [(edit.search, edit.replace) for edit in edits]
+                )
+
+            hunks = [PatchHunkResult(**vars(result)) for result in results]
+            failed = [hunk for hunk in hunks if not hunk.applied]
+            if failed:
+                return FilePatchResponse(
+                    success=False,
+                    error=f"{len(failed)} of {len(hunks)} hunks failed to apply",
+                    filepath=filepath,
+                    hunks=hunks,
+                    dry_run=dry_run,
+                )
+
+            size = None
+            if not dry_run:
+                size = splice_ranges(path, ranges)
+                self._file_changed(filepath)
+
+            return FilePatchResponse(
+                success=True,
+                filepath=filepath,
+                hunks=hunks,
+                dry_run=dry_run,
+                size=size,
+            )
+
+        except Exception as e:
+            logger.error(f"Error patching file {filepath}: {e}")
+            return FilePatchResponse(
+                success=False, error=f"Error patching file: {str(e)}", filepath=filepath
+            )
+
+    def batch_write(
+        self, files: List[BatchWriteEntry], create_dirs: bool = True
+    ) -> FileBatchResponse:
+        """
+        Write several files as one all-or-nothing operation.
+
+        Args:
+            files: Files to write
+            create_dirs: Whether to create missing parent directories
+
+        Returns:
+            A FileBatchResponse describing the result
+        """
+        filepaths = [entry.filepath for entry in files]
+        try:
+            if not files:
+                raise ValueError("The batch contains no files")
+
+            if create_dirs:
+                for directory in {os.path.dirname(path) for path in filepaths}:
+                    if directory and not os.path.exists(directory):
+                        os.makedirs(directory)
+
+            sizes = commit_files(
+                [(entry.filepath, entry.content.encode("utf-8")) for entry in files]
+            )
+            for path in filepaths:
+                self._file_changed(path)
+            return FileBatchResponse(
+                success=True, filepaths=filepaths, bytes_written=sum(sizes)
+            )
+
+        except Exception as e:
+            logger.error(f"Error writing file batch: {e}")
+            return FileBatchResponse(
+                success=False,
+                error=f"Error writing file batch, no files were changed: {str(e)}",
+                filepaths=filepaths,
+            )
+
+    def begin_upload(
+        self,
+        filepath: str,
+        size: Optional[int] = None,
+        create_dirs: bool = True,
+        resume: bool = True,
+    ) -> FileUploadResponse:
+        """
+        Start a chunked upload, or look up the one in progress for filepath.
+
+        Chunks are staged in a temporary file next to the target, which only
+        replaces the target on commit. Calling this again for the same file
+        returns the existing upload and the offset to resume from.
+
+        Args:
+            filepath: Path to the file to write
+            size: Expected total size in bytes, checked on commit
+            create_dirs: Whether to create missing parent directories
+            resume: Whether to continue an upload already in progress
+
+        Returns:
+            A FileUploadResponse with the upload id and the resume offset
+        """
+        try:
+            if size is not None and size < 0:
+                raise ValueError("size must not be negative")
+            if create_dirs:
+                directory = os.path.dirname(filepath)
+                if directory and not os.path.exists(directory):
+                    os.makedirs(directory)
+
+            upload = self.uploads.begin(filepath, size, resume)
+            return FileUploadResponse(
+                success=True,
+                upload_id=upload.id,
+                filepath=filepath,
+                offset=upload.received,
+                size=upload.size,
+            )
+
+        except Exception as e:
+            logger.error(f"Error starting upload to {filepath}: {e}")
+            return FileUploadResponse(
+                success=False,
+                error=f"Error starting upload: {str(e)}",
+                filepath=filepath,
+            )
+
+    def upload_chunk(
+        self, upload_id: str, offset: int, data: str, sha256: Optional[str] = None
+    ) -> FileUploadResponse:
+        """
+        Append a base64-encoded chunk to an upload.
+
+        Args:
+            upload_id: Id returned by begin_upload
+            offset: Byte offset of the chunk; must equal the acknowledged offset
+            data: Base64-encoded chunk content
+            sha256: Optional SHA-256 hex digest of the decoded chunk
+
+        Returns:
+            A FileUploadResponse with the new acknowledged offset
+        """
+        upload = None
+        try:
+            upload = self.uploads.get(upload_id)
+            chunk = base64.b64decode(data, validate=True)
+            if len(chunk) > MAX_CHUNK_SIZE:
+                raise ValueError(f"Chunks are limited to {MAX_CHUNK_SIZE} bytes")
+            if sha256 is not None and hashlib.sha256(chunk).hexdigest() != sha256:
+                raise ValueError("Chunk checksum mismatch")
+
+            upload.write(offset, chunk)
+            return FileUploadResponse(
+                success=True,
+                upload_id=upload_id,
+                filepath=upload.path,
+                offset=upload.received,
+                size=upload.size,
+            )
+
+        except Exception as e:
+            logger.error(f"Error uploading chunk to {upload_id}: {e}")
+            return FileUploadResponse(
+                success=False,
+                error=f"Error uploading chunk: {str(e)}",
+                upload_id=upload_id,
+                filepath=upload.path if upload else None,
+                offset=upload.received if upload else None,
+                size=upload.size if upload else None,
+            )
+
+    def commit_upload(
+        self, upload_id: str, sha256: Optional[str] = None
+    ) -> FileUploadResponse:
+        """
+        Move a completed upload into place.
+
+        Args:
+            upload_id: Id returned by begin_upload
+            sha256: Optional SHA-256 hex digest of the whole file
+
+        Returns:
+            A FileUploadResponse with the digest of the written file
+        """
+        upload = None
+        try:
+            upload = self.uploads.get(upload_id)
+            digest = upload.digest.hexdigest()
+            if sha256 is not None and digest != sha256:
+                raise ValueError("File checksum mismatch")
+
+            upload.commit()
+            self.uploads.finish(upload_id)
+            self._file_changed(upload.path)
+            return FileUploadResponse(
+                success=True,
+                upload_id=upload_id,
+                filepath=upload.path,
+                offset=upload.received,
+                size=upload.received,
+                sha256=digest,
+                committed=True,
+            )
+
+        except Exception as e:
+            logger.error(f"Error committing upload {upload_id}: {e}")
+            return FileUploadResponse(
+                success=False,
+                error=f"Error committing upload: {str(e)}",
+                upload_id=upload_id,
+                filepath=upload.path if upload else None,
+                offset=upload.received if upload else None,
+                size=upload.size if upload else None,
+            )
+
+    def abort_upload(self, upload_id: str) -> FileUploadResponse:
+        """
+        Abandon an upload and remove its staged data.
+
+        Args:
+            upload_id: Id returned by begin_upload
+
+        Returns:
+            A FileUploadResponse describing the result
+        """
+        try:
+            upload = self.uploads.get(upload_id)
+            self.uploads.finish(upload_id, discard=True)
+            return FileUploadResponse(
+                success=True, upload_id=upload_id, filepath=upload.path
+            )
+
+        except Exception as e:
+            logger.error(f"Error aborting upload {upload_id}: {e}")
+            return FileUploadResponse(
+                success=False,
+                error=f"Error aborting upload: {str(e)}",
+                upload_id=upload_id,
+            )
+
+    def download_file(
+        self,
+        filepath: str,
+        offset: int = 0,
+        length: int = DEFAULT_DOWNLOAD_CHUNK,
+        version: Optional[str] = None,
+    ) -> FileDownloadResponse:
+        """
+        Read one base64-encoded chunk of a file.
+
+        Args:
+            filepath: Path to the file
+            offset: Byte offset to read from
+            length: Maximum chunk length in bytes
+            version: Version token from an earlier chunk; the read fails if
+                     the file has changed since
+
+        Returns:
+            A FileDownloadResponse with the chunk and the next offset
+        """
+        try:
+            if offset < 0:
+                raise ValueError("offset must not be negative")
+            if not 0 < length <= MAX_CHUNK_SIZE:
+                raise ValueError(f"length must be between 1 and {MAX_CHUNK_SIZE}")
+
+            with open(filepath, "rb") as f:
+                st = os.fstat(f.fileno())
+                current = f"{st.st_ino:x}-{st.st_size:x}-{st.st_mtime_ns:x}"
+                if version is not None and version != current:
+                    raise ValueError("File changed since the download started")
+                f.seek(offset)
+                chunk = f.read(length)
+
+            end = offset + len(chunk)
+            return FileDownloadResponse(
+                success=True,
+                filepath=filepath,
+                data=base64.b64encode(chunk).decode("ascii"),
+                offset=offset,
+                length=len(chunk),
+                sha256=hashlib.sha256(chunk).hexdigest(),
+                file_size=st.st_size,
+                next_offset=end if end < st.st_size else None,
+                version=current,
+            )
+
+        except Exception as e:
+            logger.error(f"Error downloading {filepath}: {e}")
+            return FileDownloadResponse(
+                success=False,
+                error=f"Error downloading file: {str(e)}",
+                filepath=filepath,
+            )
+
+    def search(
+        self,
+        root: str = ".",
+        pattern: Optional[str] = None,
+        glob: Optional[str] = None,
+        ignore_case: bool = False,
+        fixed_strings: bool = False,
+        use_gitignore: bool = True,
+        offset: int = 0,
+        limit: int = 100,
+    ) -> FileSearchResponse:
+        """
+        Search file contents below a directory, or list files by glob.
+
+        ``.git`` and ``node_modules`` are always skipped, as are binary files
+        and paths ignored by ``.gitignore`` files unless ``use_gitignore`` is
+        false. Each matching line is reported once.
+
+        Args:
+            root: Directory to search
+            pattern: Regular expression to look for; if omitted, matching
+                     file paths are returned instead
+            glob: Only search files matching this glob (e.g. "*.py", "src/**")
+            ignore_case: Match case-insensitively
+            fixed_strings: Treat pattern as a literal string
+            use_gitignore: Whether to honor ``.gitignore`` files
+            offset: Number of matches to skip
+            limit: Maximum number of matches to return
+
+        Returns:
+            A FileSearchResponse with one page of matches
+        """
+        try:
+            if not os.path.isdir(root):
+                raise NotADirectoryError(f"Not a directory: {root}")
+            if offset < 0 or limit < 1:
+                raise ValueError(
+                    "offset must not be negative and limit must be positive"
+                )
+            limit = min(limit, MAX_SEARCH_RESULTS)
+
+            compiled = None
+            if pattern is not None:
+                source = re.escape(pattern) if fixed_strings else pattern
+                flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+                compiled = re.compile(source.encode("utf-8"), flags)
+
+            results, more = search_files(
+                root,
+                compiled,
+                self._scan_pool(),
+                include=compile_include(glob),
+                use_gitignore=use_gitignore,
+                skip=offset,
+                limit=limit,
+                workers=self.search_workers,
+            )
+            return FileSearchResponse(
+                success=True,
+                root=root,
+                matches=[
+                    SearchMatch(path=path, line=line, column=column, text=text)
+                    for path, line, column, text in results
+                ],
+                offset=offset,
+                next_offset=offset + len(results) if more else None,
+            )
+
+        except Exception as e:
+            logger.error(f"Error searching {root}: {e}")
+            return FileSearchResponse(
+                success=False, error=f"Error searching files: {str(e)}", root=root
+            )
+
+    def copy(
+        self,
+        source: str,
+        destination: str,
+        overwrite: bool = False,
+        preserve_metadata: bool = True,
+    ) -> FileCopyResponse:
+        """
+        Copy a file or directory tree.
+
+        File data is copied inside the kernel where possible. A destination
+        that is an existing directory receives a copy named like the source.
+
+        Args:
+            source: File or directory to copy
+            destination: Target path
+            overwrite: Whether existing files may be replaced
+            preserve_metadata: Whether to copy permission bits and timestamps
+
+        Returns:
+            A FileCopyResponse with transfer statistics
+        """
+        from mcp_terminal.files.copy import copy_file, copy_tree
+
+        try:
+            started = time.monotonic()
+            destination = self._destination(source, destination)
+            if os.path.isdir(source):
+                files, copied, method = copy_tree(
+                    source, destination, preserve_metadata, overwrite
+                )
+            else:
+                if os.path.lexists(destination) and not overwrite:
+                    raise FileExistsError(f"Destination exists: {destination}")
+                copied, method = copy_file(source, destination, preserve_metadata)
+                files = 1
+            self._file_changed(destination)
+            return self._transfer_response(
+                source, destination, method, files, copied, started
+            )
+
+        except Exception as e:
+            logger.error(f"Error copying {source} to {destination}: {e}")
+            return FileCopyResponse(
+                success=False,
+                error=f"Error copying: {str(e)}",
+                source=source,
+                destination=destination,
+            )
+
+    def move(
+        self, source: str, destination: str, overwrite: bool = False
+    ) -> FileCopyResponse:
+        """
+        Move a file or directory.
+
+        Within one filesystem this is a single rename; across filesystems
+        the data is copied and the source removed.
+
+        Args:
+            source: File or directory to move
+            destination: Target path; an existing directory receives the
+                         source under its own name
+            overwrite: Whether an existing destination may be replaced
+
+        Returns:
+            A FileCopyResponse with transfer statistics
+        """
+        from mcp_terminal.files.copy import move_path
+
+        try:
+            started = time.monotonic()
+            destination = self._destination(source, destination)
+            files, moved, method = move_path(source, destination, overwrite)
+            self._file_changed(source)
+            self._file_changed(destination)
+            return self._transfer_response(
+                source, destination, method, files or 1, moved, started
+            )
+
+        except Exception as e:
+            logger.error(f"Error moving {source} to {destination}: {e}")
+            return FileCopyResponse(
+                success=False,
+                error=f"Error moving: {str(e)}",
+                source=source,
+                destination=destination,
+            )
+
+    def archive(
+        self,
+        action: ArchiveAction,
+        archive: str,
+        paths: Optional[List[str]] = None,
+        destination: str = ".",
+        root: Optional[str] = None,
+        format: Optional[str] = None,
+        overwrite: bool = False,
+    ) -> FileCopyResponse:
+        """
+        Create or extract a tar or zip archive as a stream.
+
+        Args:
+            action: Whether to create or extract
+            archive: Archive path
+            paths: Files and directories to pack (create)
+            destination: Directory to unpack into (extract)
+            root: Directory member names are relative to (create); defaults
+                  to the parent of each path
+            format: tar, tar.gz, tgz, tar.bz2, tar.xz or zip; inferred from
+                    the archive name if omitted
+            overwrite: Whether existing files may be replaced
+
+        Returns:
+            A FileCopyResponse with transfer statistics
+        """
+        from mcp_terminal.files.archive import (
+            archive_format,
+            create_archive,
+            extract_archive,
+        )
+
+        try:
+            started = time.monotonic()
+            if action == ArchiveAction.CREATE:
+                if not paths:
+                    raise ValueError("paths must be given to create an archive")
+                if os.path.lexists(archive) and not overwrite:
+                    raise FileExistsError(f"Destination exists: {archive}")
+                files, data = create_archive(archive, paths, root, format)
+                self._file_changed(archive)
+                source, target = ", ".join(paths), archive
+            else:
+                files, data = extract_archive(archive, destination, format, overwrite)
+                # Replaced files get new inodes, so cached contents stay valid
+                self.directories.invalidate(destination)
+                source, target = archive, destination
+
+            method = archive_format(archive, format)[0]
+            return self._transfer_response(source, target, method, files, data, started)
+
+        except Exception as e:
+            logger.error(f"Error processing archive {archive}: {e}")
+            return FileCopyResponse(
+                success=False,
+                error=f"Error processing archive: {str(e)}",
+                source=archive,
+            )
+
+    @staticmethod
+    def _destination(source: str, destination: str) -> str:
+        """Place the source inside destination if that is a directory."""
+        if os.path.isdir(destination) and not os.path.islink(destination):
+            return os.path.join(destination, os.path.basename(os.path.normpath(source)))
+        return destination
+
+    @staticmethod
+    def _transfer_response(
+        source: str,
+        destination: str,
+        method: str,
+        files: int,
+        transferred: int,
+        started: float,
+    ) -> FileCopyResponse:
+        elapsed = time.monotonic() - started
+        return FileCopyResponse(
+            success=True,
+            source=source,
+            destination=destination,
+            method=method,
+            files=files,
+            bytes_transferred=transferred,
+            elapsed=round(elapsed, 6),
+            throughput=round(transferred / elapsed, 1) if elapsed > 0 else None,
+        )
+
+    def hash_files(
+        self,
+        paths: Optional[List[str]] = None,
+        glob: Optional[str] = None,
+        root: str = ".",
+        algorithm: str = "sha256",
+        expected: Optional[Dict[str, str]] = None,
+        use_gitignore: bool = True,
+        limit: int = 1000,
+    ) -> FileHashResponse:
+        """
+        Hash files in parallel.
+
+        Digests are cached by inode, size and modification time, so hashing
+        an unchanged file again costs one ``stat``.
+
+        Args:
+            paths: Files to hash
+            glob: Also hash the files below root matching this glob
+            root: Directory the glob is matched in; reported paths of glob
+                  matches are relative to it
+            algorithm: Hash algorithm, e.g. "sha256", "sha1", "md5", "blake2b"
+            expected: Expected hex digests by reported path
+            use_gitignore: Whether the glob skips paths ignored by git
+            limit: Maximum number of files to hash
+
+        Returns:
+            A FileHashResponse with one digest per file
+        """
+        from mcp_terminal.files.hashing import HASH_ALGORITHMS, hash_file
+
+        try:
+            algorithm = algorithm.lower()
+            if algorithm not in HASH_ALGORITHMS:
+                raise ValueError(
+                    f"Unsupported algorithm {algorithm}; "
+                    f"choose one of {', '.join(HASH_ALGORITHMS)}"
+                )
+            if not paths and not glob:
+                raise ValueError("Specify paths, a glob, or both")
+            if limit < 1:
+                raise ValueError("limit must be positive")
+            limit = min(limit, MAX_HASH_FILES)
+
+            targets = [(path, path) for path in paths or []]
+            if glob:
+                if not os.path.isdir(root):
+                    raise NotADirectoryError(f"Not a directory: {root}")
+                for rel_path in walk_files(root, compile_include(glob), use_gitignore):
+                    targets.append((rel_path, os.path.join(root, rel_path)))
+                    if len(targets) > limit:
+                        break
+            truncated = len(targets) > limit
+            targets = targets[:limit]
+
+            def digest_one(target: Tuple[str, str]) -> FileDigest:
+                name, path = target
+                try:
+                    digest, size, cached = hash_file(path, algorithm, self.digests)
+                except OSError as e:
+                    return FileDigest(path=name, error=str(e))
+                matches = None
+                if expected and name in expected:
+                    matches = digest == expected[name].lower()
+                return FileDigest(
+                    path=name, digest=digest, size=size, cached=cached, matches=matches
+                )
+
+            files = list(self._scan_pool().map(digest_one, targets))
+
+            verified = None
+            if expected:
+                reported = {entry.path: entry for entry in files}
+                verified = all(
+                    name in reported and reported[name].matches for name in expected
+                )
+
+            return FileHashResponse(
+                success=True,
+                algorithm=algorithm,
+                files=files,
+                verified=verified,
+                truncated=truncated,
+            )
+
+        except Exception as e:
+            logger.error(f"Error hashing files: {e}")
+            return FileHashResponse(
+                success=False,
+                error=f"Error hashing files: {str(e)}",
+                algorithm=algorithm,
+            )
+
+    async def watch(
+        self,
+        client: Hashable,
+        callback: "WatchCallback",
+        path: str,
+        glob: Optional[str] = None,
+        recursive: bool = True,
+        debounce_ms: int = 200,
+    ) -> FileWatchResponse:
+        """
+        Watch a file or directory and report changes to a callback.
+
+        Bursts of events are coalesced over the debounce window and each
+        changed path is reported once per window as created, modified or
+        deleted.
+
+        Args:
+            client: Key of the client that owns the watch
+            callback: Receives (watch id, [(path, event)]) batches
+            path: File or directory to watch
+            glob: For directories, only report paths matching this glob
+            recursive: For directories, whether to watch subdirectories
+            debounce_ms: Milliseconds to collect events before reporting them
+
+        Returns:
+            A FileWatchResponse with the watch id
+        """
+        try:
+            if not 10 <= debounce_ms <= 60000:
+                raise ValueError("debounce_ms must be between 10 and 60000")
+            watch = await self.watches.add(
+                client, callback, path, glob, recursive, debounce_ms / 1000
+            )
+            return FileWatchResponse(
+                success=True,
+                watch_id=watch.id,
+                path=watch.root,
+                backend=self.watches.backend,
+                active_watches=len(self.watches.client_watches(client)),
+            )
+
+        except Exception as e:
+            logger.error(f"Error watching {path}: {e}")
+            return FileWatchResponse(
+                success=False,
+                error=f"Error watching path: {str(e)}",
+                path=path,
+                active_watches=len(self.watches.client_watches(client)),
+            )
+
+    def unwatch(self, client: Hashable, watch_id: str) -> FileWatchResponse:
+        """
+        Stop a watch held by a client.
+
+        Args:
+            client: Key of the client that owns the watch
+            watch_id: Id returned by watch
+
+        Returns:
+            A FileWatchResponse describing the result
+        """
+        try:
+            self.watches.remove(watch_id, client)
+            return FileWatchResponse(
+                success=True,
+                watch_id=watch_id,
+                active_watches=len(self.watches.client_watches(client)),
+            )
+
+        except Exception as e:
+            logger.error(f"Error removing watch {watch_id}: {e}")
+            return FileWatchResponse(
+                success=False,
+                error=f"Error removing watch: {str(e)}",
+                watch_id=watch_id,
+                active_watches=len(self.watches.client_watches(client)),
+            )
+
+    def _watch_client_gone(self, client: str) -> None:
+        """Stop the watches of a disconnected client."""
+        if self._watches is not None:
+            self._watches.remove_client(client)
+
+    @staticmethod
+    def _watch_notifier(session: Any) -> "WatchCallback":
+        """Build a callback that sends changes to a session as log messages."""
+        session_ref = weakref.ref(session)
+
+        async def notify(watch_id: str, changes: List[Tuple[str, str]]) -> None:
+            target = session_ref()
+            if target is None:
+                raise ConnectionError("Client session has closed")
+            await target.send_log_message(
+                level="info",
+                logger="file_watch",
+                data={
+                    "watch_id": watch_id,
+                    "changes": [
+                        {"path": path, "event": event} for path, event in changes
+                    ],
+                },
+            )
+
+        return notify
+
+    def list_files(
+        self,
+        path: str = ".",
+        depth: int = 1,
+        glob: Optional[str] = None,
+        include_hidden: bool = True,
+        limit: int = 1000,
+    ) -> FileListResponse:
+        """
+        List a directory tree with per-entry status.
+
+        Listings come from a per-directory cache validated by the directory's
+        modification time, so repeating a listing of an unchanged tree costs
+        one ``stat`` per directory.
+
+        Args:
+            path: Directory to list
+            depth: How many directory levels to descend (1 lists only path)
+            glob: Only return entries whose relative path matches this glob;
+                  directories are still descended into
+            include_hidden: Whether to include entries starting with "."
+            limit: Maximum number of entries to return
+
+        Returns:
+            A FileListResponse with the entries
+        """
+        try:
+            if depth < 1 or limit < 1:
+                raise ValueError("depth and limit must be positive")
+            limit = min(limit, MAX_LIST_ENTRIES)
+            include = compile_include(glob)
+
+            entries: List[FileEntry] = []
+            truncated = False
+            pending: List[Tuple[Optional[str], int]] = [(None, 1)]
+            while pending and not truncated:
+                rel_dir, level = pending.pop()
+                directory = os.path.join(path, rel_dir) if rel_dir else path
+                try:
+                    listing = self.directories.list(directory)
+                except OSError:
+                    if rel_dir is None:
+                        raise
+                    continue
+
+                subdirs = []
+                for info in listing:
+                    if not include_hidden and is_hidden(info.name):
+                        continue
+                    rel_path = entry_path(rel_dir, info.name)
+                    if include is None or include.match(rel_path):
+                        if len(entries) >= limit:
+                            truncated = True
+                            break
+                        entries.append(
+                            FileEntry(
+                                path=rel_path,
+                                type=info.type,
+                                size=info.size,
+                                mtime=info.mtime_ns / 1e9,
+                                mode=format_mode(info.mode),
+                            )
+                        )
+                    if info.type == "directory" and level < depth:
+                        subdirs.append(rel_path)
+
+                for rel_path in reversed(subdirs):
+                    pending.append((rel_path, level + 1))
+
+            return FileListResponse(
+                success=True, root=path, entries=entries, truncated=truncated
+            )
+
+        except Exception as e:
+            logger.error(f"Error listing {path}: {e}")
+            return FileListResponse(
+                success=False, error=f"Error listing directory: {str(e)}", root=path
+            )
+
+    def _scan_pool(self) -> ThreadPoolExecutor:
+        """Pool that searches and hashing fan out to, created on first use."""
+        if self._search_pool is None:
+            self._search_pool = ThreadPoolExecutor(
+                max_workers=self.search_workers,
+                thread_name_prefix="mcp-file-scan",
+            )
+        return self._search_pool
+
+    def _file_changed(self, filepath: str) -> None:
+        """Drop cached state that a write to filepath may have made stale."""
+        self.contents.invalidate(os.path.realpath(filepath))
+        self.directories.invalidate(os.path.dirname(os.path.abspath(filepath)))
+
     def register_mcp(self, mcp: FastMCP) -> None:
         """Register the file tool with the MCP server."""
 
+        @mcp.tool(
+            name="file_read",
+            description="Reads a file, optionally limited to a line or byte range",
+        )
+        async def file_read(
+            filepath: str,
+            start_line: Optional[int] = None,
+            end_line: Optional[int] = None,
+            offset: Optional[int] = None,
+            length: Optional[int] = None,
+            max_bytes: int = DEFAULT_READ_LIMIT,
+        ) -> FileReadResponse:
+            return await self.io.run(
+                [filepath],
+                self.read_file,
+                filepath,
+                start_line,
+                end_line,
+                offset,
+                length,
+                max_bytes,
+            )
+
         @mcp.tool(name="file_modify", description="Writes content to a file")
         async def file_modify(
             filepath: str,
-            content: str,
+            content: str = "",
             mode: WriteMode = WriteMode.OVERWRITE,
             position: Optional[int] = None,
+            line: Optional[int] = None,
+            end_line: Optional[int] = None,
             create_dirs: bool = True,
         ) -> FileOperationResponse:
-            try:
-                # Create directories if they don't exist
-                if create_dirs:
-                    directory = os.path.dirname(filepath)
-                    if directory and not os.path.exists(directory):
-                        os.makedirs(directory)
+            return await self.io.run(
+                [filepath],
+                self.modify_file,
+                filepath,
+                content,
+                mode,
+                position,
+                line,
+                end_line,
+                create_dirs,
+            )
 
-                # Handle different write modes
-                details = {"mode": mode}
+        @mcp.tool(
+            name="file_patch",
+            description="Applies a unified diff or search/replace edits to a file",
+        )
+        async def file_patch(
+            filepath: str,
+            diff: Optional[str] = None,
+            edits: Optional[List[SearchReplaceEdit]] = None,
+            max_fuzz: int = 2,
+            dry_run: bool = False,
+        ) -> FilePatchResponse:
+            return await self.io.run(
+                [filepath], self.patch_file, filepath, diff, edits, max_fuzz, dry_run
+            )
 
-                if mode == WriteMode.INSERT:
-                    if position is None:
-                        raise ValueError(
-                            "Position must be specified when using INSERT mode"
-                        )
+        @mcp.tool(
+            name="file_batch",
+            description="Writes several files at once; either all succeed or none change",
+        )
+        async def file_batch(
+            files: List[BatchWriteEntry], create_dirs: bool = True
+        ) -> FileBatchResponse:
+            return await self.io.run(
+                [entry.filepath for entry in files],
+                self.batch_write,
+                files,
+                create_dirs,
+            )
 
-                    # Read existing content if file exists
-                    existing_content = ""
-                    if os.path.exists(filepath):
-                        with open(filepath, "r", encoding="utf-8") as f:
-                            existing_content = f.read()
-
-                    # Insert the new content at the specified position
-                    position = min(position, len(existing_content))
-                    new_content = (
-                        existing_content[:position]
-                        + content
-                        + existing_content[position:]
-                    )
-                    details["position"] = position
+        @mcp.tool(
+            name="file_upload_begin",
+            description="Starts or resumes a chunked upload of a (binary) file",
+        )
+        async def file_upload_begin(
+            filepath: str,
+            size: Optional[int] = None,
+            create_dirs: bool = True,
+            resume: bool = True,
+        ) -> FileUploadResponse:
+            return await self.io.run(
+                [filepath], self.begin_upload, filepath, size, create_dirs, resume
+            )
 
-                    # Write the combined content
-                    with open(filepath, "w", encoding="utf-8") as f:
-                        f.write(new_content)
+        @mcp.tool(
+            name="file_upload_chunk",
+            description="Appends a base64-encoded chunk at the acknowledged offset",
+        )
+        async def file_upload_chunk(
+            upload_id: str, offset: int, data: str, sha256: Optional[str] = None
+        ) -> FileUploadResponse:
+            target = self.uploads.target(upload_id)
+            return await self.io.run(
+                [target] if target else [],
+                self.upload_chunk,
+                upload_id,
+                offset,
+                data,
+                sha256,
+            )
 
-                elif mode == WriteMode.APPEND:
-                    # Append to file
-                    with open(filepath, "a", encoding="utf-8") as f:
-                        f.write(content)
+        @mcp.tool(
+            name="file_upload_commit",
+            description="Verifies a finished upload and moves it into place",
+        )
+        async def file_upload_commit(
+            upload_id: str, sha256: Optional[str] = None
+        ) -> FileUploadResponse:
+            target = self.uploads.target(upload_id)
+            return await self.io.run(
+                [target] if target else [], self.commit_upload, upload_id, sha256
+            )
 
-                else:  # OVERWRITE
-                    # Overwrite file
-                    with open(filepath, "w", encoding="utf-8") as f:
-                        f.write(content)
+        @mcp.tool(
+            name="file_upload_abort",
+            description="Abandons an upload and removes its staged data",
+        )
+        async def file_upload_abort(upload_id: str) -> FileUploadResponse:
+            target = self.uploads.target(upload_id)
+            return await self.io.run(
+                [target] if target else [], self.abort_upload, upload_id
+            )
 
-                return FileOperationResponse(
-                    success=True, filepath=filepath, details=details
-                )
+        @mcp.tool(
+            name="file_download",
+            description="Reads a base64-encoded chunk of a file by byte offset",
+        )
+        async def file_download(
+            filepath: str,
+            offset: int = 0,
+            length: int = DEFAULT_DOWNLOAD_CHUNK,
+            version: Optional[str] = None,
+        ) -> FileDownloadResponse:
+            return await self.io.run(
+                [filepath], self.download_file, filepath, offset, length, version
+            )
 
-            except Exception as e:
-                logger.error(f"Error writing to file {filepath}: {e}")
-                return FileOperationResponse(
-                    success=False,
-                    error=f"Error writing to file: {str(e)}",
-                    filepath=filepath,
-                )
+        @mcp.tool(
+            name="file_copy",
+            description="Copies a file or directory using in-kernel copies "
+            "where possible",
+        )
+        async def file_copy(
+            source: str,
+            destination: str,
+            overwrite: bool = False,
+            preserve_metadata: bool = True,
+        ) -> FileCopyResponse:
+            return await self.io.run(
+                [source, destination],
+                self.copy,
+                source,
+                destination,
+                overwrite,
+                preserve_metadata,
+            )
+
+        @mcp.tool(
+            name="file_move",
+            description="Moves a file or directory, renaming when on the same "
+            "filesystem",
+        )
+        async def file_move(
+            source: str, destination: str, overwrite: bool = False
+        ) -> FileCopyResponse:
+            return await self.io.run(
+                [source, destination], self.move, source, destination, overwrite
+            )
+
+        @mcp.tool(
+            name="file_archive",
+            description="Creates or extracts tar and zip archives as a stream",
+        )
+        async def file_archive(
+            action: ArchiveAction,
+            archive: str,
+            paths: Optional[List[str]] = None,
+            destination: str = ".",
+            root: Optional[str] = None,
+            format: Optional[str] = None,
+            overwrite: bool = False,
+        ) -> FileCopyResponse:
+            # Extraction writes below destination, creation reads paths
+            locked = [archive] + (
+                list(paths or []) if action == ArchiveAction.CREATE else [destination]
+            )
+            return await self.io.run(
+                locked,
+                self.archive,
+                action,
+                archive,
+                paths,
+                destination,
+                root,
+                format,
+                overwrite,
+            )
+
+        @mcp.tool(
+            name="file_search",
+            description=(
+                "Searches file contents with a regular expression, or lists files "
+                "matching a glob, honoring .gitignore"
+            ),
+        )
+        async def file_search(
+            root: str = ".",
+            pattern: Optional[str] = None,
+            glob: Optional[str] = None,
+            ignore_case: bool = False,
+            fixed_strings: bool = False,
+            use_gitignore: bool = True,
+            offset: int = 0,
+            limit: int = 100,
+        ) -> FileSearchResponse:
+            return await self.io.run(
+                [],
+                self.search,
+                root,
+                pattern,
+                glob,
+                ignore_case,
+                fixed_strings,
+                use_gitignore,
+                offset,
+                limit,
+            )
+
+        @mcp.tool(
+            name="file_hash",
+            description="Hashes files or globs in parallel, optionally checking "
+            "them against expected digests",
+        )
+        async def file_hash(
+            paths: Optional[List[str]] = None,
+            glob: Optional[str] = None,
+            root: str = ".",
+            algorithm: str = "sha256",
+            expected: Optional[Dict[str, str]] = None,
+            use_gitignore: bool = True,
+            limit: int = 1000,
+        ) -> FileHashResponse:
+            return await self.io.run(
+                [],
+                self.hash_files,
+                paths,
+                glob,
+                root,
+                algorithm,
+                expected,
+                use_gitignore,
+                limit,
+            )
+
+        @mcp.tool(
+            name="file_watch",
+            description="Watches a file or directory and pushes batched change "
+            "notifications (notifications/message, logger file_watch)",
+        )
+        async def file_watch(
+            ctx: Context,
+            path: str,
+            glob: Optional[str] = None,
+            recursive: bool = True,
+            debounce_ms: int = 200,
+        ) -> FileWatchResponse:
+            session = ctx.session
+            return await self.watch(
+                self.watch_clients.key(session),
+                self._watch_notifier(session),
+                path,
+                glob,
+                recursive,
+                debounce_ms,
+            )
+
+        @mcp.tool(name="file_unwatch", description="Stops a file_watch watch")
+        async def file_unwatch(ctx: Context, watch_id: str) -> FileWatchResponse:
+            return self.unwatch(self.watch_clients.key(ctx.session), watch_id)
+
+        @mcp.tool(
+            name="file_list",
+            description="Lists directory entries with type, size, mtime and mode",
+        )
+        async def file_list(
+            path: str = ".",
+            depth: int = 1,
+            glob: Optional[str] = None,
+            include_hidden: bool = True,
+            limit: int = 1000,
+        ) -> FileListResponse:
+            return await self.io.run(
+                [], self.list_files, path, depth, glob, include_hidden, limit
+            )
@@ -0,0 +1,240 @@
+"""
+Profiling tool for MCP.
+Provides on-demand CPU and memory profiling of the running server. The
+tools are administrative and only registered when the server is started
+with --enable-profiling.
+"""
+
+import asyncio
+import logging
+import threading
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+from mcp.server.fastmcp import FastMCP
+from pydantic import BaseModel, Field
+
+from mcp_terminal.profiling import MAX_PROFILE_DURATION, MemoryTracker, SamplingProfiler
+
+logger = logging.getLogger("MCP:Terminal:ProfilingTool")
+
+# Default number of stacks returned by profile_event_loop
+DEFAULT_STACK_LIMIT = 200
+
+
+class MemoryAction(str, Enum):
+    """Enum representing profile_memory actions."""
+
+    START = "start"  # Start tracing allocations
+    SNAPSHOT = "snapshot"  # Take a snapshot and report top allocation sites
+    STOP = "stop"  # Stop tracing and drop all snapshots
+
+
+class ProfileResponse(BaseModel):
+    """Response model for event loop profiles."""
+
+    success: bool = Field(..., description="Whether profiling was successful")
+    error: Optional[str] = Field(None, description="Error message if profiling failed")
+    duration: float = Field(0.0, description="Seconds the profiler ran")
+    interval: float = Field(0.0, description="Seconds between samples")
+    samples: int = Field(0, description="Number of samples taken")
+    stacks: List[str] = Field(
+        default_factory=list,
+        description='Collapsed stacks, "root;...;leaf count", most frequent first',
+    )
+    truncated: bool = Field(
+        False, description="Whether less frequent stacks were omitted"
+    )
+
+
+class MemoryProfileResponse(BaseModel):
+    """Response model for memory profiling."""
+
+    success: bool = Field(..., description="Whether the operation was successful")
+    error: Optional[str] = Field(
+        None, description="Error message if the operation failed"
+    )
+    tracing: bool = Field(False, description="Whether allocations are being traced")
+    snapshot_id: Optional[int] = Field(None, description="Id of the snapshot taken")
+    snapshots: List[int] = Field(
+        default_factory=list, description="Ids of the snapshots still available"
+    )
+    traced_current: Optional[int] = Field(
+        None, description="Bytes currently allocated by traced code"
+    )
+    traced_peak: Optional[int] = Field(
+        None, description="Peak bytes allocated by traced code"
+    )
+    top: List[Dict[str, Any]] = Field(
+        default_factory=list,
+        description="Largest allocation sites with location, size and count; "
+        "size_diff and count_diff when compared with an earlier snapshot",
+    )
+
+
+class ProfilingTool:
+    """
+    MCP tool for profiling the server.
+
+    This tool samples the event loop thread to find where time goes and
+    takes tracemalloc snapshots to find where memory goes.
+    """
+
+    def __init__(self):
+        """Initialize the profiling tool."""
+        self.name = "profiling"
+        self.profiler: Optional[SamplingProfiler] = None
+        self.memory = MemoryTracker()
+
+    async def profile_event_loop(
+        self, duration: float, interval_ms: float, limit: int
+    ) -> ProfileResponse:
+        """
+        Sample the event loop thread for a while.
+
+        Args:
+            duration: Seconds to sample for
+            interval_ms: Milliseconds between samples
+            limit: Maximum number of stacks to return
+
+        Returns:
+            ProfileResponse with the collapsed stacks
+        """
+        if self.profiler is not None and self.profiler.running:
+            return ProfileResponse(
+                success=False, error="A profile is already being taken"
+            )
+        try:
+            if not 0 < duration <= MAX_PROFILE_DURATION:
+                raise ValueError(
+                    f"duration must be between 0 and {MAX_PROFILE_DURATION} seconds"
+                )
+            # Tool handlers run on the event loop thread
+            profiler = SamplingProfiler(threading.get_ident(), interval_ms / 1000)
+            self.profiler = profiler
+            profiler.start()
+            try:
+                await asyncio.sleep(duration)
+            finally:
+                await asyncio.get_running_loop().run_in_executor(None, profiler.stop)
+
+            stacks, truncated = profiler.collapsed(limit)
+            return ProfileResponse(
+                success=True,
+                duration=round(profiler.elapsed, 3),
+                interval=profiler.interval,
+                samples=profiler.samples,
+                stacks=stacks,
+                truncated=truncated,
+            )
+        except Exception as e:
+            logger.error(f"Error profiling event loop: {e}")
+            return ProfileResponse(
+                success=False, error=f"Error profiling event loop: {str(e)}"
+            )
+
+    def profile_memory(
+        self,
+        action: MemoryAction,
+        limit: int,
+        key_type: str,
+        compare_to: Optional[int],
+        frames: int,
+    ) -> MemoryProfileResponse:
+        """
+        Start or stop allocation tracing, or take and report a snapshot.
+
+        Args:
+            action: What to do
+            limit: Number of allocation sites to report
+            key_type: Grouping of sites: "lineno", "filename" or "traceback"
+            compare_to: Snapshot to diff a new snapshot against
+            frames: Frames stored per allocation when starting
+
+        Returns:
+            MemoryProfileResponse with the tracing state and report
+        """
+        try:
+            snapshot_id = None
+            top: List[Dict[str, Any]] = []
+            if action == MemoryAction.START:
+                self.memory.start(frames)
+            elif action == MemoryAction.STOP:
+                self.memory.stop()
+            else:
+                if key_type not in ("lineno", "filename", "traceback"):
+                    raise ValueError(
+                        "key_type must be one of lineno, filename, traceback"
+                    )
+                self.memory.start(frames)
+                snapshot_id = self.memory.take()
+                top = self.memory.top(snapshot_id, limit, key_type, compare_to)
+
+            current = peak = None
+            if self.memory.tracing:
+                current, peak = self.memory.usage()
+            return MemoryProfileResponse(
+                success=True,
+                tracing=self.memory.tracing,
+                snapshot_id=snapshot_id,
+                snapshots=list(self.memory.snapshots),
+                traced_current=current,
+                traced_peak=peak,
+                top=top,
+            )
+        except Exception as e:
+            logger.error(f"Error profiling memory: {e}")
+            return MemoryProfileResponse(
+                success=False,
+                error=f"Error profiling memory: {str(e)}",
+                tracing=self.memory.tracing,
+                snapshots=list(self.memory.snapshots),
+            )
+
+    async def cleanup(self) -> None:
+        """Stop any running profiler and allocation tracing."""
+        if self.profiler is not None and self.profiler.running:
+            self.profiler.stop()
+        self.memory.stop()
+
+    def register_mcp(self, mcp: FastMCP) -> None:
+        """Register the profiling tools with the MCP server."""
+
+        @mcp.tool(
+            name="profile_event_loop",
+            description=(
+                "Samples the server's event loop thread for a number of seconds "
+                "and returns collapsed stacks for a flame graph"
+            ),
+        )
+        async def profile_event_loop(
+            duration: float = 5.0,
+            interval_ms: float = 5.0,
+            limit: int = DEFAULT_STACK_LIMIT,
+        ) -> ProfileResponse:
+            return await self.profile_event_loop(duration, interval_ms, limit)
+
+        @mcp.tool(
+            name="profile_memory",
+            description=(
+                "Starts or stops tracemalloc, or takes a snapshot and returns the "
+                "top allocation sites, optionally diffed against an earlier snapshot"
+            ),
+        )
+        async def profile_memory(
+            action: MemoryAction = MemoryAction.SNAPSHOT,
+            limit: int = 20,
+            key_type: str = "lineno",
+            compare_to: Optional[int] = None,
+            frames: int = 1,
+        ) -> MemoryProfileResponse:
+            # Taking a snapshot walks every traced block; keep it off the loop
+            return await asyncio.get_running_loop().run_in_executor(
+                None,
+                self.profile_memory,
+                action,
+                limit,
+                key_type,
+                compare_to,
+                frames,
+            )
@@ -3,22 +3,51 @@ Terminal tool for MCP.
 Provides terminal control operations through the MCP interface.
 """
 
+import asyncio
+import getpass
 import logging
 import os
-from typing import Optional
+import platform
+import shutil
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Dict, Hashable, List, Optional
 
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
 from pydantic import BaseModel, Field
 
+from mcp_terminal.admission import AdmissionController, Overloaded
 from mcp_terminal.controllers import get_controller
+from mcp_terminal.controllers.base import BaseTerminalController
+from mcp_terminal.controllers.manager import (
+    DEFAULT_IDLE_TTL,
+    DEFAULT_MAX_CONTROLLERS,
+    ControllerManager,
+)
+from mcp_terminal.history import (
+    DEFAULT_SEARCH_LIMIT,
+    MAX_SEARCH_LIMIT,
+    CommandHistory,
+)
+from mcp_terminal.metrics import phase
+from mcp_terminal.outputs import DEFAULT_READ_LINES, OutputStore, paginate
 from mcp_terminal.security.command_filter import CommandFilter
+from mcp_terminal.sessions import ClientKeys
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
 logger = logging.getLogger("MCP:Terminal:Tool")
 
+# Seconds between progress notifications while a command runs
+PROGRESS_INTERVAL = 1.0
+
+# Seconds a history search waits for records still being written
+HISTORY_FLUSH_TIMEOUT = 1.0
+
+# Seconds cleanup waits for queued history records to be written
+HISTORY_CLOSE_TIMEOUT = 5.0
+
+# Seconds cleanup waits for commands it stopped to return their results
+STOPPED_COMMAND_TIMEOUT = 1.0
+
 
 # Define the models for the execute command function
 class ExecuteCommandRequest(BaseModel):
@@ -47,6 +76,58 @@ class ExecuteCommandResponse(BaseModel):
         None, description="The command return code if available"
     )
     warning: Optional[str] = Field(None, description="Warning message if any")
+    output_handle: Optional[str] = Field(
+        None,
+        description="Handle for read_output when the output was too large to "
+        "return inline; output then holds a preview of its head and tail",
+    )
+    error_handle: Optional[str] = Field(
+        None, description="Handle for read_output when the error output was too large"
+    )
+    output_digest: Optional[str] = Field(
+        None, description="SHA-256 of the full output, whether or not it was sent"
+    )
+    error_digest: Optional[str] = Field(
+        None, description="SHA-256 of the full error output"
+    )
+    overloaded: bool = Field(
+        False, description="Whether the command was rejected because of load"
+    )
+    retry_after_ms: Optional[int] = Field(
+        None, description="Milliseconds to wait before retrying a rejected command"
+    )
+
+
+class ReadOutputResponse(BaseModel):
+    """Response model for reading a stored command output."""
+
+    success: bool = Field(..., description="Whether the read was successful")
+    error: Optional[str] = Field(None, description="Error message if the read failed")
+    lines: List[Dict[str, Any]] = Field(
+        default_factory=list, description="Lines read, with 1-based line and text"
+    )
+    next_offset: Optional[int] = Field(
+        None, description="Offset of the next page, if there are more lines"
+    )
+    total_lines: Optional[int] = Field(
+        None, description="Total number of lines in the output"
+    )
+
+
+class HistorySearchResponse(BaseModel):
+    """Response model for searching the command history."""
+
+    success: bool = Field(..., description="Whether the search was successful")
+    error: Optional[str] = Field(None, description="Error message if the search failed")
+    results: List[Dict[str, Any]] = Field(
+        default_factory=list,
+        description="Matching commands, most recent first, with command, cwd, "
+        "started, duration, return_code, success, output, error, "
+        "output_digest, truncated and, for text searches, a snippet",
+    )
+    next_offset: Optional[int] = Field(
+        None, description="Offset of the next page, if there may be more results"
+    )
 
 
 class TerminalInfoResponse(BaseModel):
@@ -55,7 +136,9 @@ class TerminalInfoResponse(BaseModel):
     terminal_type: str = Field(..., description="The type of terminal being used")
     platform: str = Field(..., description="The platform the terminal is running on")
     current_directory: str = Field(
-        ..., description="Current working directory of the terminal"
+        ...,
+        description="Current working directory of the terminal, or 'unknown' "
+        "if the controller does not track it",
     )
     user: str = Field(..., description="Current user name")
     shell: Optional[str] = Field(None, description="Shell being used")
@@ -78,6 +161,12 @@ class TerminalTool:
         whitelist_file: Optional[str] = None,
         blacklist_file: Optional[str] = None,
         whitelist_mode: bool = False,
+        per_client: bool = False,
+        max_clients: int = DEFAULT_MAX_CONTROLLERS,
+        client_idle_ttl: float = DEFAULT_IDLE_TTL,
+        admission: Optional[AdmissionController] = None,
+        outputs: Optional[OutputStore] = None,
+        history: Optional[CommandHistory] = None,
     ):
         """
         Initialize the terminal tool.
@@ -88,12 +177,38 @@ class TerminalTool:
             whitelist_file: Path to whitelist file
             blacklist_file: Path to blacklist file
             whitelist_mode: If True, only whitelisted commands are allowed
+            per_client: If True, every client session gets its own controller
+            max_clients: Most per-client controllers alive at once
+            client_idle_ttl: Seconds before an unused per-client controller
+                             is closed
+            admission: Admission control for commands; defaults to the
+                       default limits
+            outputs: Store for outputs too large to return inline; defaults
+                     to the default limits
+            history: Where executed commands are recorded, or None to not
+                     record them
         """
         self.name = "terminal"
         self.controller_type = controller_type
         self.controller = None
+        self._terminal_type: Optional[str] = None
         self._init_controller()
 
+        # Per-client controllers are of the type selected for the shared one
+        self.controllers: Optional[ControllerManager] = None
+        if per_client:
+            self.controllers = ControllerManager(
+                lambda: type(self.controller)(), max_clients, client_idle_ttl
+            )
+        # Client state is keyed by session and dropped when it disconnects
+        self.clients = ClientKeys(self._client_gone)
+        self.admission = admission or AdmissionController()
+        self.outputs = outputs if outputs is not None else OutputStore()
+        self.history = history
+
+        # Facts that do not change while the server runs
+        self._static_info = self._collect_static_info()
+
         # Initialize command filter
         self.command_filter = CommandFilter(
             whitelist_file=whitelist_file,
@@ -105,6 +220,7 @@ class TerminalTool:
         """Initialize the terminal controller."""
         try:
             self.controller = get_controller(self.controller_type)
+            self._terminal_type = None
             logger.info(
                 f"Initialized terminal controller: {type(self.controller).__name__}"
             )
@@ -112,18 +228,145 @@ class TerminalTool:
             logger.error(f"Failed to initialize terminal controller: {e}")
             raise
 
+    @staticmethod
+    def _collect_static_info() -> Dict[str, Any]:
+        """Collect the terminal information that is fixed for the process."""
+        try:
+            user = getpass.getuser()
+        except Exception:
+            user = "unknown"
+        return {
+            "platform": platform.system(),
+            "user": user,
+            "shell": os.environ.get("SHELL", None),
+        }
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        Stop accepting commands and wait for running ones to finish.
+
+        Args:
+            timeout: Most seconds to wait
+
+        Returns:
+            Whether every running command finished in time
+        """
+        self.admission.close()
+        return await self.admission.drain(timeout)
+
+    async def cleanup(self) -> None:
+        """
+        Stop commands still running, close the shared and per-client
+        controllers and write out the history.
+        """
+        self.admission.close()
+        if self.controllers is not None:
+            await self.controllers.close()
+        if self.controller is not None:
+            await self.controller.cleanup()
+        # Commands stopped above return now; let them record their history
+        await self.admission.drain(STOPPED_COMMAND_TIMEOUT)
+        self.outputs.clear()
+        if self.history is not None:
+            # Joining the writer thread blocks; keep it off the loop
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.history.close, HISTORY_CLOSE_TIMEOUT
+            )
+
+    def _client_gone(self, key: Hashable) -> None:
+        """Release a disconnected client's controller and rate limit."""
+        self.admission.forget(key)
+        if self.controllers is not None:
+            asyncio.get_running_loop().create_task(self.controllers.release(key))
+
+    def _client(self, ctx: Context) -> Optional[Hashable]:
+        """
+        Key of the client making a tool call.
+
+        Clients are only told apart where sessions are long-lived, i.e. with
+        per-client controllers; otherwise every call maps to None.
+        """
+        if self.controllers is None:
+            return None
+        try:
+            session = ctx.session
+        except ValueError:
+            # Not called as part of a client request
+            return None
+        return self.clients.key(session)
+
+    @asynccontextmanager
+    async def _controller_for(
+        self, ctx: Context
+    ) -> AsyncIterator[BaseTerminalController]:
+        """
+        Borrow the controller serving the client making a tool call.
+
+        Without per-client controllers, or outside a client session, this
+        is the shared controller.
+        """
+        # Ensure we have a controller
+        if not self.controller:
+            self._init_controller()
+
+        client = self._client(ctx)
+        if client is None:
+            yield self.controller
+            return
+
+        async with self.controllers.use(client) as controller:
+            yield controller
+
+    def _search_history(self, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Search the history once commands recorded so far are written."""
+        self.history.flush(HISTORY_FLUSH_TIMEOUT)
+        return self.history.search(**query)
+
+    @staticmethod
+    async def _await_with_progress(
+        ctx: Context, awaitable: Awaitable[Any], total: Optional[float]
+    ) -> Any:
+        """
+        Await a result, reporting elapsed seconds as progress meanwhile.
+
+        Progress is only sent when the client asked for it with a progress
+        token; over streamable HTTP it arrives on the same response stream.
+
+        Args:
+            ctx: Context of the tool call
+            awaitable: What to wait for
+            total: Expected maximum seconds, e.g. the command timeout
+
+        Returns:
+            The result of awaitable
+        """
+        task = asyncio.ensure_future(awaitable)
+        started = time.monotonic()
+        try:
+            while True:
+                done, _ = await asyncio.wait({task}, timeout=PROGRESS_INTERVAL)
+                if done:
+                    return task.result()
+                await ctx.report_progress(round(time.monotonic() - started, 1), total)
+        finally:
+            if not task.done():
+                task.cancel()
+
     def register_mcp(self, mcp: FastMCP) -> None:
         """Register the terminal tool with the MCP server."""
 
         @mcp.tool(name="execute_command", description="Executes a terminal command")
         async def execute_command(
+            ctx: Context,
             command: str,
             wait_for_output: bool = True,
             timeout: int = 10,
+            known_digests: Optional[List[str]] = None,
         ) -> ExecuteCommandResponse:
             try:
                 # Check if command is allowed
-                is_allowed, reason = self.command_filter.is_command_allowed(command)
+                with phase("filter"):
+                    is_allowed, reason = self.command_filter.is_command_allowed(command)
 
                 if not is_allowed:
                     logger.warning(
@@ -134,22 +377,67 @@ class TerminalTool:
                         error=f"Command not allowed: {reason}",
                     )
 
-                # Ensure we have a controller
-                if not self.controller:
-                    self._init_controller()
+                # Execute the command once admitted
+                cwd = None
+                client = self._client(ctx)
+                async with self.admission.admit(client):
+                    async with self._controller_for(ctx) as controller:
+                        started = time.time()
+                        began = time.monotonic()
+                        result = await self._await_with_progress(
+                            ctx,
+                            controller.execute_command(
+                                command, wait_for_output, timeout
+                            ),
+                            timeout if wait_for_output else None,
+                        )
+                        duration = time.monotonic() - began
+                        if self.history is not None:
+                            cwd = await controller.get_current_directory()
+
+                # Keep large outputs server-side and return a preview
+                output = await self.outputs.offload(result.get("output"))
+                error = await self.outputs.offload(result.get("error"))
+
+                if self.history is not None:
+                    self.history.record(
+                        command,
+                        cwd,
+                        started,
+                        duration,
+                        result.get("return_code"),
+                        result.get("success", False),
+                        result.get("output"),
+                        result.get("error"),
+                        output.digest,
+                        client,
+                    )
 
-                # Execute the command
-                result = await self.controller.execute_command(
-                    command, wait_for_output, timeout
-                )
+                # Content the client already holds is not sent again
+                known = set(known_digests or ())
 
                 # Convert to response model
                 return ExecuteCommandResponse(
                     success=result.get("success", False),
-                    output=result.get("output"),
-                    error=result.get("error"),
+                    output=None if output.digest in known else output.text,
+                    error=None if error.digest in known else error.text,
                     return_code=result.get("return_code"),
                     warning=result.get("warning"),
+                    output_handle=output.handle,
+                    error_handle=error.handle,
+                    output_digest=output.digest,
+                    error_digest=error.digest,
+                )
+            except Overloaded as e:
+                logger.warning(f"Command rejected: {command}. Reason: {e.reason}")
+                return ExecuteCommandResponse(
+                    success=False,
+                    error=(
+                        f"Server overloaded ({e.reason}); "
+                        f"retry after {e.retry_after_ms} ms"
+                    ),
+                    overloaded=True,
+                    retry_after_ms=e.retry_after_ms,
                 )
             except Exception as e:
                 logger.error(f"Error executing command: {e}")
@@ -157,67 +445,118 @@ class TerminalTool:
                     success=False, error=f"Error executing command: {str(e)}"
                 )
 
-        @mcp.tool(name="get_terminal_info", description="Gets terminal information")
-        async def get_terminal_info() -> TerminalInfoResponse:
+        @mcp.tool(
+            name="read_output",
+            description=(
+                "Reads a page of a command output that was too large to return "
+                "inline, optionally only lines matching a regular expression"
+            ),
+        )
+        async def read_output(
+            handle: str,
+            offset: int = 0,
+            limit: int = DEFAULT_READ_LINES,
+            grep: Optional[str] = None,
+            ignore_case: bool = False,
+        ) -> ReadOutputResponse:
             try:
-                # Ensure we have a controller
-                if not self.controller:
-                    self._init_controller()
-
-                # Get terminal type
-                terminal_type = await self.controller.get_terminal_type()
-
-                # Get platform
-                import getpass
-                import os
-                import platform
-                import shutil
+                lines = await self.outputs.lines(handle)
+                # Filtering a large output is CPU-bound; keep it off the loop
+                page = await asyncio.get_running_loop().run_in_executor(
+                    None,
+                    paginate,
+                    lines,
+                    offset,
+                    limit,
+                    grep,
+                    ignore_case,
+                )
+                return ReadOutputResponse(success=True, **page)
+            except KeyError as e:
+                return ReadOutputResponse(success=False, error=str(e.args[0]))
+            except Exception as e:
+                logger.error(f"Error reading output: {e}")
+                return ReadOutputResponse(
+                    success=False, error=f"Error reading output: {str(e)}"
+                )
 
-                platform_name = platform.system()
+        if self.history is not None:
 
-                # Get current directory directly
-                current_dir = None
+            @mcp.tool(
+                name="history_search",
+                description=(
+                    "Searches previously executed commands and their output by "
+                    "text, command prefix, time range or exit status"
+                ),
+            )
+            async def history_search(
+                ctx: Context,
+                text: Optional[str] = None,
+                command_prefix: Optional[str] = None,
+                since: Optional[float] = None,
+                until: Optional[float] = None,
+                return_code: Optional[int] = None,
+                success: Optional[bool] = None,
+                limit: int = DEFAULT_SEARCH_LIMIT,
+                offset: int = 0,
+            ) -> HistorySearchResponse:
                 try:
-                    pwd_result = await self.controller.execute_command(
-                        "pwd", wait_for_output=True, timeout=5
+                    results = await asyncio.get_running_loop().run_in_executor(
+                        None,
+                        self._search_history,
+                        dict(
+                            text=text,
+                            command_prefix=command_prefix,
+                            since=since,
+                            until=until,
+                            return_code=return_code,
+                            success=success,
+                            limit=limit,
+                            offset=offset,
+                            # Clients told apart only see their own commands
+                            client=self._client(ctx),
+                        ),
+                    )
+                    return HistorySearchResponse(
+                        success=True,
+                        results=results,
+                        next_offset=(
+                            offset + len(results)
+                            if results and len(results) >= min(limit, MAX_SEARCH_LIMIT)
+                            else None
+                        ),
                     )
-                    if pwd_result.get("success") and pwd_result.get("output"):
-                        # Clean the output by splitting lines and finding a valid path
-                        lines = pwd_result.get("output").splitlines()
-                        for line in lines:
-                            line = line.strip()
-                            # On macOS/Linux, a valid path should start with /
-                            if line.startswith("/"):
-                                current_dir = line
-                                break
                 except Exception as e:
-                    logger.debug(f"Error getting current directory from terminal: {e}")
-
-                # Fallback to Python's os.getcwd()
-                if not current_dir:
-                    current_dir = os.getcwd()
+                    logger.error(f"Error searching history: {e}")
+                    return HistorySearchResponse(
+                        success=False, error=f"Error searching history: {str(e)}"
+                    )
 
-                # Get user
-                user = getpass.getuser()
+        @mcp.tool(name="get_terminal_info", description="Gets terminal information")
+        async def get_terminal_info(ctx: Context) -> TerminalInfoResponse:
+            try:
+                async with self._controller_for(ctx) as controller:
+                    # The terminal type is the same for every controller
+                    if self._terminal_type is None:
+                        self._terminal_type = await controller.get_terminal_type()
 
-                # Get shell
-                shell = os.environ.get("SHELL", None)
+                    # Dynamic fields come from state the controller tracks, so
+                    # no command has to round-trip through the terminal
+                    current_dir = await controller.get_current_directory()
+                    terminal_size = await controller.get_terminal_size()
 
-                # Get terminal size if possible
-                terminal_size = None
-                try:
+                # The server's own directory says nothing about a terminal's
+                if not current_dir:
+                    current_dir = "unknown"
+                if terminal_size is None:
                     cols, rows = shutil.get_terminal_size(fallback=(80, 24))
                     terminal_size = {"rows": rows, "columns": cols}
-                except Exception:
-                    pass
 
                 return TerminalInfoResponse(
-                    terminal_type=terminal_type,
-                    platform=platform_name,
+                    terminal_type=self._terminal_type,
                     current_directory=current_dir,
-                    user=user,
-                    shell=shell,
                     terminal_size=terminal_size,
+                    **self._static_info,
                 )
             except Exception as e:
                 logger.error(f"Error getting terminal info: {e}")
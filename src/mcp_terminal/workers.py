@@ -0,0 +1,480 @@
+"""
+Multi-process SSE serving.
+Several worker processes bind the same TCP port with SO_REUSEPORT and the
+kernel spreads connections across them. An SSE session lives in the worker
+that accepted its GET stream, but the client's POSTs arrive on new
+connections that may land on any worker, so every worker records the
+sessions it owns in a shared SQLite registry and forwards POSTs for
+sessions it does not own to the owner over the owner's private Unix socket.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import re
+import signal
+import socket
+import sqlite3
+import stat
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set
+from urllib.parse import parse_qs
+
+from mcp_terminal.logs import stop_logging
+
+logger = logging.getLogger("MCP:Terminal:Workers")
+
+# Header marking a request forwarded from another worker
+FORWARDED_HEADER = b"x-mcp-terminal-forwarded"
+
+# How often the supervisor checks on its workers
+SUPERVISE_INTERVAL = 0.5
+
+# Seconds workers get beyond their shutdown timeout to exit after SIGTERM
+# before they are killed
+STOP_TIMEOUT = 5.0
+
+# A worker that exits sooner than this after starting is not restarted,
+# since it would most likely fail the same way again
+MIN_WORKER_UPTIME = 5.0
+
+# Session id in the endpoint event an SSE stream starts with
+_ENDPOINT_SESSION = re.compile(rb"session_id=([0-9a-f]{32})")
+
+# Headers that describe one hop and are not forwarded
+_HOP_HEADERS = {b"host", b"connection", b"keep-alive", b"transfer-encoding"}
+
+
+def reuseport_supported() -> bool:
+    """Whether the platform can load-balance one port across processes."""
+    return hasattr(socket, "SO_REUSEPORT")
+
+
+def bind_reuseport(host: str, port: int) -> socket.socket:
+    """
+    Create a listening TCP socket that other workers may bind as well.
+
+    Args:
+        host: Address to bind
+        port: Port to bind
+
+    Returns:
+        The bound, listening socket
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def default_state_dir(port: int) -> str:
+    """
+    Directory for the workers' registry and sockets when none is given.
+
+    It lives in the user's runtime directory where there is one, and is
+    otherwise named after the user in the system temp directory.
+
+    Args:
+        port: Port the workers serve
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, f"mcp-terminal-{port}")
+    return os.path.join(tempfile.gettempdir(), f"mcp-terminal-{os.getuid()}-{port}")
+
+
+def prepare_state_dir(path: str) -> None:
+    """
+    Create the state directory, or check that an existing one is private.
+
+    Whoever can write to it can redirect sessions to their own socket, so a
+    directory not owned by the current user or open to others is refused.
+
+    Args:
+        path: Directory to prepare
+
+    Raises:
+        RuntimeError: If the directory is not private to the current user
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if (
+        not stat.S_ISDIR(info.st_mode)
+        or info.st_uid != os.getuid()
+        or stat.S_IMODE(info.st_mode) != 0o700
+    ):
+        raise RuntimeError(
+            f"State directory {path} must be a directory owned by the current "
+            "user with mode 0700"
+        )
+
+
+def bind_unix(path: str) -> socket.socket:
+    """Create a listening Unix socket at path, replacing a stale one."""
+    if os.path.exists(path):
+        os.unlink(path)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    sock.listen(2048)
+    return sock
+
+
+class SessionRegistry:
+    """
+    Shared record of which worker owns which SSE session.
+
+    Backed by a SQLite database in WAL mode so every worker process can read
+    and write it concurrently.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open or create the registry.
+
+        Args:
+            path: Database file shared by all workers
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS workers ("
+                "worker TEXT PRIMARY KEY, address TEXT NOT NULL, "
+                "pid INTEGER NOT NULL, started REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "session_id TEXT PRIMARY KEY, worker TEXT NOT NULL, "
+                "created REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS sessions_worker ON sessions (worker)"
+            )
+
+    def register_worker(self, worker: str, address: str, pid: int) -> None:
+        """Record a worker and the Unix socket it accepts forwarded requests on."""
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO workers VALUES (?, ?, ?, ?)",
+                (worker, address, pid, time.time()),
+            )
+
+    def remove_worker(self, worker: str) -> None:
+        """Forget a worker and every session it owned."""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM sessions WHERE worker = ?", (worker,))
+            self._db.execute("DELETE FROM workers WHERE worker = ?", (worker,))
+
+    def workers(self) -> List[Dict[str, Any]]:
+        """Return every registered worker with its session count."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT w.worker, w.address, w.pid, w.started, COUNT(s.session_id) "
+                "FROM workers w LEFT JOIN sessions s ON s.worker = w.worker "
+                "GROUP BY w.worker ORDER BY w.worker"
+            ).fetchall()
+        return [
+            {
+                "worker": worker,
+                "address": address,
+                "pid": pid,
+                "started": started,
+                "sessions": sessions,
+            }
+            for worker, address, pid, started, sessions in rows
+        ]
+
+    def claim(self, session_id: str, worker: str) -> None:
+        """Record that worker owns a session."""
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?)",
+                (session_id, worker, time.time()),
+            )
+
+    def release(self, session_id: str) -> None:
+        """Forget a session that has ended."""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def owner(self, session_id: str) -> Optional[str]:
+        """
+        Look up the Unix socket of the worker owning a session.
+
+        Returns:
+            The socket path, or None if the session is unknown
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT w.address FROM sessions s JOIN workers w "
+                "ON w.worker = s.worker WHERE s.session_id = ?",
+                (session_id,),
+            ).fetchone()
+        return row[0] if row else None
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._db.close()
+
+
+class SessionAffinity:
+    """
+    ASGI middleware that keeps each SSE session on the worker that owns it.
+
+    SSE streams are claimed in the registry when their endpoint event is
+    sent and released when the stream closes. A POST for a session another
+    worker owns is forwarded to that worker's Unix socket.
+    """
+
+    def __init__(
+        self,
+        app,
+        registry: SessionRegistry,
+        worker: str,
+        sse_path: str,
+        message_path: str,
+    ):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: The SSE application
+            registry: Shared session registry
+            worker: Name of this worker
+            sse_path: Path of the SSE stream endpoint
+            message_path: Path clients POST messages to
+        """
+        self.app = app
+        self.registry = registry
+        self.worker = worker
+        self.sse_path = sse_path
+        self.message_path = message_path
+        self.sessions: Set[str] = set()
+        self._clients: Dict[str, Any] = {}
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "http":
+            if scope["method"] == "GET" and scope["path"] == self.sse_path:
+                return await self._stream(scope, receive, send)
+            if scope["method"] == "POST" and scope["path"].startswith(
+                self.message_path
+            ):
+                session_id = _query_session(scope)
+                if (
+                    session_id
+                    and session_id not in self.sessions
+                    and FORWARDED_HEADER not in dict(scope["headers"])
+                ):
+                    address = await asyncio.to_thread(self.registry.owner, session_id)
+                    if address is not None:
+                        return await self._forward(address, scope, receive, send)
+        await self.app(scope, receive, send)
+
+    async def _stream(self, scope, receive, send) -> None:
+        """Serve an SSE stream, claiming its session while it is open."""
+        session_id = None
+
+        async def tracking_send(message):
+            nonlocal session_id
+            if session_id is None and message["type"] == "http.response.body":
+                match = _ENDPOINT_SESSION.search(message.get("body", b""))
+                if match:
+                    session_id = match.group(1).decode()
+                    self.sessions.add(session_id)
+                    await asyncio.to_thread(
+                        self.registry.claim, session_id, self.worker
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, tracking_send)
+        finally:
+            if session_id is not None:
+                self.sessions.discard(session_id)
+                await asyncio.to_thread(self.registry.release, session_id)
+
+    async def _forward(self, address: str, scope, receive, send) -> None:
+        """Relay a request to the worker listening on a Unix socket."""
+        import httpx
+
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        client = self._clients.get(address)
+        if client is None:
+            client = self._clients[address] = httpx.AsyncClient(
+                transport=httpx.AsyncHTTPTransport(uds=address),
+                base_url="http://worker",
+            )
+        headers = [
+            (name, value)
+            for name, value in scope["headers"]
+            if name.lower() not in _HOP_HEADERS
+        ]
+        headers.append((FORWARDED_HEADER, self.worker.encode()))
+        path = scope.get("raw_path") or scope["path"].encode()
+        if scope.get("query_string"):
+            path += b"?" + scope["query_string"]
+        try:
+            response = await client.request(
+                scope["method"], path.decode(), headers=headers, content=body
+            )
+        except httpx.HTTPError as e:
+            logger.warning(f"Could not forward request to {address}: {e}")
+            await _respond(send, 502, b"Session owner unavailable")
+            return
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": [
+                    (name, value)
+                    for name, value in response.headers.raw
+                    if name.lower() not in _HOP_HEADERS
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": response.content})
+
+    async def aclose(self) -> None:
+        """Close the connections to other workers."""
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+
+def _query_session(scope) -> Optional[str]:
+    """Extract the session_id query parameter of a request."""
+    values = parse_qs(scope.get("query_string", b"").decode()).get("session_id")
+    return values[0] if values else None
+
+
+async def _respond(send, status: int, body: bytes) -> None:
+    """Send a small plain-text response."""
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"text/plain; charset=utf-8")],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+def _worker_main(index: int, server_kwargs: Dict[str, Any]) -> None:
+    """Entry point of a worker process."""
+    from mcp_terminal.server import MCPTerminalServer
+
+    server = MCPTerminalServer(**server_kwargs, worker_name=f"worker-{index}")
+    asyncio.run(server.serve())
+    stop_logging()
+
+
+def run_workers(workers: int, server_kwargs: Dict[str, Any]) -> int:
+    """
+    Run SSE workers and restart any that exit unexpectedly.
+
+    Returns when SIGINT or SIGTERM is received, after stopping the workers.
+
+    Args:
+        workers: Number of worker processes
+        server_kwargs: Keyword arguments for each worker's MCPTerminalServer;
+                       its state_dir holds the registry and worker sockets
+                       and defaults to default_state_dir()
+
+    Returns:
+        Process exit status
+    """
+    if not reuseport_supported():
+        raise RuntimeError("Multiple workers need SO_REUSEPORT support")
+
+    state_dir = server_kwargs.get("state_dir") or default_state_dir(
+        server_kwargs["port"]
+    )
+    prepare_state_dir(state_dir)
+    server_kwargs = dict(server_kwargs, state_dir=state_dir)
+    registry = SessionRegistry(os.path.join(state_dir, "registry.db"))
+    # Sessions from an earlier run cannot be reached any more
+    for worker in registry.workers():
+        registry.remove_worker(worker["worker"])
+
+    # Probe the port once so a conflict is reported before spawning workers
+    bind_reuseport(server_kwargs["host"], server_kwargs["port"]).close()
+
+    context = multiprocessing.get_context("spawn")
+    processes: Dict[int, Any] = {}
+    started: Dict[int, float] = {}
+    stopping = threading.Event()
+    status = 0
+
+    def spawn(index: int) -> None:
+        process = context.Process(
+            target=_worker_main,
+            args=(index, server_kwargs),
+            name=f"mcp-terminal-worker-{index}",
+        )
+        process.start()
+        processes[index] = process
+        started[index] = time.monotonic()
+        logger.info(f"Started worker {index} (pid {process.pid})")
+
+    def request_stop(signum, frame) -> None:
+        stopping.set()
+
+    previous = {
+        sig: signal.signal(sig, request_stop) for sig in (signal.SIGINT, signal.SIGTERM)
+    }
+    try:
+        for index in range(workers):
+            spawn(index)
+        while not stopping.wait(SUPERVISE_INTERVAL):
+            for index, process in list(processes.items()):
+                if process.is_alive():
+                    continue
+                registry.remove_worker(f"worker-{index}")
+                if time.monotonic() - started[index] < MIN_WORKER_UPTIME:
+                    logger.error(
+                        f"Worker {index} exited with {process.exitcode} right "
+                        "after starting; stopping"
+                    )
+                    status = 1
+                    stopping.set()
+                    break
+                logger.warning(
+                    f"Worker {index} exited with {process.exitcode}; restarting"
+                )
+                spawn(index)
+    finally:
+        for process in processes.values():
+            if process.is_alive():
+                process.terminate()
+        deadline = (
+            time.monotonic() + server_kwargs.get("shutdown_timeout", 0.0) + STOP_TIMEOUT
+        )
+        for process in processes.values():
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.kill()
+                process.join()
+        for index in processes:
+            registry.remove_worker(f"worker-{index}")
+        registry.close()
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+        logger.info("All workers stopped")
+    return status
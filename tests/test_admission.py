@@ -0,0 +1,182 @@
+"""
+Tests for admission control.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import unittest
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+# Add both src and project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+src_path = os.path.join(project_root, "src")
+sys.path.insert(0, project_root)
+sys.path.insert(0, src_path)
+
+from mcp.server.fastmcp import FastMCP
+
+from mcp_terminal.admission import AdmissionController, Overloaded, TokenBucket
+from mcp_terminal.tools.terminal import TerminalTool
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Test cases for TokenBucket."""
+
+    def test_burst_then_wait(self):
+        """Test that a burst is allowed and then a wait is reported."""
+        bucket = TokenBucket(rate=10, burst=2)
+        self.assertEqual(bucket.take(), 0)
+        self.assertEqual(bucket.take(), 0)
+        wait = bucket.take()
+        self.assertGreater(wait, 0)
+        self.assertLessEqual(wait, 0.1)
+
+
+class TestAdmissionController(IsolatedAsyncioTestCase):
+    """Test cases for AdmissionController."""
+
+    def _controller(self, **kwargs):
+        kwargs.setdefault("max_load", None)
+        kwargs.setdefault("min_free_memory", None)
+        return AdmissionController(**kwargs)
+
+    async def test_queue_then_run(self):
+        """Test that a command waits for a slot freed by another."""
+        admission = self._controller(max_running=1, queue_timeout=5)
+        order = []
+
+        async def command(name, delay):
+            async with admission.admit():
+                order.append(name)
+                await asyncio.sleep(delay)
+
+        first = asyncio.create_task(command("first", 0.05))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(command("second", 0))
+        await asyncio.sleep(0)
+        self.assertEqual(admission.stats()["queued"], 1)
+        await asyncio.gather(first, second)
+        self.assertEqual(order, ["first", "second"])
+        self.assertEqual(admission.running, 0)
+
+    async def test_queue_full(self):
+        """Test that a full queue rejects at once with a retry hint."""
+        admission = self._controller(max_running=1, max_queue=0)
+        async with admission.admit():
+            with self.assertRaises(Overloaded) as cm:
+                async with admission.admit():
+                    pass
+        self.assertEqual(cm.exception.reason, "queue full")
+        self.assertGreater(cm.exception.retry_after_ms, 0)
+        self.assertEqual(admission.rejected, {"queue full": 1})
+
+    async def test_queue_timeout(self):
+        """Test that a command waiting too long is rejected."""
+        admission = self._controller(max_running=1, queue_timeout=0.01)
+        async with admission.admit():
+            with self.assertRaises(Overloaded) as cm:
+                async with admission.admit():
+                    pass
+        self.assertEqual(cm.exception.reason, "queue timeout")
+        self.assertEqual(admission.queued, 0)
+        self.assertEqual(admission.running, 0)
+
+    async def test_rate_limit_per_client(self):
+        """Test that each client has its own token bucket."""
+        admission = self._controller(rate=1)
+        async with admission.admit("a"):
+            pass
+        with self.assertRaises(Overloaded) as cm:
+            async with admission.admit("a"):
+                pass
+        self.assertEqual(cm.exception.reason, "rate limited")
+        async with admission.admit("b"):
+            pass
+        admission.forget("a")
+        async with admission.admit("a"):
+            pass
+
+    async def test_host_signals(self):
+        """Test that high load and low memory reject commands."""
+        admission = AdmissionController(max_load=2.0, min_free_memory=1024)
+        with patch("mcp_terminal.admission.load_per_cpu", return_value=3.0):
+            with self.assertRaises(Overloaded) as cm:
+                async with admission.admit():
+                    pass
+        self.assertEqual(cm.exception.reason, "host load too high")
+
+        admission = AdmissionController(max_load=2.0, min_free_memory=1024)
+        with (
+            patch("mcp_terminal.admission.load_per_cpu", return_value=1.0),
+            patch("mcp_terminal.admission.available_memory", return_value=512),
+        ):
+            with self.assertRaises(Overloaded) as cm:
+                async with admission.admit():
+                    pass
+        self.assertEqual(cm.exception.reason, "host memory too low")
+
+    async def test_close_and_drain(self):
+        """Test that closing rejects new and queued commands, then drains."""
+        admission = self._controller(max_running=1, queue_timeout=5)
+        started = asyncio.Event()
+        finish = asyncio.Event()
+
+        async def command():
+            async with admission.admit():
+                started.set()
+                await finish.wait()
+
+        running = asyncio.create_task(command())
+        await started.wait()
+        queued = asyncio.create_task(command())
+        await asyncio.sleep(0)
+        self.assertEqual(admission.queued, 1)
+
+        admission.close()
+        with self.assertRaises(Overloaded) as cm:
+            await queued
+        self.assertEqual(cm.exception.reason, "server shutting down")
+        with self.assertRaises(Overloaded):
+            async with admission.admit():
+                pass
+        self.assertEqual(admission.rejected, {"server shutting down": 2})
+
+        self.assertFalse(await admission.drain(0.01))
+        asyncio.get_running_loop().call_later(0.01, finish.set)
+        self.assertTrue(await admission.drain(5))
+        await running
+        self.assertEqual(admission.running, 0)
+        self.assertTrue(await admission.drain(0))
+
+
+class TestExecuteCommandAdmission(IsolatedAsyncioTestCase):
+    """Test cases for admission control in execute_command."""
+
+    async def test_overloaded_response(self):
+        """Test that a rejected command returns a structured response."""
+        admission = AdmissionController(
+            max_running=1, max_queue=0, max_load=None, min_free_memory=None
+        )
+        tool = TerminalTool(controller_type="subprocess", admission=admission)
+        mcp = FastMCP("test")
+        tool.register_mcp(mcp)
+
+        async with admission.admit():
+            content = await mcp.call_tool("execute_command", {"command": "echo hi"})
+        response = json.loads(content[0][0].text)
+        self.assertFalse(response["success"])
+        self.assertTrue(response["overloaded"])
+        self.assertGreater(response["retry_after_ms"], 0)
+        self.assertIn("retry after", response["error"])
+
+        content = await mcp.call_tool("execute_command", {"command": "echo hi"})
+        response = json.loads(content[0][0].text)
+        self.assertTrue(response["success"])
+        self.assertFalse(response["overloaded"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,181 @@
+"""
+Tests for per-client terminal controllers.
+"""
+
+import asyncio
+import gc
+import json
+import os
+import sys
+import unittest
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import MagicMock
+
+# Add both src and project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+src_path = os.path.join(project_root, "src")
+sys.path.insert(0, project_root)
+sys.path.insert(0, src_path)
+
+from mcp.server.fastmcp import FastMCP
+
+from mcp_terminal.admission import Overloaded
+from mcp_terminal.controllers.base import BaseTerminalController
+from mcp_terminal.controllers.manager import ControllerManager
+from mcp_terminal.tools.terminal import TerminalTool
+
+
+class FakeController(BaseTerminalController):
+    """Controller recording whether it was cleaned up."""
+
+    def __init__(self):
+        self.closed = False
+
+    async def execute_command(self, command, wait_for_output=True, timeout=10):
+        return {"success": True, "output": command}
+
+    async def get_terminal_type(self):
+        return "fake"
+
+    async def cleanup(self):
+        self.closed = True
+
+
+class Session:
+    """Stand-in for an MCP client session."""
+
+
+class TestControllerManager(IsolatedAsyncioTestCase):
+    """Test cases for ControllerManager."""
+
+    async def asyncSetUp(self):
+        """Set up the test case."""
+        self.manager = ControllerManager(FakeController, max_controllers=2)
+
+    async def asyncTearDown(self):
+        """Tear down the test case."""
+        await self.manager.close()
+
+    async def test_reuse_per_client(self):
+        """Test that a client keeps its controller and others get their own."""
+        async with self.manager.use("a") as first:
+            pass
+        async with self.manager.use("a") as again:
+            pass
+        async with self.manager.use("b") as other:
+            pass
+        self.assertIs(first, again)
+        self.assertIsNot(first, other)
+        self.assertEqual(len(self.manager), 2)
+
+    async def test_evicts_least_recently_used(self):
+        """Test that the least recently used idle controller makes room."""
+        async with self.manager.use("a") as a:
+            pass
+        async with self.manager.use("b") as b:
+            pass
+        async with self.manager.use("a"):
+            pass
+        async with self.manager.use("c"):
+            pass
+        self.assertTrue(b.closed)
+        self.assertFalse(a.closed)
+        self.assertEqual(len(self.manager), 2)
+
+    async def test_busy_limit(self):
+        """Test that busy controllers are never evicted."""
+        async with self.manager.use("a"), self.manager.use("b"):
+            with self.assertRaises(Overloaded):
+                async with self.manager.use("c"):
+                    pass
+            self.assertEqual(self.manager.stats(), {"controllers": 2, "in_use": 2})
+
+    async def test_reap_idle(self):
+        """Test that controllers idle past the TTL are closed."""
+        self.manager.idle_ttl = 0
+        async with self.manager.use("a") as a:
+            self.assertEqual(await self.manager.reap(), 0)
+        self.assertEqual(await self.manager.reap(), 1)
+        self.assertTrue(a.closed)
+        self.assertEqual(len(self.manager), 0)
+
+    async def test_reap_skips_controller_taken_meanwhile(self):
+        """Test that reaping re-checks controllers after each close."""
+        self.manager.idle_ttl = 0
+        async with self.manager.use("a") as a:
+            pass
+        async with self.manager.use("b") as b:
+            pass
+        taken = asyncio.Event()
+
+        async def cleanup():
+            a.closed = True
+            # Another task borrows "b" while "a" is being closed
+            asyncio.get_running_loop().create_task(borrow())
+            await taken.wait()
+
+        async def borrow():
+            async with self.manager.use("b"):
+                taken.set()
+                await asyncio.sleep(0.05)
+
+        a.cleanup = cleanup
+        self.assertEqual(await self.manager.reap(), 1)
+        self.assertTrue(a.closed)
+        self.assertFalse(b.closed)
+        self.assertEqual(len(self.manager), 1)
+        await asyncio.sleep(0.1)
+
+    async def test_release_while_in_use(self):
+        """Test that a released controller closes after its last command."""
+        async with self.manager.use("a") as a:
+            await self.manager.release("a")
+            self.assertFalse(a.closed)
+        self.assertTrue(a.closed)
+        self.assertEqual(len(self.manager), 0)
+
+
+class TestPerClientTerminal(IsolatedAsyncioTestCase):
+    """Test cases for TerminalTool with per-client controllers."""
+
+    async def asyncSetUp(self):
+        """Set up the test case."""
+        self.tool = TerminalTool(controller_type="subprocess", per_client=True)
+        self.mcp = FastMCP("test")
+        self.tool.register_mcp(self.mcp)
+
+    async def asyncTearDown(self):
+        """Tear down the test case."""
+        await self.tool.cleanup()
+
+    async def _execute(self, session):
+        ctx = self.mcp.get_context()
+        ctx._request_context = MagicMock(session=session)
+        async with self.tool._controller_for(ctx) as controller:
+            return controller
+
+    async def test_controller_per_session(self):
+        """Test that sessions are isolated and released when they go away."""
+        first, second = Session(), Session()
+        controller = await self._execute(first)
+        self.assertIs(await self._execute(first), controller)
+        self.assertIsNot(await self._execute(second), controller)
+        self.assertIsNot(controller, self.tool.controller)
+        self.assertEqual(len(self.tool.controllers), 2)
+
+        del first
+        gc.collect()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        self.assertEqual(len(self.tool.controllers), 1)
+        self.assertEqual(len(self.tool.clients), 1)
+
+    async def test_without_session(self):
+        """Test that calls outside a session use the shared controller."""
+        content = await self.mcp.call_tool("get_terminal_info", {})
+        self.assertEqual(json.loads(content[0][0].text)["terminal_type"], "subprocess")
+        self.assertEqual(len(self.tool.controllers), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
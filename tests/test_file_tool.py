@@ -0,0 +1,1222 @@
+"""
+Tests for the file tool.
+"""
+
+import asyncio
+import base64
+import errno
+import hashlib
+import io
+import os
+import sys
+import tarfile
+import tempfile
+import time
+import unittest
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+# Add both src and project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+src_path = os.path.join(project_root, "src")
+sys.path.insert(0, project_root)
+sys.path.insert(0, src_path)
+
+from mcp.server.fastmcp import FastMCP
+
+from mcp_terminal.files import listing as listing_module
+from mcp_terminal.files.atomic import AtomicFile
+from mcp_terminal.files.line_index import LineIndex
+from mcp_terminal.files.watch import Inotify, WatchManager
+from mcp_terminal.tools import file as file_module
+from mcp_terminal.tools.file import (
+    ArchiveAction,
+    BatchWriteEntry,
+    FileTool,
+    SearchReplaceEdit,
+    WriteMode,
+)
+
+
+class TestFileRead(unittest.TestCase):
+    """Test cases for ranged file reads."""
+
+    def setUp(self):
+        """Set up the test case."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "lines.txt")
+        with open(self.path, "w") as f:
+            for i in range(1, 5001):
+                f.write(f"line {i}\n")
+        self.tool = FileTool()
+
+    def tearDown(self):
+        """Clean up test resources."""
+        self.tmpdir.cleanup()
+
+    def test_read_line_range(self):
+        """Test reading an inclusive line range."""
+        result = self.tool.read_file(self.path, start_line=10, end_line=12)
+        self.assertTrue(result.success)
+        self.assertEqual(result.content, "line 10\nline 11\nline 12\n")
+        self.assertEqual(result.start_line, 10)
+        self.assertEqual(result.end_line, 12)
+
+    def test_read_to_end_of_file(self):
+        """Test reading from a line to the end of the file."""
+        result = self.tool.read_file(self.path, start_line=4999)
+        self.assertEqual(result.content, "line 4999\nline 5000\n")
+        self.assertEqual(result.end_line, 5000)
+
+    def test_read_past_end_of_file(self):
+        """Test that reading past the last line returns no content."""
+        result = self.tool.read_file(self.path, start_line=6000, end_line=6010)
+        self.assertTrue(result.success)
+        self.assertEqual(result.content, "")
+        self.assertIsNone(result.end_line)
+
+    def test_read_byte_range(self):
+        """Test reading a byte range."""
+        result = self.tool.read_file(self.path, offset=5, length=3)
+        self.assertEqual(result.content, "1\nl")
+        self.assertEqual(result.length, 3)
+        self.assertFalse(result.truncated)
+
+    def test_max_bytes_truncates_on_line_boundary(self):
+        """Test that truncated line reads end on a full line."""
+        result = self.tool.read_file(self.path, start_line=1, max_bytes=20)
+        self.assertTrue(result.truncated)
+        self.assertEqual(result.content, "line 1\nline 2\n")
+        self.assertEqual(result.end_line, 2)
+
+    def test_mixed_ranges_rejected(self):
+        """Test that line and byte ranges cannot be combined."""
+        result = self.tool.read_file(self.path, start_line=1, offset=0)
+        self.assertFalse(result.success)
+        self.assertIn("either", result.error)
+
+    def test_missing_file(self):
+        """Test reading a file that does not exist."""
+        result = self.tool.read_file(os.path.join(self.tmpdir.name, "missing"))
+        self.assertFalse(result.success)
+
+    def test_large_file_uses_cached_index(self):
+        """Test that large files are indexed once and revalidated on change."""
+        original = file_module.MMAP_THRESHOLD
+        file_module.MMAP_THRESHOLD = 1
+        try:
+            result = self.tool.read_file(self.path, start_line=3000, end_line=3000)
+            self.assertEqual(result.content, "line 3000\n")
+            self.assertEqual(len(self.tool.line_indexes), 1)
+
+            index = self.tool.line_indexes.get(
+                os.path.realpath(self.path), os.stat(self.path)
+            )
+            self.tool.read_file(self.path, start_line=10, end_line=10)
+            self.assertIs(
+                index,
+                self.tool.line_indexes.get(
+                    os.path.realpath(self.path), os.stat(self.path)
+                ),
+            )
+
+            with open(self.path, "a") as f:
+                f.write("line 5001\n")
+            result = self.tool.read_file(self.path, start_line=5001)
+            self.assertEqual(result.content, "line 5001\n")
+        finally:
+            file_module.MMAP_THRESHOLD = original
+
+
+class TestFileModify(unittest.TestCase):
+    """Test cases for streaming file modifications."""
+
+    def setUp(self):
+        """Set up the test case."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "edit.txt")
+        with open(self.path, "w") as f:
+            f.write("one\ntwo\nthree\n")
+        self.tool = FileTool()
+
+    def tearDown(self):
+        """Clean up test resources."""
+        self.tmpdir.cleanup()
+
+    def _content(self) -> str:
+        with open(self.path) as f:
+            return f.read()
+
+    def test_insert_at_byte_offset(self):
+        """Test inserting at a byte offset."""
+        result = self.tool.modify_file(self.path, "X", WriteMode.INSERT, position=4)
+        self.assertTrue(result.success)
+        self.assertEqual(self._content(), "one\nXtwo\nthree\n")
+        self.assertEqual(result.details["position"], 4)
+
+    def test_insert_before_line(self):
+        """Test inserting whole lines before a line number."""
+        self.tool.modify_file(self.path, "new", WriteMode.INSERT, line=2)
+        self.assertEqual(self._content(), "one\nnew\ntwo\nthree\n")
+
+    def test_insert_after_last_line(self):
+        """Test inserting past the last line appends."""
+        self.tool.modify_file(self.path, "four\n", WriteMode.INSERT, line=10)
+        self.assertEqual(self._content(), "one\ntwo\nthree\nfour\n")
+
+    def test_insert_requires_position(self):
+        """Test that INSERT without a position fails."""
+        result = self.tool.modify_file(self.path, "X", WriteMode.INSERT)
+        self.assertFalse(result.success)
+        self.assertIn("Position", result.error)
+
+    def test_insert_inside_multibyte_character(self):
+        """Test that byte offsets may not split a character."""
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("é")
+        result = self.tool.modify_file(self.path, "X", WriteMode.INSERT, position=1)
+        self.assertFalse(result.success)
+        self.assertEqual(self._content(), "é")
+
+    def test_replace_lines(self):
+        """Test replacing a range of lines."""
+        result = self.tool.modify_file(
+            self.path, "TWO\nTHREE", WriteMode.REPLACE, line=2, end_line=3
+        )
+        self.assertTrue(result.success)
+        self.assertEqual(self._content(), "one\nTWO\nTHREE\n")
+
+    def test_delete_lines(self):
+        """Test deleting a line."""
+        self.tool.modify_file(self.path, mode=WriteMode.DELETE, line=1)
+        self.assertEqual(self._content(), "two\nthree\n")
+
+    def test_replace_beyond_end_fails(self):
+        """Test that replacing lines past the end of the file fails."""
+        result = self.tool.modify_file(self.path, "x", WriteMode.REPLACE, line=9)
+        self.assertFalse(result.success)
+        self.assertEqual(self._content(), "one\ntwo\nthree\n")
+
+    def test_overwrite_preserves_mode_and_leaves_no_temp_files(self):
+        """Test that atomic overwrites keep permissions and clean up."""
+        os.chmod(self.path, 0o640)
+        self.tool.modify_file(self.path, "replaced")
+        self.assertEqual(self._content(), "replaced")
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o640)
+        self.assertEqual(os.listdir(self.tmpdir.name), ["edit.txt"])
+
+    def test_create_dirs(self):
+        """Test that missing parent directories are created."""
+        path = os.path.join(self.tmpdir.name, "a", "b", "c.txt")
+        result = self.tool.modify_file(path, "hi")
+        self.assertTrue(result.success)
+        with open(path) as f:
+            self.assertEqual(f.read(), "hi")
+
+
+class TestFilePatch(unittest.TestCase):
+    """Test cases for applying patches."""
+
+    def setUp(self):
+        """Set up the test case."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "code.py")
+        self.original = "".join(f"line {i}\n" for i in range(1, 21))
+        with open(self.path, "w") as f:
+            f.write(self.original)
+        self.tool = FileTool()
+
+    def tearDown(self):
+        """Clean up test resources."""
+        self.tmpdir.cleanup()
+
+    def _content(self) -> str:
+        with open(self.path) as f:
+            return f.read()
+
+    def test_apply_multiple_hunks(self):
+        """Test applying a diff with two hunks."""
+        diff = (
+            "--- a/code.py\n+++ b/code.py\n"
+            "@@ -2,3 +2,3 @@\n line 2\n-line 3\n+LINE 3\n line 4\n"
+            "@@ -15,3 +15,4 @@\n line 15\n line 16\n+inserted\n line 17\n"
+        )
+        result = self.tool.patch_file(self.path, diff=diff)
+        self.assertTrue(result.success, result.error)
+        self.assertEqual([h.applied for h in result.hunks], [True, True])
+        expected = self.original.replace("line 3\n", "LINE 3\n").replace(
+            "line 16\n", "line 16\ninserted\n"
+        )
+        self.assertEqual(self._content(), expected)
+
+    def test_offset_is_reported(self):
+        """Test that a hunk found away from its header reports the offset."""
+        diff = "@@ -5,3 +5,3 @@\n line 8\n-line 9\n+LINE 9\n line 10\n"
+        result = self.tool.patch_file(self.path, diff=diff)
+        self.assertTrue(result.success)
+        self.assertEqual(result.hunks[0].offset, 3)
+        self.assertEqual(result.hunks[0].fuzz, 0)
+        self.assertIn("LINE 9\n", self._content())
+
+    def test_fuzz_is_reported(self):
+        """Test that stale context lines are ignored up to max_fuzz."""
+        diff = "@@ -4,3 +4,3 @@\n stale\n-line 5\n+LINE 5\n line 6\n"
+        result = self.tool.patch_file(self.path, diff=diff)
+        self.assertTrue(result.success)
+        self.assertEqual(result.hunks[0].fuzz, 1)
+        self.assertIn("line 4\nLINE 5\nline 6\n", self._content())
+
+        strict = self.tool.patch_file(self.path, diff=diff, max_fuzz=0)
+        self.assertFalse(strict.success)
+
+    def test_failed_hunk_leaves_file_untouched(self):
+        """Test that a patch is applied entirely or not at all."""
+        diff = (
+            "@@ -1,1 +1,1 @@\n-line 1\n+LINE 1\n"
+            "@@ -10,1 +10,1 @@\n-missing\n+whatever\n"
+        )
+        result = self.tool.patch_file(self.path, diff=diff, max_fuzz=0)
+        self.assertFalse(result.success)
+        self.assertEqual([h.applied for h in result.hunks], [True, False])
+        self.assertEqual(self._content(), self.original)
+
+    def test_dry_run(self):
+        """Test that a dry run does not write."""
+        diff = "@@ -1,1 +1,1 @@\n-line 1\n+LINE 1\n"
+        result = self.tool.patch_file(self.path, diff=diff, dry_run=True)
+        self.assertTrue(result.success)
+        self.assertEqual(self._content(), self.original)
+
+    def test_search_replace(self):
+        """Test exact search/replace edits."""
+        edits = [
+            SearchReplaceEdit(search="line 2\n", replace="two\n"),
+            SearchReplaceEdit(search="line 20\n", replace=""),
+        ]
+        result = self.tool.patch_file(self.path, edits=edits)
+        self.assertTrue(result.success)
+        self.assertEqual(result.hunks[0].line, 2)
+        content = self._content()
+        self.assertTrue(content.startswith("line 1\ntwo\nline 3\n"))
+        self.assertTrue(content.endswith("line 19\n"))
+
+    def test_ambiguous_search_fails(self):
+        """Test that search text must be unique."""
+        edits = [SearchReplaceEdit(search="line 1", replace="x")]
+        result = self.tool.patch_file(self.path, edits=edits)
+        self.assertFalse(result.success)
+        self.assertIn("more than once", result.hunks[0].error)
+
+
+class TestFileBatch(unittest.TestCase):
+    """Test cases for transactional batch writes."""
+
+    def setUp(self):
+        """Set up the test case."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.paths = [os.path.join(self.tmpdir.name, f"f{i}.txt") for i in range(3)]
+        for path in self.paths:
+            with open(path, "w") as f:
+                f.write("old")
+        self.tool = FileTool()
+
+    def tearDown(self):
+        """Clean up test resources."""
+        self.tmpdir.cleanup()
+
+    def _contents(self):
+        result = []
+        for path in self.paths:
+            with open(path) as f:
+                result.append(f.read())
+        return result
+
+    def test_batch_write(self):
+        """Test writing several files, including a new one in a new directory."""
+        new_path = os.path.join(self.tmpdir.name, "sub", "new.txt")
+        entries = [BatchWriteEntry(filepath=p, content="new") for p in self.paths]
+        entries.append(BatchWriteEntry(filepath=new_path, content="fresh"))
+
+        result = self.tool.batch_write(entries)
+        self.assertTrue(result.success, result.error)
+        self.assertEqual(result.bytes_written, 14)
+        self.assertEqual(self._contents(), ["new"] * 3)
+        with open(new_path) as f:
+            self.assertEqual(f.read(), "fresh")
+        self.assertEqual(
+            sorted(os.listdir(self.tmpdir.name)), ["f0.txt", "f1.txt", "f2.txt", "sub"]
+        )
+
+    def test_staging_failure_changes_nothing(self):
+        """Test that a file that cannot be staged aborts the whole batch."""
+        missing = os.path.join(self.tmpdir.name, "nodir", "x.txt")
+        entries = [BatchWriteEntry(filepath=p, content="new") for p in self.paths]
+        entries.append(BatchWriteEntry(filepath=missing, content="x"))
+
+        result = self.tool.batch_write(entries, create_dirs=False)
+        self.assertFalse(result.success)
+        self.assertEqual(self._contents(), ["old"] * 3)
+        self.assertEqual(len(os.listdir(self.tmpdir.name)), 3)
+
+    def test_rename_failure_rolls_back(self):
+        """Test that files already renamed are restored if a later rename fails."""
+        original_publish = AtomicFile.publish
+        calls = []
+
+        def failing_publish(atomic):
+            calls.append(atomic.path)
+            if len(calls) == 3:
+                raise OSError("disk on fire")
+            original_publish(atomic)
+
+        entries = [BatchWriteEntry(filepath=p, content="new") for p in self.paths]
+        with patch.object(AtomicFile, "publish", failing_publish):
+            result = self.tool.batch_write(entries)
+
+        self.assertFalse(result.success)
+        self.assertIn("disk on fire", result.error)
+        self.assertEqual(self._contents(), ["old"] * 3)
+        self.assertEqual(len(os.listdir(self.tmpdir.name)), 3)
+
+    def test_duplicate_paths_rejected(self):
+        """Test that a file may only appear once in a batch."""
+        entries = [BatchWriteEntry(filepath=self.paths[0], content="a")] * 2
+        result = self.tool.batch_write(entries)
+        self.assertFalse(result.success)
+        self.assertEqual(self._contents(), ["old"] * 3)
+
+
+class TestFileToolConcurrency(IsolatedAsyncioTestCase):
+    """Test cases for running file operations off the event loop."""
+
+    async def asyncSetUp(self):
+        """Set up the test case."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.tool = FileTool(max_workers=4)
+        self.mcp = FastMCP("test")
+        self.tool.register_mcp(self.mcp)
+
+    async def asyncTearDown(self):
+        """Clean up test resources."""
+        await self.tool.cleanup()
+        self.tmpdir.cleanup()
+
+    async def _max_loop_lag(self, work) -> float:
+        """Run work while measuring the longest stall of the event loop."""
+        lags = []
+        done = False
+
+        async def heartbeat():
+            interval = 0.005
+            while not done:
+                start = time.perf_counter()
+                await asyncio.sleep(interval)
+                lags.append(time.perf_counter() - start - interval)
+
+        monitor = asyncio.create_task(heartbeat())
+        await asyncio.sleep(0)
+        try:
+            await work
+        finally:
+            done = True
+            await monitor
+        return max(lags)
+
+    async def test_large_writes_do_not_block_event_loop(self):
+        """Test that concurrent large writes leave the event loop responsive."""
+        content = "x" * (4 * 1024 * 1024)
+        paths = [os.path.join(self.tmpdir.name, f"big{i}.txt") for i in range(6)]
+
+        # The same writes run inline on the loop for comparison
+        async def blocking():
+            for path in paths:
+                self.tool.modify_file(path, content)
+
+        async def offloaded():
+            await asyncio.gather(
+                *(
+                    self.mcp.call_tool(
+                        "file_modify", {"filepath": path, "content": content}
+                    )
+                    for path in paths
+                )
+            )
+
+        # Simulate a slow (e.g. network) filesystem where syncs take a while
+        with patch("os.fsync", side_effect=lambda fd: time.sleep(0.05)):
+            blocked = await self._max_loop_lag(blocking())
+            lag = await self._max_loop_lag(offloaded())
+
+        for path in paths:
+            self.assertEqual(os.path.getsize(path), len(content))
+        self.assertGreater(blocked, 0.25)
+        self.assertLess(lag, 0.1)
+
+    async def test_same_path_operations_serialize(self):
+        """Test that concurrent edits to one file do not lose updates."""
+        path = os.path.join(self.tmpdir.name, "shared.txt")
+        self.tool.modify_file(path, "")
+
+        await asyncio.gather(
+            *(
+                self.mcp.call_tool(
+                    "file_modify",
+                    {"filepath": path, "content": f"{i}", "mode": "insert", "line": 1},
+                )
+                for i in range(20)
+            )
+        )
+
+        with open(path) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(sorted(lines, key=int), [str(i) for i in range(20)])
+        self.assertEqual(self.tool.io._locks, {})
+
+
+class TestFileTransfer(unittest.TestCase):
+    """Test cases for chunked uploads and downloads."""
+
+    def setUp(self):
+        """Set up the test case."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.tmpdir.name, "blob.bin")
+        self.payload = bytes(range(256)) * 40
+        self.tool = FileTool()
+
+    def tearDown(self):
+        """Clean up test resources."""
+        self.tool.uploads.clear()
+        self.tmpdir.cleanup()
+
+    def _chunk(self, upload_id, offset, data, **kwargs):
+        encoded = base64.b64encode(data).decode("ascii")
+        return self.tool.upload_chunk(upload_id, offset, encoded, **kwargs)
+
+    def test_upload_in_chunks(self):
+        """Test that chunks are assembled and committed atomically."""
+        begin = self.tool.begin_upload(self.filepath, size=len(self.payload))
+        self.assertTrue(begin.success, begin.error)
+        for offset in range(0, len(self.payload), 4096):
+            chunk = self.payload[offset : offset + 4096]
+            result = self._chunk(
+                begin.upload_id,
+                offset,
+                chunk,
+                sha256=hashlib.sha256(chunk).hexdigest(),
+            )
+            self.assertTrue(result.success, result.error)
+            self.assertFalse(os.path.exists(self.filepath))
+
+        digest = hashlib.sha256(self.payload).hexdigest()
+        result = self.tool.commit_upload(begin.upload_id, sha256=digest)
+        self.assertTrue(result.success, result.error)
+        self.assertEqual(result.sha256, digest)
+        with open(self.filepath, "rb") as f:
+            self.assertEqual(f.read(), self.payload)
+        self.assertEqual(os.listdir(self.tmpdir.name), ["blob.bin"])
+
+    def test_resume_from_acknowledged_offset(self):
+        """Test that an interrupted upload continues where it stopped."""
+        begin = self.tool.begin_upload(self.filepath)
+        self._chunk(begin.upload_id, 0, self.payload[:1000])
+
+        # A retransmitted or skipped chunk reports where to resume
+        result = self._chunk(begin.upload_id, 500, self.payload[500:1500])
+        self.assertFalse(result.success)
+        self.assertEqual(result.offset, 1000)
+
+        again = self.tool.begin_upload(self.filepath)
+        self.assertEqual(again.upload_id, begin.upload_id)
+        self.assertEqual(again.offset, 1000)
+        self._chunk(begin.upload_id, 1000, self.payload[1000:])
+        self.assertTrue(self.tool.commit_upload(begin.upload_id).success)
+        with open(self.filepath, "rb") as f:
+            self.assertEqual(f.read(), self.payload)
+
+    def test_bad_chunk_rejected(self):
+        """Test that corrupt chunks are not acknowledged."""
+        begin = self.tool.begin_upload(self.filepath, size=10)
+        result = self._chunk(begin.upload_id, 0, b"12345", sha256="0" * 64)
+        self.assertFalse(result.success)
+        self.assertEqual(result.offset, 0)
+
+        result = self.tool.upload_chunk(begin.upload_id, 0, "not base64!")
+        self.assertFalse(result.success)
+
+        self._chunk(begin.upload_id, 0, b"12345")
+        result = self.tool.commit_upload(begin.upload_id)
+        self.assertFalse(result.success)
+        self.assertIn("incomplete", result.error)
+
+    def test_abort_keeps_original(self):
+        """Test that aborting leaves the target untouched."""
+        with open(self.filepath, "wb") as f:
+            f.write(b"original")
+        begin = self.tool.begin_upload(self.filepath)
+        self._chunk(begin.upload_id, 0, b"replacement")
+        self.assertTrue(self.tool.abort_upload(begin.upload_id).success)
+        self.assertFalse(self.tool.commit_upload(begin.upload_id).success)
+        with open(self.filepath, "rb") as f:
+            self.assertEqual(f.read(), b"original")
+        self.assertEqual(os.listdir(self.tmpdir.name), ["blob.bin"])
+
+    def test_download_in_chunks(self):
+        """Test that a file can be downloaded chunk by chunk."""
+        with open(self.filepath, "wb") as f:
+            f.write(self.payload)
+
+        received = b""
+        offset, version = 0, None
+        while offset is not None:
+            result = self.tool.download_file(self.filepath, offset, 3000, version)
+            self.assertTrue(result.success, result.error)
+            chunk = base64.b64decode(result.data)
+            self.assertEqual(hashlib.sha256(chunk).hexdigest(), result.sha256)
+            received += chunk
+            offset, version = result.next_offset, result.version
+        self.assertEqual(received, self.payload)
+
+    def test_download_detects_change(self):
+        """Test that a changed file fails a download that is in progress."""
+        with open(self.filepath, "wb") as f:
+            f.write(self.payload)
+        first = self.tool.download_file(self.filepath, 0, 100)
+        with open(self.filepath, "ab") as f:
+            f.write(b"more")
+        result = self.tool.download_file(self.filepath, 100, 100, first.version)
+        self.assertFalse(result.success)
+
+
+class TestFileSearch(unittest.TestCase):
+    """Test cases for in-process file search."""
+
+    def setUp(self):
+        """Set up the test case."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = self.tmpdir.name
+        files = {
+            ".gitignore": "build/\n*.log\n!keep.log\n",
+            "src/app.py": "import os\n\ndef main():\n    return os.getcwd()\n",
+            "src/util.py": "def helper():\n    pass  # TODO main\n",
+            "src/nested/.gitignore": "generated.py\n",
+            "src/nested/generated.py": "def main(): pass\n",
+            "build/out.py": "def main(): pass\n",
+            "debug.log": "main crashed\n",
+            "keep.log": "main kept\n",
+            "node_modules/pkg/index.py": "def main(): pass\n",
+            ".git/HEAD": "main\n",
+            "image.bin": "main\0binary",
+        }
+        for rel_path, content in files.items():
+            path = os.path.join(self.root, rel_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(content)
+        self.tool = FileTool(max_workers=2)
+
+    def tearDown(self):
+        """Clean up test resources."""
+        self.tmpdir.cleanup()
+
+    def test_search_honors_ignores(self):
+        """Test that ignored, excluded and binary files are skipped."""
+        result = self.tool.search(self.root, pattern="main")
+        self.assertTrue(result.success, result.error)
+        found = [(m.path, m.line, m.column) for m in result.matches]
+        self.assertEqual(
+            found,
+            [
+                ("keep.log", 1, 1),
+                ("src/app.py", 3, 5),
+                ("src/util.py", 2, 18),
+            ],
+        )
+        self.assertIsNone(result.next_offset)
+
+    def test_search_without_gitignore(self):
+        """Test that gitignore handling can be disabled."""
+        result = self.tool.search(self.root, pattern="def main", use_gitignore=False)
+        paths = [m.path for m in result.matches]
+        self.assertIn("build/out.py", paths)
+        self.assertIn("src/nested/generated.py", paths)
+        self.assertNotIn("node_modules/pkg/index.py", paths)
+
+    def test_glob_and_flags(self):
+        """Test glob filtering, literal patterns and case folding."""
+        result = self.tool.search(
+            self.root,
+            pattern="OS.GETCWD()",
+            glob="*.py",
+            ignore_case=True,
+            fixed_strings=True,
+        )
+        self.assertEqual([m.path for m in result.matches], ["src/app.py"])
+        self.assertEqual(result.matches[0].text, "    return os.getcwd()")
+
+    def test_list_files_by_glob(self):
+        """Test listing files without a content pattern."""
+        result = self.tool.search(self.root, glob="src/**/*.py")
+        self.assertEqual(
+            [m.path for m in result.matches], ["src/app.py", "src/util.py"]
+        )
+        self.assertIsNone(result.matches[0].line)
+
+    def test_pagination(self):
+        """Test paging through results."""
+        first = self.tool.search(self.root, pattern="main", limit=2)
+        self.assertEqual(len(first.matches), 2)
+        self.assertEqual(first.next_offset, 2)
+        second = self.tool.search(self.root, pattern="main", offset=2, limit=2)
+        self.assertEqual([m.path for m in second.matches], ["src/util.py"])
+        self.assertIsNone(second.next_offset)
+
+    def test_invalid_pattern(self):
+        """Test that an invalid regular expression is reported."""
+        result = self.tool.search(self.root, pattern="(")
+        self.assertFalse(result.success)
+
+
+class TestFileCopy(unittest.TestCase):
+    """Test cases for copying, moving and archiving."""
+
+    def setUp(self):
+        """Set up the test case."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = self.tmpdir.name
+        self.src = os.path.join(self.root, "src")
+        self.files = {"a.txt": b"alpha", "sub/b.bin": bytes(range(256)) * 64}
+        for rel_path, data in self.files.items():
+            path = os.path.join(self.src, rel_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(data)
+        os.symlink("a.txt", os.path.join(self.src, "link"))
+        self.tool = FileTool()
+
+    def tearDown(self):
+        """Clean up test resources."""
+        self.tmpdir.cleanup()
+
+    def _assert_tree(self, root):
+        for rel_path, data in self.files.items():
+            with open(os.path.join(root, rel_path), "rb") as f:
+                self.assertEqual(f.read(), data)
+        self.assertEqual(os.readlink(os.path.join(root, "link")), "a.txt")
+
+    def test_copy_file(self):
+        """Test copying a single file with statistics."""
+        os.chmod(os.path.join(self.src, "a.txt"), 0o640)
+        dst = os.path.join(self.root, "copy.txt")
+        result = self.tool.copy(os.path.join(self.src, "a.txt"), dst)
+        self.assertTrue(result.success, result.error)
+        self.assertEqual(result.bytes_transferred, 5)
+        self.assertIn(result.method, ("copy_file_range", "sendfile", "read_write"))
+        self.assertEqual(os.stat(dst).st_mode & 0o777, 0o640)
+
+        again = self.tool.copy(os.path.join(self.src, "a.txt"), dst)
+        self.assertFalse(again.success)
+
+    def test_copy_falls_back_to_read_write(self):
+        """Test the fallback when in-kernel copies are unavailable."""
+        unsupported = OSError(errno.ENOSYS, "not supported")
+        with (
+            patch("os.copy_file_range", side_effect=unsupported, create=True),
+            patch("os.sendfile", side_effect=unsupported),
+        ):
+            result = self.tool.copy(
+                os.path.join(self.src, "sub/b.bin"), os.path.join(self.root, "b")
+            )
+        self.assertEqual(result.method, "read_write")
+        with open(os.path.join(self.root, "b"), "rb") as f:
+            self.assertEqual(f.read(), self.files["sub/b.bin"])
+
+    def test_copy_tree_into_directory(self):
+        """Test copying a tree into an existing directory."""
+        target = os.path.join(self.root, "out")
+        os.mkdir(target)
+        result = self.tool.copy(self.src, target)
+        self.assertTrue(result.success, result.error)
+        self.assertEqual(result.files, 3)
+        self._assert_tree(os.path.join(target, "src"))
+
+        inside = self.tool.copy(self.src, os.path.join(self.src, "sub"))
+        self.assertFalse(inside.success)
+
+    def test_move_renames(self):
+        """Test that moves on one filesystem are renames."""
+        dst = os.path.join(self.root, "moved")
+        result = self.tool.move(self.src, dst)
+        self.assertTrue(result.success, result.error)
+        self.assertEqual(result.method, "rename")
+        self.assertFalse(os.path.exists(self.src))
+        self._assert_tree(dst)
+
+    def test_move_across_filesystems(self):
+        """Test the copy-and-delete path used across filesystems."""
+        real_replace = os.replace
+
+        def cross_device(src, dst):
+            if src == self.src:
+                raise OSError(errno.EXDEV, "cross-device link")
+            return real_replace(src, dst)
+
+        dst = os.path.join(self.root, "moved")
+        with patch("mcp_terminal.files.copy.os.replace", side_effect=cross_device):
+            result = self.tool.move(self.src, dst)
+        self.assertTrue(result.success, result.error)
+        self.assertEqual(result.files, 3)
+        self.assertEqual(result.bytes_transferred, sum(map(len, self.files.values())))
+        self.assertFalse(os.path.exists(self.src))
+        self._assert_tree(dst)
+
+    def test_archive_round_trip(self):
+        """Test creating and extracting tar and zip archives."""
+        for name in ["out.tar.gz", "out.zip"]:
+            archive = os.path.join(self.root, name)
+            created = self.tool.archive(ArchiveAction.CREATE, archive, [self.src])
+            self.assertTrue(created.success, created.error)
+            self.assertEqual(
+                created.bytes_transferred, sum(map(len, self.files.values()))
+            )
+
+            dest = os.path.join(self.root, name + ".d")
+            extracted = self.tool.archive(
+                ArchiveAction.EXTRACT, archive, destination=dest
+            )
+            self.assertTrue(extracted.success, extracted.error)
+            for rel_path, data in self.files.items():
+                with open(os.path.join(dest, "src", rel_path), "rb") as f:
+                    self.assertEqual(f.read(), data)
+
+    def test_extract_replaces_files_atomically(self):
+        """Test that extracted files are renamed into place whole."""
+        archive = os.path.join(self.root, "new.tar")
+        with tarfile.open(archive, "w") as tar:
+            info = tarfile.TarInfo("data.txt")
+            info.size, info.mode, info.mtime = 3, 0o640, 1000
+            tar.addfile(info, io.BytesIO(b"new"))
+        dest = os.path.join(self.root, "dest")
+        os.makedirs(dest)
+        target = os.path.join(dest, "data.txt")
+        with open(target, "wb") as f:
+            f.write(b"old")
+
+        with open(target, "rb") as reader:
+            result = self.tool.archive(
+                ArchiveAction.EXTRACT, archive, destination=dest, overwrite=True
+            )
+            self.assertTrue(result.success, result.error)
+            # A reader of the old file never sees the new content mixed in
+            self.assertEqual(reader.read(), b"old")
+        with open(target, "rb") as f:
+            self.assertEqual(f.read(), b"new")
+        st = os.stat(target)
+        self.assertEqual(st.st_mode & 0o777, 0o640)
+        self.assertEqual(st.st_mtime, 1000)
+        self.assertEqual(os.listdir(dest), ["data.txt"])
+
+    def test_extract_refuses_escaping_members(self):
+        """Test that members outside the destination are refused."""
+        for name, kind, target in [
+            ("../evil.txt", tarfile.REGTYPE, ""),
+            ("link", tarfile.SYMTYPE, "/etc/passwd"),
+        ]:
+            archive = os.path.join(self.root, "evil.tar")
+            with tarfile.open(archive, "w") as tar:
+                info = tarfile.TarInfo(name)
+                info.type = kind
+                info.linkname = target
+                tar.addfile(info, io.BytesIO(b""))
+            result = self.tool.archive(
+                ArchiveAction.EXTRACT,
+                archive,
+                destination=os.path.join(self.root, "dest"),
+            )
+            self.assertFalse(result.success)
+            self.assertFalse(os.path.exists(os.path.join(self.root, "evil.txt")))
+            self.assertFalse(os.path.lexists(os.path.join(self.root, "dest/link")))
+
+
+class TestFileHash(unittest.TestCase):
+    """Test cases for parallel file hashing."""
+
+    def setUp(self):
+        """Set up the test case."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = self.tmpdir.name
+        self.contents = {"a.bin": b"alpha", "dist/b.bin": b"beta" * 100000}
+        for rel_path, data in self.contents.items():
+            path = os.path.join(self.root, rel_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(data)
+            os.utime(path, (1, 1))
+        self.tool = FileTool()
+
+    def tearDown(self):
+        """Clean up test resources."""
+        self.tmpdir.cleanup()
+
+    def test_hash_glob(self):
+        """Test hashing every file matching a glob."""
+        result = self.tool.hash_files(glob="*.bin", root=self.root)
+        self.assertTrue(result.success, result.error)
+        digests = {entry.path: entry.digest for entry in result.files}
+        self.assertEqual(
+            digests,
+            {
+                name: hashlib.sha256(data).hexdigest()
+                for name, data in self.contents.items()
+            },
+        )
+
+    def test_algorithms(self):
+        """Test that other algorithms are supported and unknown ones rejected."""
+        path = os.path.join(self.root, "a.bin")
+        result = self.tool.hash_files([path], algorithm="md5")
+        self.assertEqual(result.files[0].digest, hashlib.md5(b"alpha").hexdigest())
+        self.assertFalse(self.tool.hash_files([path], algorithm="crc").success)
+
+    def test_unchanged_files_not_rehashed(self):
+        """Test that digests are cached by inode, size and mtime."""
+        path = os.path.join(self.root, "a.bin")
+        self.assertFalse(self.tool.hash_files([path]).files[0].cached)
+        self.assertTrue(self.tool.hash_files([path]).files[0].cached)
+
+        with open(path, "wb") as f:
+            f.write(b"ALPHA")
+        os.utime(path, (2, 2))
+        entry = self.tool.hash_files([path]).files[0]
+        self.assertFalse(entry.cached)
+        self.assertEqual(entry.digest, hashlib.sha256(b"ALPHA").hexdigest())
+
+    def test_verify_expected(self):
+        """Test checking digests against expected values."""
+        expected = {
+            "a.bin": hashlib.sha256(b"alpha").hexdigest(),
+            "dist/b.bin": "0" * 64,
+        }
+        result = self.tool.hash_files(glob="*.bin", root=self.root, expected=expected)
+        matches = {entry.path: entry.matches for entry in result.files}
+        self.assertEqual(matches, {"a.bin": True, "dist/b.bin": False})
+        self.assertFalse(result.verified)
+
+    def test_missing_file_reported(self):
+        """Test that unreadable files are reported without failing the call."""
+        result = self.tool.hash_files([os.path.join(self.root, "missing")])
+        self.assertTrue(result.success)
+        self.assertIsNotNone(result.files[0].error)
+
+
+class TestFileWatch(IsolatedAsyncioTestCase):
+    """Test cases for filesystem watches, using the polling backend."""
+
+    use_inotify = False
+
+    async def asyncSetUp(self):
+        """Set up the test case."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = self.tmpdir.name
+        self.tool = FileTool()
+        self.tool.watches = WatchManager(
+            use_inotify=self.use_inotify, max_per_client=2, poll_interval=0.05
+        )
+        self.batches = []
+
+    async def asyncTearDown(self):
+        """Clean up test resources."""
+        await self.tool.cleanup()
+        self.tmpdir.cleanup()
+
+    async def _notify(self, watch_id, changes):
+        self.batches.append(changes)
+
+    async def _watch(self, path=None, **kwargs):
+        result = await self.tool.watch(
+            "client", self._notify, path or self.root, debounce_ms=100, **kwargs
+        )
+        self.assertTrue(result.success, result.error)
+        return result
+
+    async def _settle(self):
+        """Wait for detection plus the debounce window."""
+        await asyncio.sleep(0.4)
+
+    def _write(self, name, text):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    async def test_reports_created_modified_deleted(self):
+        """Test the three kinds of change."""
+        self._write("old.txt", "old")
+        gone = self._write("gone.txt", "gone")
+        await self._watch()
+
+        self._write("new.txt", "new")
+        self._write("old.txt", "changed")
+        os.unlink(gone)
+        await self._settle()
+
+        changes = [change for batch in self.batches for change in batch]
+        self.assertEqual(
+            sorted(changes),
+            [
+                ("gone.txt", "deleted"),
+                ("new.txt", "created"),
+                ("old.txt", "modified"),
+            ],
+        )
+
+    async def test_burst_coalesced(self):
+        """Test that many writes within the window become one change."""
+        path = self._write("log.txt", "")
+        await self._watch()
+        for i in range(50):
+            with open(path, "a") as f:
+                f.write(f"line {i}\n")
+        await self._settle()
+        self.assertEqual(self.batches, [[("log.txt", "modified")]])
+
+    async def test_file_and_glob_filters(self):
+        """Test watching a single file and filtering by glob."""
+        target = self._write("watched.txt", "a")
+        await self._watch(target)
+        await self._watch(glob="*.py")
+
+        self.tool.modify_file(target, "b")
+        self._write("other.txt", "x")
+        self._write("pkg/mod.py", "x")
+        await self._settle()
+
+        changes = sorted(change for batch in self.batches for change in batch)
+        self.assertEqual(
+            changes, [("pkg/mod.py", "created"), ("watched.txt", "modified")]
+        )
+
+    async def test_per_client_limit_and_unwatch(self):
+        """Test the watch limit and removing watches."""
+        first = await self._watch()
+        await self._watch()
+        result = await self.tool.watch("client", self._notify, self.root)
+        self.assertFalse(result.success)
+        self.assertIn("limit", result.error)
+
+        self.assertTrue(self.tool.unwatch("client", first.watch_id).success)
+        self.assertFalse(self.tool.unwatch("other", first.watch_id).success)
+        self.assertEqual(len(self.tool.watches.client_watches("client")), 1)
+
+    async def test_unreachable_client_dropped(self):
+        """Test that a failed delivery removes the client's watches."""
+
+        async def closed(watch_id, changes):
+            raise ConnectionError("closed")
+
+        await self.tool.watch("gone", closed, self.root, debounce_ms=50)
+        self._write("x.txt", "x")
+        await self._settle()
+        self.assertEqual(self.tool.watches.client_watches("gone"), [])
+
+
+@unittest.skipUnless(Inotify.available(), "inotify is not available")
+class TestFileWatchInotify(TestFileWatch):
+    """Test cases for filesystem watches, using inotify."""
+
+    use_inotify = True
+
+    async def test_new_directories_watched(self):
+        """Test that directories created after the watch are covered."""
+        await self._watch()
+        os.makedirs(os.path.join(self.root, "a/b"))
+        await asyncio.sleep(0.05)
+        self._write("a/b/c.txt", "x")
+        await self._settle()
+        changes = [change for batch in self.batches for change in batch]
+        self.assertIn(("a/b/c.txt", "created"), changes)
+
+    async def test_temporary_files_not_reported(self):
+        """Test that files created and removed within the window are hidden."""
+        await self._watch()
+        os.unlink(self._write("scratch.tmp", "x"))
+        self._write("kept.txt", "x")
+        await self._settle()
+        self.assertEqual(self.batches, [[("kept.txt", "created")]])
+
+
+class TestFileList(unittest.TestCase):
+    """Test cases for cached directory listings."""
+
+    def setUp(self):
+        """Set up the test case."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = self.tmpdir.name
+        for rel_path in ["a.txt", ".hidden", "sub/b.py", "sub/deep/c.py"]:
+            path = os.path.join(self.root, rel_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write("data")
+        # Age the directories so their listings are not considered racy
+        for directory in ["", "sub", "sub/deep"]:
+            os.utime(os.path.join(self.root, directory), (1, 1))
+        self.tool = FileTool()
+
+    def tearDown(self):
+        """Clean up test resources."""
+        self.tmpdir.cleanup()
+
+    def _paths(self, result):
+        return [entry.path for entry in result.entries]
+
+    def test_list_single_level(self):
+        """Test listing only the top directory."""
+        result = self.tool.list_files(self.root)
+        self.assertTrue(result.success, result.error)
+        self.assertEqual(self._paths(result), [".hidden", "a.txt", "sub"])
+        entry = result.entries[1]
+        self.assertEqual((entry.type, entry.size), ("file", 4))
+        self.assertTrue(entry.mode.startswith("-rw"))
+        self.assertEqual(result.entries[2].type, "directory")
+
+    def test_depth_glob_and_hidden(self):
+        """Test descending with a glob filter and hidden entries excluded."""
+        result = self.tool.list_files(
+            self.root, depth=3, glob="*.py", include_hidden=False
+        )
+        self.assertEqual(self._paths(result), ["sub/b.py", "sub/deep/c.py"])
+
+    def test_limit(self):
+        """Test that the limit truncates the listing."""
+        result = self.tool.list_files(self.root, depth=3, limit=2)
+        self.assertEqual(len(result.entries), 2)
+        self.assertTrue(result.truncated)
+
+    def test_repeat_listing_uses_cache(self):
+        """Test that unchanged directories are not rescanned."""
+        self.tool.list_files(self.root, depth=3)
+        with patch.object(
+            listing_module.os, "scandir", side_effect=AssertionError("rescanned")
+        ):
+            result = self.tool.list_files(self.root, depth=3)
+        self.assertTrue(result.success, result.error)
+        self.assertEqual(len(result.entries), 6)
+
+    def test_changes_invalidate_cache(self):
+        """Test that new entries and file tool writes show up."""
+        self.tool.list_files(self.root)
+        with open(os.path.join(self.root, "new.txt"), "w") as f:
+            f.write("x")
+        self.assertIn("new.txt", self._paths(self.tool.list_files(self.root)))
+
+        os.utime(self.root, (1, 1))
+        self.tool.list_files(self.root)
+        self.tool.modify_file(
+            os.path.join(self.root, "a.txt"), "more", WriteMode.APPEND
+        )
+        os.utime(self.root, (1, 1))
+        sizes = {e.path: e.size for e in self.tool.list_files(self.root).entries}
+        self.assertEqual(sizes["a.txt"], 8)
+
+    def test_missing_directory(self):
+        """Test listing a directory that does not exist."""
+        result = self.tool.list_files(os.path.join(self.root, "missing"))
+        self.assertFalse(result.success)
+
+
+class TestContentCache(unittest.TestCase):
+    """Test cases for the shared file content cache."""
+
+    def setUp(self):
+        """Set up the test case."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.tmpdir.name, "cached.txt")
+        self._write(self.filepath, "line 1\nline 2\nline 3\n")
+        self.tool = FileTool()
+
+    def tearDown(self):
+        """Clean up test resources."""
+        self.tmpdir.cleanup()
+
+    def _write(self, path, text, mtime=1):
+        """Write a file and age it so it is not considered racy."""
+        with open(path, "w") as f:
+            f.write(text)
+        os.utime(path, (mtime, mtime))
+
+    def test_repeat_reads_hit_cache(self):
+        """Test that unchanged files are served from memory."""
+        first = self.tool.read_file(self.filepath)
+        self.assertEqual(len(self.tool.contents), 1)
+        hits = self.tool.contents.hits
+        second = self.tool.read_file(self.filepath, start_line=2, end_line=2)
+        self.assertEqual(first.content, "line 1\nline 2\nline 3\n")
+        self.assertEqual(second.content, "line 2\n")
+        self.assertGreater(self.tool.contents.hits, hits)
+
+    def test_external_change_detected(self):
+        """Test that a changed size or mtime invalidates the entry."""
+        self.tool.read_file(self.filepath)
+        self._write(self.filepath, "LINE 1\nline 2\nline 3\n", mtime=2)
+        self.assertEqual(
+            self.tool.read_file(self.filepath, end_line=1).content, "LINE 1\n"
+        )
+
+    def test_file_tool_writes_invalidate(self):
+        """Test that writes through the file tool drop the cached content."""
+        self.tool.read_file(self.filepath)
+        self.tool.modify_file(self.filepath, "line two", WriteMode.REPLACE, line=2)
+        self.assertEqual(len(self.tool.contents), 0)
+        result = self.tool.read_file(self.filepath)
+        self.assertEqual(result.content, "line 1\nline two\nline 3\n")
+
+    def test_racy_content_not_cached(self):
+        """Test that files modified just now are read from disk."""
+        with open(self.filepath, "w") as f:
+            f.write("fresh\n")
+        self.tool.read_file(self.filepath)
+        self.assertEqual(len(self.tool.contents), 0)
+
+    def test_budget_evicts_least_recently_used(self):
+        """Test that the memory budget is enforced in LRU order."""
+        tool = FileTool(cache_bytes=400)
+        paths = []
+        for name in "abc":
+            path = os.path.join(self.tmpdir.name, f"{name}.txt")
+            self._write(path, name * 100)
+            paths.append(path)
+
+        tool.read_file(paths[0])
+        tool.read_file(paths[1])
+        tool.read_file(paths[0], offset=1)
+        tool.read_file(paths[2])
+        self.assertLessEqual(tool.contents.used_bytes, 400)
+        cached = {p: tool.contents.get(p, os.stat(p)) is not None for p in paths}
+        self.assertEqual(cached, {paths[0]: True, paths[1]: False, paths[2]: True})
+
+
+class TestLineIndex(unittest.TestCase):
+    """Test cases for the line offset index."""
+
+    def _index(self, data: bytes, stride: int = 4) -> LineIndex:
+        return LineIndex(len(data), 0, stride=stride)
+
+    def test_offsets_match_naive_scan(self):
+        """Test that indexed offsets agree with a naive scan."""
+        data = b"".join(b"x" * (i % 7) + b"\n" for i in range(200)) + b"tail"
+        expected = [0] + [i + 1 for i, c in enumerate(data) if c == ord("\n")]
+        index = self._index(data)
+        for line, offset in enumerate(expected):
+            self.assertEqual(index.line_offset(data, line), offset)
+        self.assertIsNone(index.line_offset(data, len(expected)))
+        self.assertEqual(index.total_lines(data), 201)
+
+    def test_trailing_newline_line_count(self):
+        """Test that a trailing newline does not add an extra line."""
+        data = b"a\nb\nc\n"
+        self.assertEqual(self._index(data).total_lines(data), 3)
+        self.assertEqual(self._index(b"").total_lines(b""), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
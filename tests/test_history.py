@@ -0,0 +1,225 @@
+"""
+Tests for the command history.
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import unittest
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import MagicMock
+
+# Add both src and project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+src_path = os.path.join(project_root, "src")
+sys.path.insert(0, project_root)
+sys.path.insert(0, src_path)
+
+from mcp.server.fastmcp import FastMCP
+
+from mcp_terminal.history import CommandHistory, fts_query
+from mcp_terminal.tools.terminal import TerminalTool
+
+
+class TestCommandHistory(unittest.TestCase):
+    """Test cases for CommandHistory."""
+
+    def setUp(self):
+        """Set up the test case."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.history = CommandHistory(
+            os.path.join(self.temp_dir, "history.db"), max_output=100
+        )
+
+    def tearDown(self):
+        """Tear down the test case."""
+        self.history.close()
+        shutil.rmtree(self.temp_dir)
+
+    def _record(self, command, output="", return_code=0, started=None, client=None):
+        self.history.record(
+            command,
+            "/tmp",
+            started or time.time(),
+            0.5,
+            return_code,
+            return_code == 0,
+            output,
+            "",
+            client=client,
+        )
+
+    def test_search_filters(self):
+        """Test searching by text, prefix, time and exit status."""
+        now = time.time()
+        self._record("pip list", "requests 2.31\nurllib3 2.0", started=now - 100)
+        self._record("pytest -q", "3 failed, 10 passed", 1, started=now - 50)
+        self._record("pip show requests", "Name: requests", started=now)
+        self.assertTrue(self.history.flush(5))
+
+        results = self.history.search()
+        self.assertEqual(
+            [r["command"] for r in results],
+            ["pip show requests", "pytest -q", "pip list"],
+        )
+        self.assertEqual(results[0]["cwd"], "/tmp")
+        self.assertTrue(results[0]["success"])
+
+        results = self.history.search(text="requests")
+        self.assertEqual(len(results), 2)
+        self.assertIn("[requests]", results[0]["snippet"])
+
+        results = self.history.search(command_prefix="pip ")
+        self.assertEqual(len(results), 2)
+        results = self.history.search(command_prefix="pip_")
+        self.assertEqual(results, [])
+
+        results = self.history.search(since=now - 60, until=now - 1)
+        self.assertEqual([r["command"] for r in results], ["pytest -q"])
+        self.assertEqual(len(self.history.search(return_code=1)), 1)
+        self.assertEqual(len(self.history.search(success=True)), 2)
+        self.assertEqual(len(self.history.search(limit=1, offset=2)), 1)
+
+    def test_query_syntax_is_literal(self):
+        """Test that FTS5 operators in the text are matched literally."""
+        self._record('grep "AND" file.txt', "x")
+        self.history.flush(5)
+        self.assertEqual(fts_query('a "b" OR'), '"a" """b""" "OR"')
+        self.assertEqual(len(self.history.search(text='"AND" OR NEAR(')), 0)
+        self.assertEqual(len(self.history.search(text="grep AND")), 1)
+
+    def test_output_truncated(self):
+        """Test that long outputs are cut to the limit."""
+        self._record("seq 1 1000", "x" * 500)
+        self.history.flush(5)
+        result = self.history.search()[0]
+        self.assertEqual(len(result["output"]), 100)
+        self.assertTrue(result["truncated"])
+
+    def test_search_by_client(self):
+        """Test that a client's search only finds its own commands."""
+        self._record("echo mine", client="a")
+        self._record("echo theirs", client="b")
+        self._record("echo shared")
+        self.history.flush(5)
+        self.assertEqual(
+            [r["command"] for r in self.history.search(client="a")], ["echo mine"]
+        )
+        self.assertEqual(len(self.history.search(text="echo")), 3)
+        self.assertNotIn("client", self.history.search()[0])
+
+    @unittest.skipIf(sys.platform == "win32", "File modes are POSIX-only")
+    def test_private_files(self):
+        """Test that the database and its directory are private to the user."""
+        path = os.path.join(self.temp_dir, "state", "history.db")
+        history = CommandHistory(path)
+        try:
+            history.search()
+            self.assertEqual(os.stat(os.path.dirname(path)).st_mode & 0o777, 0o700)
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+        finally:
+            history.close()
+
+    def test_upgrade_adds_client(self):
+        """Test that a database without the client column is upgraded."""
+        path = os.path.join(self.temp_dir, "old.db")
+        db = sqlite3.connect(path)
+        db.execute(
+            "CREATE TABLE commands (id INTEGER PRIMARY KEY, command TEXT NOT NULL, "
+            "cwd TEXT, started REAL NOT NULL, duration REAL NOT NULL, "
+            "return_code INTEGER, success INTEGER NOT NULL, output TEXT, "
+            "error TEXT, output_digest TEXT, truncated INTEGER NOT NULL DEFAULT 0)"
+        )
+        db.execute(
+            "INSERT INTO commands (command, started, duration, success) "
+            "VALUES ('echo old', 0, 0, 1)"
+        )
+        db.commit()
+        db.close()
+
+        history = CommandHistory(path, max_days=1e6)
+        try:
+            history.record("echo new", None, time.time(), 0, 0, True, "", "", None, "a")
+            history.flush(5)
+            self.assertEqual(
+                [r["command"] for r in history.search()], ["echo new", "echo old"]
+            )
+            self.assertEqual(len(history.search(client="a")), 1)
+        finally:
+            history.close()
+
+    def test_retention(self):
+        """Test that old and excess commands are deleted."""
+        self.history.max_rows = 3
+        self._record("ancient", started=time.time() - 40 * 86400)
+        for n in range(5):
+            self._record(f"echo {n}")
+        self.history.flush(5)
+        self.history.prune()
+        self.assertEqual(
+            [r["command"] for r in self.history.search()],
+            ["echo 4", "echo 3", "echo 2"],
+        )
+        self.assertEqual(self.history.search(text="ancient"), [])
+
+
+class TestHistorySearchTool(IsolatedAsyncioTestCase):
+    """Test cases for recording through execute_command."""
+
+    async def test_execute_then_search(self):
+        """Test that an executed command can be found right away."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            history = CommandHistory(os.path.join(temp_dir, "history.db"))
+            tool = TerminalTool(controller_type="subprocess", history=history)
+            mcp = FastMCP("test")
+            tool.register_mcp(mcp)
+
+            await mcp.call_tool("execute_command", {"command": "echo needle-42"})
+            content = await mcp.call_tool("history_search", {"text": "needle-42"})
+            response = json.loads(content[0][0].text)
+            self.assertTrue(response["success"])
+            [result] = response["results"]
+            self.assertEqual(result["command"], "echo needle-42")
+            self.assertEqual(result["output"], "needle-42\n")
+            self.assertEqual(result["return_code"], 0)
+            self.assertEqual(result["cwd"], os.getcwd())
+            self.assertIsNotNone(result["output_digest"])
+            await tool.cleanup()
+
+    async def test_search_scoped_to_session(self):
+        """Test that with per-client controllers sessions see only their own."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            history = CommandHistory(os.path.join(temp_dir, "history.db"))
+            tool = TerminalTool(
+                controller_type="subprocess", per_client=True, history=history
+            )
+            mcp = FastMCP("test")
+            tool.register_mcp(mcp)
+            first, second = MagicMock(), MagicMock()
+
+            async def call(session, name, arguments):
+                ctx = mcp.get_context()
+                ctx._request_context = MagicMock(session=session)
+                tools = {t.name: t for t in mcp._tool_manager.list_tools()}
+                return await tools[name].run(arguments, context=ctx)
+
+            await call(first, "execute_command", {"command": "echo first-1"})
+            await call(second, "execute_command", {"command": "echo second-2"})
+            response = await call(first, "history_search", {"text": "echo"})
+            self.assertEqual([r["command"] for r in response.results], ["echo first-1"])
+            await tool.cleanup()
+
+    async def test_not_registered_without_history(self):
+        """Test that history_search needs a history."""
+        mcp = FastMCP("test")
+        TerminalTool(controller_type="subprocess").register_mcp(mcp)
+        tools = [tool.name for tool in await mcp.list_tools()]
+        self.assertNotIn("history_search", tools)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+"""
+Tests for the logging setup.
+"""
+
+import io
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from types import SimpleNamespace
+
+# Add both src and project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+src_path = os.path.join(project_root, "src")
+sys.path.insert(0, project_root)
+sys.path.insert(0, src_path)
+
+from mcp.server.lowlevel.server import request_ctx
+
+from mcp_terminal.logs import correlation_id, setup_logging, stop_logging
+
+
+class BlockingStream(io.StringIO):
+    """A stream whose writes wait until it is released."""
+
+    def __init__(self):
+        super().__init__()
+        self.released = threading.Event()
+
+    def write(self, text):
+        self.released.wait(5)
+        return super().write(text)
+
+
+class TestLogging(unittest.TestCase):
+    """Test cases for setup_logging."""
+
+    def setUp(self):
+        """Set up the test case."""
+        self.root = logging.getLogger()
+        self.handlers = list(self.root.handlers)
+        self.level = self.root.level
+        self.logger = logging.getLogger("MCP:Terminal:Test")
+
+    def tearDown(self):
+        """Tear down the test case."""
+        stop_logging()
+        self.root.handlers[:] = self.handlers
+        self.root.setLevel(self.level)
+
+    def test_text_format(self):
+        """Test that records are written as text lines."""
+        stream = io.StringIO()
+        setup_logging("INFO", stream=stream)
+        self.logger.info("hello %s", "world")
+        self.logger.debug("not shown")
+        stop_logging()
+
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertTrue(lines[0].endswith("MCP:Terminal:Test - INFO - hello world"))
+
+    def test_json_format(self):
+        """Test that records are written as JSON lines."""
+        stream = io.StringIO()
+        setup_logging("DEBUG", json_format=True, stream=stream)
+        self.logger.debug("first")
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            self.logger.exception("second")
+        stop_logging()
+
+        entries = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual([e["message"] for e in entries], ["first", "second"])
+        self.assertEqual(entries[0]["level"], "DEBUG")
+        self.assertEqual(entries[0]["logger"], "MCP:Terminal:Test")
+        self.assertNotIn("correlation_id", entries[0])
+        self.assertIn("ValueError: boom", entries[1]["exception"])
+
+    def test_correlation_id(self):
+        """Test that records carry the id of the request they belong to."""
+        stream = io.StringIO()
+        setup_logging("INFO", json_format=True, stream=stream)
+        session = SimpleNamespace()
+        token = request_ctx.set(SimpleNamespace(session=session, request_id=7))
+        try:
+            self.logger.info("first")
+            self.logger.info("second")
+        finally:
+            request_ctx.reset(token)
+        token = correlation_id.set("explicit")
+        try:
+            self.logger.info("third")
+        finally:
+            correlation_id.reset(token)
+        self.logger.info("outside")
+        stop_logging()
+
+        ids = [
+            json.loads(line).get("correlation_id")
+            for line in stream.getvalue().splitlines()
+        ]
+        self.assertTrue(ids[0].endswith("-7"))
+        self.assertEqual(ids[0], ids[1])
+        self.assertEqual(ids[2], "explicit")
+        self.assertIsNone(ids[3])
+
+    def test_slow_stream_does_not_block(self):
+        """Test that logging returns while the stream is blocked."""
+        stream = BlockingStream()
+        setup_logging("INFO", stream=stream)
+        started = time.monotonic()
+        for i in range(100):
+            self.logger.info(f"record {i}")
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(stream.getvalue(), "")
+
+        stream.released.set()
+        stop_logging()
+        self.assertEqual(len(stream.getvalue().splitlines()), 100)
+
+    def test_stdout_untouched(self):
+        """Test that the default stream is stderr, keeping stdio clean."""
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            setup_logging("INFO")
+            self.logger.warning("to stderr")
+            stop_logging()
+        self.assertEqual(stdout.getvalue(), "")
+        self.assertIn("to stderr", stderr.getvalue())
+
+    def test_setup_replaces_previous(self):
+        """Test that setting up again does not duplicate records."""
+        first, second = io.StringIO(), io.StringIO()
+        setup_logging("INFO", stream=first)
+        setup_logging("INFO", stream=second)
+        self.logger.info("once")
+        stop_logging()
+        self.assertEqual(first.getvalue(), "")
+        self.assertEqual(second.getvalue().count("once"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
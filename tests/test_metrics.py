@@ -0,0 +1,128 @@
+"""
+Tests for the tool metrics.
+"""
+
+import json
+import os
+import sys
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+# Add both src and project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+src_path = os.path.join(project_root, "src")
+sys.path.insert(0, project_root)
+sys.path.insert(0, src_path)
+
+from mcp.server.fastmcp import FastMCP
+from pydantic import BaseModel
+from starlette.testclient import TestClient
+
+from mcp_terminal.metrics import Histogram, ServerMetrics, phase
+from mcp_terminal.server import MCPTerminalServer, ServerMode
+
+
+class Result(BaseModel):
+    success: bool
+
+
+class TestHistogram(unittest.TestCase):
+    """Test cases for the latency histogram."""
+
+    def test_buckets_and_quantiles(self):
+        """Test cumulative buckets and bucket-bound quantile estimates."""
+        histogram = Histogram(buckets=(0.1, 1.0))
+        for value in (0.05, 0.05, 0.5, 5.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.cumulative(), [("0.1", 2), ("1.0", 3), ("+Inf", 4)])
+        self.assertEqual(histogram.quantile(0.5), 0.1)
+        self.assertEqual(histogram.quantile(0.75), 1.0)
+        self.assertEqual(histogram.quantile(0.99), 1.0)
+        self.assertIsNone(Histogram().quantile(0.5))
+
+
+class TestServerMetrics(IsolatedAsyncioTestCase):
+    """Test cases for tool instrumentation."""
+
+    async def asyncSetUp(self):
+        """Set up an instrumented server with two tools."""
+        self.mcp = FastMCP("test")
+
+        @self.mcp.tool(name="ok")
+        async def ok(fail: bool = False) -> Result:
+            with phase("spawn"):
+                pass
+            return Result(success=not fail)
+
+        @self.mcp.tool(name="boom")
+        async def boom() -> Result:
+            raise RuntimeError("boom")
+
+        self.metrics = ServerMetrics()
+        self.metrics.instrument(self.mcp)
+
+    async def test_counts_errors_and_phases(self):
+        """Test that calls, failures and phases are recorded."""
+        await self.mcp.call_tool("ok", {})
+        await self.mcp.call_tool("ok", {"fail": True})
+        with self.assertRaises(Exception):
+            await self.mcp.call_tool("boom", {})
+
+        tools = self.metrics.snapshot()["tools"]
+        self.assertEqual(tools["ok"]["calls"], 2)
+        self.assertEqual(tools["ok"]["errors"], 1)
+        self.assertEqual(tools["ok"]["in_flight"], 0)
+        self.assertEqual(tools["ok"]["latency"]["count"], 2)
+        self.assertEqual(set(tools["ok"]["phases"]), {"spawn", "serialize"})
+        self.assertEqual(tools["boom"]["errors"], 1)
+
+    async def test_unknown_tool_not_tracked(self):
+        """Test that calls to unknown tools do not create series."""
+        with self.assertRaises(Exception):
+            await self.mcp.call_tool("missing", {})
+        self.assertNotIn("missing", self.metrics.tools)
+
+    async def test_prometheus_format(self):
+        """Test the text exposition output."""
+        await self.mcp.call_tool("ok", {})
+        text = self.metrics.render_prometheus()
+        self.assertIn('mcp_tool_calls_total{tool="ok"} 1', text)
+        self.assertIn("# TYPE mcp_tool_duration_seconds histogram", text)
+        self.assertIn('mcp_tool_duration_seconds_bucket{tool="ok",le="+Inf"} 1', text)
+        self.assertIn(
+            'mcp_tool_phase_duration_seconds_count{tool="ok",phase="spawn"} 1', text
+        )
+
+
+class TestServerExposure(IsolatedAsyncioTestCase):
+    """Test cases for how the server exposes metrics."""
+
+    async def test_stdio_stats_tool(self):
+        """Test get_server_stats in stdio mode."""
+        server = MCPTerminalServer(
+            controller_type="subprocess", history={"max_rows": 0}
+        )
+        server.register_tools()
+        await server.mcp.call_tool("execute_command", {"command": "echo hi"})
+        content = await server.mcp.call_tool("get_server_stats", {})
+        stats = json.loads(content[0][0].text)
+        execute = stats["tools"]["execute_command"]
+        self.assertEqual(execute["calls"], 1)
+        self.assertTrue({"filter", "spawn", "wait"} <= set(execute["phases"]))
+        await server.cleanup()
+
+    async def test_sse_metrics_route(self):
+        """Test the /metrics route in SSE mode."""
+        server = MCPTerminalServer(controller_type="subprocess", mode=ServerMode.SSE)
+        server.register_tools()
+        tools = [tool.name for tool in await server.mcp.list_tools()]
+        self.assertNotIn("get_server_stats", tools)
+        with TestClient(server.mcp.sse_app()) as client:
+            response = client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("mcp_uptime_seconds", response.text)
+        await server.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,230 @@
+"""
+Tests for stored command outputs.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+# Add both src and project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+src_path = os.path.join(project_root, "src")
+sys.path.insert(0, project_root)
+sys.path.insert(0, src_path)
+
+from mcp.server.fastmcp import FastMCP
+
+from mcp_terminal.artifacts import ArtifactStore, digest_of
+from mcp_terminal.outputs import OutputStore
+from mcp_terminal.tools.terminal import TerminalTool
+
+
+def numbered(count):
+    return "".join(f"line {n}\n" for n in range(1, count + 1))
+
+
+class TestOutputStore(IsolatedAsyncioTestCase):
+    """Test cases for OutputStore."""
+
+    async def asyncSetUp(self):
+        """Set up the test case."""
+        self.store = OutputStore(inline_limit=100, max_size=10000)
+
+    async def test_small_output_inline(self):
+        """Test that short outputs are returned untouched, with a digest."""
+        text, digest, handle = await self.store.offload("short\n")
+        self.assertEqual(text, "short\n")
+        self.assertEqual(digest, hashlib.sha256(b"short\n").hexdigest())
+        self.assertIsNone(handle)
+        self.assertEqual(await self.store.offload(None), (None, None, None))
+        self.assertEqual(len(self.store), 0)
+
+    async def test_preview_and_pages(self):
+        """Test that a long output is previewed and paged through."""
+        preview, digest, handle = await self.store.offload(numbered(1000))
+        self.assertEqual(handle, digest)
+        self.assertTrue(preview.startswith("line 1\n"))
+        self.assertTrue(preview.endswith("line 1000\n"))
+        self.assertIn(handle, preview)
+        self.assertLess(len(preview), 300)
+
+        page = await self.store.read(handle, offset=10, limit=5)
+        self.assertEqual([line["line"] for line in page["lines"]], [11, 12, 13, 14, 15])
+        self.assertEqual(page["lines"][0]["text"], "line 11")
+        self.assertEqual(page["next_offset"], 15)
+        self.assertEqual(page["total_lines"], 1000)
+
+        page = await self.store.read(handle, offset=998, limit=5)
+        self.assertEqual(len(page["lines"]), 2)
+        self.assertIsNone(page["next_offset"])
+
+    async def test_grep(self):
+        """Test that lines can be filtered server-side."""
+        handle = (await self.store.offload(numbered(1000))).handle
+        page = await self.store.read(
+            handle, limit=3, pattern=r"^LINE 9\d$", ignore_case=True
+        )
+        self.assertEqual([line["line"] for line in page["lines"]], [90, 91, 92])
+        self.assertEqual(page["next_offset"], 3)
+        page = await self.store.read(handle, offset=9, pattern=r"^line 9\d$")
+        self.assertEqual([line["line"] for line in page["lines"]], [99])
+        self.assertIsNone(page["next_offset"])
+
+    async def test_dedupe(self):
+        """Test that identical outputs share one entry."""
+        first = await self.store.offload(numbered(1000))
+        second = await self.store.offload(numbered(1000))
+        self.assertEqual(first.handle, second.handle)
+        self.assertEqual(len(self.store), 1)
+
+    async def test_size_eviction(self):
+        """Test that the least recently used outputs go first."""
+        first = (await self.store.offload("a" * 4000)).handle
+        second = (await self.store.offload("b" * 4000)).handle
+        await self.store.lines(first)
+        third = (await self.store.offload("c" * 4000)).handle
+        await self.store.lines(first)
+        await self.store.lines(third)
+        with self.assertRaises(KeyError):
+            await self.store.lines(second)
+        self.assertLessEqual(self.store.size, self.store.max_size)
+
+        preview, digest, handle = await self.store.offload("d" * 20000)
+        self.assertIsNone(handle)
+        self.assertIsNotNone(digest)
+        self.assertIn("too large to keep", preview)
+
+    async def test_ttl(self):
+        """Test that outputs unused past the TTL expire."""
+        handle = (await self.store.offload(numbered(100))).handle
+        with patch("mcp_terminal.outputs.time.monotonic", return_value=1e12):
+            with self.assertRaises(KeyError):
+                await self.store.lines(handle)
+        self.assertEqual(self.store.size, 0)
+
+
+class TestArtifactStore(unittest.TestCase):
+    """Test cases for ArtifactStore."""
+
+    def setUp(self):
+        """Set up the test case."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = ArtifactStore(self.temp_dir, max_size=100)
+
+    def tearDown(self):
+        """Tear down the test case."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_put_get(self):
+        """Test that content is stored once under its digest."""
+        digest = digest_of(b"x" * 40)
+        self.assertTrue(self.store.put(b"x" * 40))
+        self.assertTrue(self.store.put(b"x" * 40, digest))
+        self.assertEqual(self.store.get(digest), b"x" * 40)
+        self.assertIn(digest, self.store)
+        self.assertEqual(self.store.size, 40)
+        self.assertIsNone(self.store.get(digest_of(b"missing")))
+        self.assertIsNone(self.store.get("../../etc/passwd"))
+        self.assertFalse(self.store.put(b"y" * 101))
+
+    def test_lru_eviction(self):
+        """Test that the least recently used artifacts are removed."""
+        a, b, c = (digest_of(bytes([n]) * 40) for n in range(3))
+        self.store.put(bytes([0]) * 40)
+        self.store.put(bytes([1]) * 40)
+        self.store.get(a)
+        self.store.put(bytes([2]) * 40)
+        self.assertIn(a, self.store)
+        self.assertNotIn(b, self.store)
+        self.assertIn(c, self.store)
+
+    def test_index_survives_restart(self):
+        """Test that a new store picks up existing artifacts."""
+        self.store.put(b"x" * 40)
+        store = ArtifactStore(self.temp_dir, max_size=100)
+        self.assertEqual(store.get(digest_of(b"x" * 40)), b"x" * 40)
+        self.assertEqual(store.size, 40)
+
+    @unittest.skipIf(sys.platform == "win32", "File modes are POSIX-only")
+    def test_private_files(self):
+        """Test that artifacts and their directories are private to the user."""
+        root = os.path.join(self.temp_dir, "store")
+        digest = digest_of(b"secret")
+        # A shard left open to others by an earlier version
+        os.makedirs(os.path.join(root, digest[:2]))
+        os.chmod(os.path.join(root, digest[:2]), 0o755)
+        store = ArtifactStore(root, max_size=100)
+        self.assertTrue(store.put(b"secret"))
+        self.assertEqual(os.stat(root).st_mode & 0o777, 0o700)
+        self.assertEqual(os.stat(os.path.join(root, digest[:2])).st_mode & 0o777, 0o700)
+        self.assertEqual(os.stat(store._path(digest)).st_mode & 0o777, 0o600)
+
+
+class TestOutputStoreWithArtifacts(IsolatedAsyncioTestCase):
+    """Test cases for OutputStore backed by an ArtifactStore."""
+
+    async def test_read_after_memory_eviction(self):
+        """Test that outputs dropped from memory are read back from disk."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = OutputStore(
+                inline_limit=100, max_size=10000, artifacts=ArtifactStore(temp_dir)
+            )
+            handle = (await store.offload(numbered(1000))).handle
+            store.clear()
+            page = await store.read(handle, offset=499, limit=1)
+            self.assertEqual(page["lines"], [{"line": 500, "text": "line 500"}])
+
+            # Too large for memory, but kept on disk
+            large = await store.offload("e" * 20000)
+            self.assertEqual(large.handle, large.digest)
+            self.assertEqual(len(store), 1)
+
+
+class TestReadOutputTool(IsolatedAsyncioTestCase):
+    """Test cases for execute_command with read_output."""
+
+    async def test_large_output(self):
+        """Test that a large output comes back as a preview and a handle."""
+        tool = TerminalTool(
+            controller_type="subprocess", outputs=OutputStore(inline_limit=1000)
+        )
+        mcp = FastMCP("test")
+        tool.register_mcp(mcp)
+
+        content = await mcp.call_tool("execute_command", {"command": "seq 1 5000"})
+        response = json.loads(content[0][0].text)
+        self.assertTrue(response["success"])
+        self.assertIsNotNone(response["output_handle"])
+        self.assertLess(len(response["output"]), 1200)
+
+        content = await mcp.call_tool(
+            "read_output",
+            {"handle": response["output_handle"], "grep": "^4999$"},
+        )
+        page = json.loads(content[0][0].text)
+        self.assertTrue(page["success"])
+        self.assertEqual(page["lines"], [{"line": 4999, "text": "4999"}])
+        self.assertEqual(page["total_lines"], 5000)
+
+        content = await mcp.call_tool(
+            "execute_command",
+            {"command": "seq 1 5000", "known_digests": [response["output_digest"]]},
+        )
+        again = json.loads(content[0][0].text)
+        self.assertIsNone(again["output"])
+        self.assertEqual(again["output_digest"], response["output_digest"])
+
+        content = await mcp.call_tool("read_output", {"handle": "nope"})
+        page = json.loads(content[0][0].text)
+        self.assertFalse(page["success"])
+        self.assertIn("Unknown or expired", page["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
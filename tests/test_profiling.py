@@ -0,0 +1,131 @@
+"""
+Tests for the profiling tools.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+# Add both src and project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+src_path = os.path.join(project_root, "src")
+sys.path.insert(0, project_root)
+sys.path.insert(0, src_path)
+
+from mcp_terminal.profiling import SamplingProfiler
+from mcp_terminal.server import MCPTerminalServer
+from mcp_terminal.tools.profiling import MemoryAction, ProfilingTool
+
+
+def busy_loop(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class TestSamplingProfiler(unittest.TestCase):
+    """Test cases for the stack sampler."""
+
+    def test_collapsed_stacks(self):
+        """Test that samples of a busy thread are aggregated root first."""
+        worker = threading.Thread(target=busy_loop, args=(0.3,))
+        worker.start()
+        profiler = SamplingProfiler(worker.ident, interval=0.002)
+        profiler.start()
+        time.sleep(0.2)
+        profiler.stop()
+        worker.join()
+
+        self.assertGreater(profiler.samples, 0)
+        lines, truncated = profiler.collapsed()
+        self.assertFalse(truncated)
+        self.assertTrue(any("threading.py:run;" in line for line in lines))
+        self.assertTrue(any(":busy_loop " in line for line in lines))
+        stack, count = lines[0].rsplit(" ", 1)
+        self.assertGreater(int(count), 0)
+
+
+class TestProfilingTool(IsolatedAsyncioTestCase):
+    """Test cases for the profiling tool."""
+
+    async def asyncSetUp(self):
+        """Set up the test case."""
+        self.tool = ProfilingTool()
+
+    async def asyncTearDown(self):
+        """Clean up the test case."""
+        await self.tool.cleanup()
+
+    async def test_profile_event_loop(self):
+        """Test sampling the loop while it runs blocking work."""
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.05, busy_loop, 0.2)
+        result = await self.tool.profile_event_loop(0.4, 2, 50)
+        self.assertTrue(result.success)
+        self.assertGreater(result.samples, 0)
+        self.assertTrue(any(":busy_loop " in line for line in result.stacks))
+
+    async def test_profile_rejects_concurrent_runs(self):
+        """Test that only one profile runs at a time."""
+        first = asyncio.create_task(self.tool.profile_event_loop(0.2, 5, 10))
+        await asyncio.sleep(0.05)
+        second = await self.tool.profile_event_loop(0.1, 5, 10)
+        self.assertFalse(second.success)
+        self.assertTrue((await first).success)
+
+    async def test_profile_invalid_duration(self):
+        """Test that the duration is bounded."""
+        result = await self.tool.profile_event_loop(0, 5, 10)
+        self.assertFalse(result.success)
+
+    async def test_memory_snapshot_and_diff(self):
+        """Test top allocation sites and diffs between snapshots."""
+        result = self.tool.profile_memory(MemoryAction.START, 10, "lineno", None, 1)
+        self.assertTrue(result.tracing)
+        first = self.tool.profile_memory(MemoryAction.SNAPSHOT, 10, "lineno", None, 1)
+        retained = [bytearray(1000) for _ in range(1000)]
+        second = self.tool.profile_memory(
+            MemoryAction.SNAPSHOT, 5, "lineno", first.snapshot_id, 1
+        )
+        self.assertTrue(second.success)
+        self.assertEqual(second.snapshots, [first.snapshot_id, second.snapshot_id])
+        self.assertLessEqual(len(second.top), 5)
+        self.assertIn("test_profiling.py", second.top[0]["location"])
+        self.assertGreaterEqual(second.top[0]["size_diff"], 1000 * 1000)
+        del retained
+
+        result = self.tool.profile_memory(MemoryAction.STOP, 10, "lineno", None, 1)
+        self.assertFalse(result.tracing)
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertEqual(result.snapshots, [])
+
+    async def test_memory_unknown_snapshot(self):
+        """Test diffing against a snapshot that does not exist."""
+        result = self.tool.profile_memory(MemoryAction.SNAPSHOT, 10, "lineno", 99, 1)
+        self.assertFalse(result.success)
+        self.assertIn("99", result.error)
+
+
+class TestProfilingFlag(IsolatedAsyncioTestCase):
+    """Test cases for enabling the profiling tools."""
+
+    async def test_disabled_by_default(self):
+        """Test that the tools are only registered with the flag."""
+        for enabled in (False, True):
+            server = MCPTerminalServer(
+                controller_type="subprocess", enable_profiling=enabled
+            )
+            server.register_tools()
+            names = {tool.name for tool in await server.mcp.list_tools()}
+            self.assertEqual("profile_event_loop" in names, enabled)
+            self.assertEqual("profile_memory" in names, enabled)
+            await server.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+Tests for per-client session keys.
+"""
+
+import asyncio
+import gc
+import os
+import sys
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+# Add both src and project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+src_path = os.path.join(project_root, "src")
+sys.path.insert(0, project_root)
+sys.path.insert(0, src_path)
+
+from mcp_terminal.sessions import ClientKeys
+
+
+class Session:
+    """Stand-in for an MCP client session."""
+
+
+class TestClientKeys(IsolatedAsyncioTestCase):
+    """Test cases for ClientKeys."""
+
+    async def asyncSetUp(self):
+        """Set up the test case."""
+        self.gone = []
+        self.keys = ClientKeys(self.gone.append)
+
+    async def _collect(self):
+        gc.collect()
+        await asyncio.sleep(0)
+
+    async def test_key_per_session(self):
+        """Test that a session keeps its key and others get their own."""
+        first, second = Session(), Session()
+        key = self.keys.key(first)
+        self.assertEqual(self.keys.key(first), key)
+        self.assertNotEqual(self.keys.key(second), key)
+        self.assertEqual(len(self.keys), 2)
+
+    async def test_disconnect(self):
+        """Test that a collected session is reported once and forgotten."""
+        session = Session()
+        key = self.keys.key(session)
+        del session
+        await self._collect()
+        self.assertEqual(self.gone, [key])
+        self.assertEqual(len(self.keys), 0)
+
+    async def test_key_not_reused(self):
+        """Test that a new session never inherits a collected one's key."""
+        seen = set()
+        for _ in range(10):
+            # New sessions often reuse the memory, and id(), of old ones
+            key = self.keys.key(Session())
+            self.assertNotIn(key, seen)
+            seen.add(key)
+            await self._collect()
+        self.assertEqual(sorted(self.gone), sorted(seen))
+
+
+if __name__ == "__main__":
+    unittest.main()
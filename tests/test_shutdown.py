@@ -0,0 +1,138 @@
+"""
+Tests for graceful shutdown of the MCP Terminal Server.
+
+Each test runs the server in stdio mode, starts a command, sends SIGTERM
+and checks that the command's result still reaches the client and that the
+server exits within its shutdown timeout.
+"""
+
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+# Add both src and project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+src_path = os.path.join(project_root, "src")
+sys.path.insert(0, project_root)
+sys.path.insert(0, src_path)
+
+
+def _send(process, message):
+    process.stdin.write(json.dumps(message) + "\n")
+    process.stdin.flush()
+
+
+def _receive(process, request_id):
+    while True:
+        line = process.stdout.readline()
+        if not line:
+            raise RuntimeError("Server exited before responding")
+        message = json.loads(line)
+        if message.get("id") == request_id:
+            return message
+
+
+@unittest.skipIf(sys.platform == "win32", "Shutdown is driven by POSIX signals")
+class TestShutdown(unittest.TestCase):
+    """Draining and stopping commands on SIGTERM."""
+
+    def _start(self, shutdown_timeout):
+        """Start a server and initialize a session with it."""
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                os.path.join(project_root, "mcp_terminal.py"),
+                "--controller",
+                "subprocess",
+                "--log-level",
+                "WARNING",
+                "--history-max-rows",
+                "0",
+                "--shutdown-timeout",
+                str(shutdown_timeout),
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+        self.addCleanup(process.wait)
+        self.addCleanup(process.kill)
+        self.addCleanup(process.stdout.close)
+        self.addCleanup(process.stdin.close)
+        _send(
+            process,
+            {
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "initialize",
+                "params": {
+                    "protocolVersion": "2024-11-05",
+                    "capabilities": {},
+                    "clientInfo": {"name": "shutdown-test", "version": "1"},
+                },
+            },
+        )
+        _receive(process, 1)
+        _send(process, {"jsonrpc": "2.0", "method": "notifications/initialized"})
+        return process
+
+    def _run_until_sigterm(self, process, command):
+        """Start a command, send SIGTERM once it runs and return its result."""
+        _send(
+            process,
+            {
+                "jsonrpc": "2.0",
+                "id": 2,
+                "method": "tools/call",
+                "params": {
+                    "name": "execute_command",
+                    "arguments": {"command": command, "timeout": 60},
+                },
+            },
+        )
+        time.sleep(0.5)
+        process.send_signal(signal.SIGTERM)
+        started = time.monotonic()
+        response = _receive(process, 2)
+        process.wait(30)
+        elapsed = time.monotonic() - started
+        return json.loads(response["result"]["content"][0]["text"]), elapsed
+
+    def test_running_command_drains(self):
+        """Test that a running command finishes and its result is sent."""
+        process = self._start(shutdown_timeout=10)
+        result, elapsed = self._run_until_sigterm(process, "sleep 1; echo done")
+        self.assertTrue(result["success"])
+        self.assertEqual(result["output"], "done\n")
+        self.assertEqual(process.returncode, 0)
+        self.assertLess(elapsed, 5)
+
+    def test_slow_command_stopped_at_deadline(self):
+        """Test that a command outliving the drain is killed with its children."""
+        process = self._start(shutdown_timeout=4)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "pid")
+            result, elapsed = self._run_until_sigterm(
+                process, f"sleep 60 & echo $! > {path}; wait"
+            )
+            with open(path) as f:
+                child = int(f.read())
+        self.assertFalse(result["success"])
+        self.assertEqual(process.returncode, 0)
+        self.assertLess(elapsed, 4)
+        try:
+            with open(f"/proc/{child}/stat") as f:
+                # A killed orphan may linger as a zombie until init reaps it
+                self.assertEqual(f.read().rsplit(")", 1)[1].split()[0], "Z")
+        except FileNotFoundError:
+            pass
+
+
+if __name__ == "__main__":
+    unittest.main()
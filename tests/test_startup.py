@@ -0,0 +1,123 @@
+"""
+Start-up benchmark for the MCP Terminal Server.
+
+Measures the time from launching the server in stdio mode until it answers
+its first tools/list request, and fails if that exceeds the budget in
+MCP_TERMINAL_STARTUP_BUDGET (seconds, default 3).
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+import unittest
+
+# Add both src and project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+src_path = os.path.join(project_root, "src")
+sys.path.insert(0, project_root)
+sys.path.insert(0, src_path)
+
+STARTUP_BUDGET = float(os.environ.get("MCP_TERMINAL_STARTUP_BUDGET", "3.0"))
+
+# Modules that must not be imported before a request needs them
+DEFERRED_MODULES = [
+    "iterm2",
+    "ctypes",
+    "tarfile",
+    "tracemalloc",
+    "mcp_terminal.controllers.iterm",
+    "mcp_terminal.controllers.applescript",
+    "mcp_terminal.files.archive",
+    "mcp_terminal.files.watch",
+    "mcp_terminal.tools.profiling",
+]
+
+
+def _send(process, message):
+    process.stdin.write(json.dumps(message) + "\n")
+    process.stdin.flush()
+
+
+def _receive(process, request_id):
+    while True:
+        line = process.stdout.readline()
+        if not line:
+            raise RuntimeError("Server exited before responding")
+        message = json.loads(line)
+        if message.get("id") == request_id:
+            return message
+
+
+class TestStartup(unittest.TestCase):
+    """Start-up time and import budget."""
+
+    def test_time_to_first_tools_list(self):
+        """Test that the first tools/list is served within the budget."""
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                os.path.join(project_root, "mcp_terminal.py"),
+                "--controller",
+                "subprocess",
+                "--log-level",
+                "WARNING",
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+        try:
+            _send(
+                process,
+                {
+                    "jsonrpc": "2.0",
+                    "id": 1,
+                    "method": "initialize",
+                    "params": {
+                        "protocolVersion": "2024-11-05",
+                        "capabilities": {},
+                        "clientInfo": {"name": "startup-benchmark", "version": "1"},
+                    },
+                },
+            )
+            _receive(process, 1)
+            _send(process, {"jsonrpc": "2.0", "method": "notifications/initialized"})
+            _send(process, {"jsonrpc": "2.0", "id": 2, "method": "tools/list"})
+            response = _receive(process, 2)
+            elapsed = time.perf_counter() - started
+        finally:
+            process.kill()
+            process.wait()
+
+        tools = [tool["name"] for tool in response["result"]["tools"]]
+        self.assertIn("execute_command", tools)
+        self.assertLess(
+            elapsed,
+            STARTUP_BUDGET,
+            f"Time to first tools/list: {elapsed:.3f}s",
+        )
+
+    def test_optional_modules_deferred(self):
+        """Test that registering the tools imports no optional subsystem."""
+        code = (
+            "import sys\n"
+            "from mcp_terminal.server import MCPTerminalServer\n"
+            "MCPTerminalServer(controller_type='subprocess').register_tools()\n"
+            f"print([m for m in {DEFERRED_MODULES!r} if m in sys.modules])\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            cwd=src_path,
+            check=True,
+        )
+        self.assertEqual(result.stdout.strip().splitlines()[-1], "[]")
+
+
+if __name__ == "__main__":
+    unittest.main()
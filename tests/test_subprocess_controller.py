@@ -5,6 +5,7 @@ Tests for the subprocess terminal controller.
 import asyncio
 import os
 import sys
+import tempfile
 import unittest
 from unittest import IsolatedAsyncioTestCase
 
@@ -41,10 +42,92 @@ class TestSubprocessTerminalController(IsolatedAsyncioTestCase):
         terminal_type = await self.controller.get_terminal_type()
         self.assertEqual(terminal_type, "subprocess")
 
+    async def test_get_current_directory(self):
+        """Test that the working directory is reported without a command."""
+        self.assertEqual(await self.controller.get_current_directory(), os.getcwd())
+        self.assertIsNone(await self.controller.get_terminal_size())
+
     async def test_cleanup(self):
         """Test cleaning up resources."""
         await self.controller.cleanup()
-        # No assertions needed as cleanup does nothing for subprocess controller
+        # No assertions needed as no command is running
+
+    def _pid_alive(self, pid):
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        try:
+            # An orphan killed here may linger as a zombie until init reaps it
+            with open(f"/proc/{pid}/stat") as f:
+                return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+        except OSError:
+            return True
+
+    async def _child_pid(self, path):
+        for _ in range(100):
+            if os.path.exists(path) and os.path.getsize(path):
+                with open(path) as f:
+                    return int(f.read())
+            await asyncio.sleep(0.02)
+        self.fail("Command did not start its child")
+
+    async def test_background_output_discarded(self):
+        """Test that commands not waited for are reaped without their output."""
+        result = await self.controller.execute_command(
+            "echo background", wait_for_output=False
+        )
+        self.assertTrue(result["success"])
+        (process,) = self.controller._processes
+        self.assertIsNone(process.stdout)
+        self.assertIsNone(process.stderr)
+        for _ in range(100):
+            if not self.controller._processes:
+                break
+            await asyncio.sleep(0.02)
+        self.assertEqual(process.returncode, 0)
+        self.assertFalse(self.controller._processes)
+
+    @unittest.skipIf(sys.platform == "win32", "Process groups are POSIX-only")
+    async def test_timeout_kills_children(self):
+        """Test that a timed out command is killed along with its children."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "pid")
+            result = await self.controller.execute_command(
+                f"sleep 30 & echo $! > {path}; wait", timeout=1
+            )
+            self.assertFalse(result["success"])
+            self.assertIn("timed out", result["error"])
+            child = await self._child_pid(path)
+        await asyncio.sleep(0.1)
+        self.assertFalse(self._pid_alive(child))
+
+    @unittest.skipIf(sys.platform == "win32", "Process groups are POSIX-only")
+    async def test_cleanup_stops_running_commands(self):
+        """Test that cleanup stops running commands and their children."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "pid")
+            waited = asyncio.create_task(
+                self.controller.execute_command(
+                    f"sleep 30 & echo $! > {path}; wait", timeout=60
+                )
+            )
+            background = await self.controller.execute_command(
+                "sleep 30", wait_for_output=False
+            )
+            self.assertTrue(background["success"])
+            child = await self._child_pid(path)
+
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            await self.controller.cleanup()
+            result = await asyncio.wait_for(waited, 5)
+            self.assertLess(loop.time() - started, 5)
+        self.assertFalse(result["success"])
+        self.assertLess(result["return_code"], 0)
+        await asyncio.sleep(0.1)
+        self.assertFalse(self._pid_alive(child))
+        self.assertEqual(await self.controller.terminate(), 0)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,84 @@
+"""
+Tests for the terminal tool.
+"""
+
+import json
+import os
+import sys
+import unittest
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, patch
+
+# Add both src and project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+src_path = os.path.join(project_root, "src")
+sys.path.insert(0, project_root)
+sys.path.insert(0, src_path)
+
+from mcp.server.fastmcp import FastMCP
+
+from mcp_terminal.tools.terminal import TerminalTool
+
+
+class TestTerminalInfo(IsolatedAsyncioTestCase):
+    """Test cases for get_terminal_info."""
+
+    async def asyncSetUp(self):
+        """Set up the test case."""
+        self.tool = TerminalTool(controller_type="subprocess")
+        self.mcp = FastMCP("test")
+        self.tool.register_mcp(self.mcp)
+
+    async def _info(self):
+        content = await self.mcp.call_tool("get_terminal_info", {})
+        return json.loads(content[0][0].text)
+
+    async def test_info_without_running_commands(self):
+        """Test that no command is sent to the terminal."""
+        with patch.object(
+            self.tool.controller, "execute_command", new=AsyncMock()
+        ) as execute:
+            info = await self._info()
+        execute.assert_not_called()
+        self.assertEqual(info["terminal_type"], "subprocess")
+        self.assertEqual(info["current_directory"], os.getcwd())
+        self.assertIn("rows", info["terminal_size"])
+
+    async def test_static_fields_computed_once(self):
+        """Test that static facts and the terminal type are cached."""
+        with (
+            patch.object(
+                self.tool.controller,
+                "get_terminal_type",
+                new=AsyncMock(return_value="subprocess"),
+            ) as get_type,
+            patch("getpass.getuser") as getuser,
+        ):
+            await self._info()
+            await self._info()
+        self.assertEqual(get_type.await_count, 1)
+        getuser.assert_not_called()
+
+    async def test_controller_directory_used(self):
+        """Test that a directory tracked by the controller is reported."""
+        with patch.object(
+            self.tool.controller,
+            "get_current_directory",
+            new=AsyncMock(return_value="/tracked"),
+        ):
+            info = await self._info()
+        self.assertEqual(info["current_directory"], "/tracked")
+
+    async def test_untracked_directory_unknown(self):
+        """Test that the server's directory is not passed off as the terminal's."""
+        with patch.object(
+            self.tool.controller,
+            "get_current_directory",
+            new=AsyncMock(return_value=None),
+        ):
+            info = await self._info()
+        self.assertEqual(info["current_directory"], "unknown")
+
+
+if __name__ == "__main__":
+    unittest.main()
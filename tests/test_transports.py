@@ -0,0 +1,105 @@
+"""
+Tests for the HTTP transports of the MCP Terminal Server.
+"""
+
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+import unittest
+
+# Add both src and project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+src_path = os.path.join(project_root, "src")
+sys.path.insert(0, project_root)
+sys.path.insert(0, src_path)
+
+import httpx
+from mcp import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+
+
+class TestStreamableHttp(unittest.TestCase):
+    """Test cases for the streamable HTTP mode."""
+
+    def _serve(self, *args):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                os.path.join(project_root, "mcp_terminal.py"),
+                "--mode",
+                "streamable-http",
+                "--controller",
+                "subprocess",
+                "--port",
+                str(port),
+                "--log-level",
+                "ERROR",
+                "--history-max-rows",
+                "0",
+                *args,
+            ],
+            stderr=subprocess.DEVNULL,
+        )
+        self.addCleanup(process.wait)
+        self.addCleanup(process.terminate)
+
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port)).close()
+                return f"http://127.0.0.1:{port}"
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.1)
+
+    async def _call(self, base_url, progress):
+        async def on_progress(value, total, message):
+            progress.append((value, total))
+
+        async with streamablehttp_client(f"{base_url}/mcp") as streams:
+            async with ClientSession(streams[0], streams[1]) as session:
+                await session.initialize()
+                tools = await session.list_tools()
+                result = await session.call_tool(
+                    "execute_command",
+                    {"command": "sleep 1.5; echo done", "timeout": 10},
+                    progress_callback=on_progress,
+                )
+        return [tool.name for tool in tools.tools], result
+
+    def test_session_with_progress(self):
+        """Test a session whose command streams progress before its result."""
+        base_url = self._serve()
+        progress = []
+        names, result = asyncio.run(self._call(base_url, progress))
+        self.assertIn("execute_command", names)
+        self.assertIn("done", result.structuredContent["output"])
+        self.assertGreaterEqual(len(progress), 1)
+        self.assertEqual(progress[0][1], 10)
+
+        metrics = httpx.get(f"{base_url}/metrics")
+        self.assertIn('mcp_tool_calls_total{tool="execute_command"} 1', metrics.text)
+
+    def test_stateless(self):
+        """Test that stateless mode needs no session id between requests."""
+        base_url = self._serve("--stateless")
+        headers = {"Accept": "application/json, text/event-stream"}
+        response = httpx.post(
+            f"{base_url}/mcp",
+            headers=headers,
+            json={"jsonrpc": "2.0", "id": 1, "method": "tools/list"},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("mcp-session-id", response.headers)
+        self.assertIn("execute_command", response.text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,247 @@
+"""
+Tests for multi-worker SSE serving.
+"""
+
+import asyncio
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+# Add both src and project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+src_path = os.path.join(project_root, "src")
+sys.path.insert(0, project_root)
+sys.path.insert(0, src_path)
+
+import httpx
+
+from mcp_terminal.workers import (
+    SessionAffinity,
+    SessionRegistry,
+    prepare_state_dir,
+    reuseport_supported,
+)
+
+SESSION = "0123456789abcdef0123456789abcdef"
+
+
+class TestSessionRegistry(unittest.TestCase):
+    """Test cases for the shared session registry."""
+
+    def setUp(self):
+        """Set up the test case."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "registry.db")
+        self.registry = SessionRegistry(self.path)
+
+    def tearDown(self):
+        """Clean up the test case."""
+        self.registry.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_owner_visible_to_other_connections(self):
+        """Test that a claim made through one connection is seen by another."""
+        self.registry.register_worker("worker-0", "/tmp/worker-0.sock", 1)
+        self.registry.claim(SESSION, "worker-0")
+
+        other = SessionRegistry(self.path)
+        try:
+            self.assertEqual(other.owner(SESSION), "/tmp/worker-0.sock")
+            self.assertEqual(other.workers()[0]["sessions"], 1)
+        finally:
+            other.close()
+
+        self.registry.release(SESSION)
+        self.assertIsNone(self.registry.owner(SESSION))
+
+    def test_remove_worker_drops_sessions(self):
+        """Test that removing a worker forgets its sessions."""
+        self.registry.register_worker("worker-0", "/tmp/worker-0.sock", 1)
+        self.registry.claim(SESSION, "worker-0")
+        self.registry.remove_worker("worker-0")
+        self.assertIsNone(self.registry.owner(SESSION))
+        self.assertEqual(self.registry.workers(), [])
+
+
+@unittest.skipIf(sys.platform == "win32", "Directory modes are POSIX-only")
+class TestStateDir(unittest.TestCase):
+    """Test cases for preparing the workers' state directory."""
+
+    def setUp(self):
+        """Set up the test case."""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Clean up the test case."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_created_private(self):
+        """Test that a missing directory is created with mode 0700."""
+        path = os.path.join(self.temp_dir, "state")
+        prepare_state_dir(path)
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o700)
+        prepare_state_dir(path)
+
+    def test_open_directory_refused(self):
+        """Test that an existing directory open to others is refused."""
+        path = os.path.join(self.temp_dir, "state")
+        os.mkdir(path)
+        os.chmod(path, 0o755)
+        with self.assertRaises(RuntimeError):
+            prepare_state_dir(path)
+
+    def test_symlink_refused(self):
+        """Test that a symlink is not followed to another directory."""
+        target = os.path.join(self.temp_dir, "target")
+        os.mkdir(target, 0o700)
+        path = os.path.join(self.temp_dir, "state")
+        os.symlink(target, path)
+        with self.assertRaises(RuntimeError):
+            prepare_state_dir(path)
+
+
+class TestSessionAffinity(IsolatedAsyncioTestCase):
+    """Test cases for the session affinity middleware."""
+
+    async def asyncSetUp(self):
+        """Set up the test case."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.registry = SessionRegistry(os.path.join(self.temp_dir, "registry.db"))
+        self.registry.register_worker("worker-0", "/nonexistent.sock", 1)
+        self.seen = []
+
+        async def app(scope, receive, send):
+            self.seen.append((scope["method"], scope["path"]))
+            if scope["method"] == "GET":
+                # Session claimed once the endpoint event is sent
+                await send({"type": "http.response.start", "status": 200})
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": b"event: endpoint\r\ndata: /messages/?session_id="
+                        + SESSION.encode()
+                        + b"\r\n\r\n",
+                        "more_body": True,
+                    }
+                )
+                self.claimed = self.registry.owner(SESSION)
+                await send({"type": "http.response.body", "body": b""})
+            else:
+                await send({"type": "http.response.start", "status": 202})
+                await send({"type": "http.response.body", "body": b"Accepted"})
+
+        self.middleware = SessionAffinity(
+            app, self.registry, "worker-0", "/sse", "/messages/"
+        )
+        self.client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=self.middleware),
+            base_url="http://test",
+        )
+
+    async def asyncTearDown(self):
+        """Clean up the test case."""
+        await self.client.aclose()
+        await self.middleware.aclose()
+        self.registry.close()
+        shutil.rmtree(self.temp_dir)
+
+    async def test_stream_claims_and_releases_session(self):
+        """Test that an SSE stream owns its session while open."""
+        response = await self.client.get("/sse")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.claimed, "/nonexistent.sock")
+        self.assertIsNone(self.registry.owner(SESSION))
+        self.assertEqual(self.middleware.sessions, set())
+
+    async def test_unknown_session_handled_locally(self):
+        """Test that POSTs for unregistered sessions are not forwarded."""
+        response = await self.client.post(f"/messages/?session_id={SESSION}")
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self.seen, [("POST", "/messages/")])
+
+    async def test_unreachable_owner(self):
+        """Test that a POST for an unreachable owner fails with 502."""
+        self.registry.register_worker("worker-1", "/nonexistent-1.sock", 2)
+        self.registry.claim(SESSION, "worker-1")
+        response = await self.client.post(f"/messages/?session_id={SESSION}")
+        self.assertEqual(response.status_code, 502)
+        self.assertEqual(self.seen, [])
+
+
+@unittest.skipUnless(reuseport_supported(), "SO_REUSEPORT not available")
+class TestWorkers(unittest.TestCase):
+    """End-to-end test of several workers sharing a port."""
+
+    def test_posts_reach_session_owner(self):
+        """Test that POSTs on new connections reach the worker owning the stream."""
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        state_dir = tempfile.mkdtemp()
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                os.path.join(project_root, "mcp_terminal.py"),
+                "--mode",
+                "sse",
+                "--workers",
+                "2",
+                "--port",
+                str(port),
+                "--state-dir",
+                state_dir,
+                "--controller",
+                "subprocess",
+                "--log-level",
+                "ERROR",
+            ],
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            codes = asyncio.run(self._exchange(port, state_dir))
+        finally:
+            process.terminate()
+            process.wait(30)
+            shutil.rmtree(state_dir)
+        self.assertEqual(codes, [202] * len(codes))
+        self.assertEqual(process.returncode, 0)
+
+    async def _exchange(self, port, state_dir):
+        base_url = f"http://127.0.0.1:{port}"
+        registry = SessionRegistry(os.path.join(state_dir, "registry.db"))
+        try:
+            deadline = time.monotonic() + 30
+            while len(registry.workers()) < 2:
+                if time.monotonic() > deadline:
+                    raise TimeoutError("Workers did not start")
+                await asyncio.sleep(0.1)
+        finally:
+            registry.close()
+
+        async with httpx.AsyncClient(base_url=base_url, timeout=10) as client:
+            async with client.stream("GET", "/sse") as stream:
+                lines = stream.aiter_lines()
+                async for line in lines:
+                    if line.startswith("data:"):
+                        endpoint = line[5:].strip()
+                        break
+                codes = []
+                for i in range(10):
+                    # A fresh connection each time, so the kernel picks a worker
+                    async with httpx.AsyncClient(base_url=base_url) as post:
+                        response = await post.post(
+                            endpoint,
+                            json={"jsonrpc": "2.0", "id": i, "method": "ping"},
+                        )
+                    codes.append(response.status_code)
+        return codes
+
+
+if __name__ == "__main__":
+    unittest.main()